@@ -0,0 +1,205 @@
+#!/usr/bin/python3
+"""
+Times each stage of generation across a range of cavern sizes.
+
+  benchmark.py --sizes 60 120 200 300 -c 5
+
+For each size, caverns are generated from the same seeds and the mean time
+of each stage is printed, along with the time per thousand tiles. If a stage
+scales linearly with the area of the cavern, its time per tile stays flat as
+the size goes up.
+
+The peak RSS while generating each cavern is also shown. Where the peak can't
+be reset between caverns (anywhere but Linux), it is the peak of the whole
+process instead, and is labelled that way.
+
+With --memory, the memory allocated by each stage is measured with
+tracemalloc, along with the lines that allocated the most. This makes
+generation slower, so the times are less accurate.
+"""
+
+from typing import Dict, List, NamedTuple, Optional
+
+import argparse
+import collections
+import os.path
+import sys
+import time
+
+from lib import Cavern, STAGES
+from lib.base import (
+    Context, GenerationError, Logger, MemoryLogger, QuietLogger)
+from lib.cli import add_seed_range, seed_range
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+class StageTimer(QuietLogger):
+  """Adds up how long each stage takes."""
+  tracing = True
+
+  def __init__(self):
+    self.totals: Dict[str, float] = collections.defaultdict(float)
+    self._started: Dict[str, float] = {}
+
+  def trace_begin(self, cavern, name, args=None):
+    if name in STAGES:
+      self._started[name] = time.perf_counter()
+
+  def trace_end(self, cavern, name):
+    if name in self._started:
+      self.totals[name] += time.perf_counter() - self._started.pop(name)
+
+
+SizeResult = NamedTuple(
+    'SizeResult',
+    size=int,
+    runs=int,
+    failures=int,
+    tiles=int,  # Mean tiles in each cavern's bounds
+    script_lines=int,  # Mean lines of script in each cavern
+    stages=Dict[str, float],  # Mean seconds spent in each stage
+    peak_rss=Optional[int],  # Highest peak RSS of any cavern, in bytes
+    # Whether peak_rss was reset before each cavern. If not, it is the peak
+    # of the whole process so far.
+    per_cavern_rss=bool,
+    memory=Optional[str],  # The MemoryLogger report, with --memory
+)
+
+
+def reset_peak_rss() -> bool:
+  """
+  Resets the peak RSS, if the OS allows it (Linux does). Returns whether it
+  was reset.
+  """
+  try:
+    with open('/proc/self/clear_refs', 'w', encoding='utf-8') as f:
+      f.write('5')
+    return True
+  except OSError:
+    return False
+
+
+def peak_rss() -> Optional[int]:
+  """Returns the peak RSS of this process in bytes, if available."""
+  try:
+    with open('/proc/self/status', encoding='utf-8') as f:
+      for line in f:
+        if line.startswith('VmHWM:'):
+          return int(line.split()[1]) * 1024
+  except OSError:
+    pass
+  try:
+    import resource # pylint: disable=import-outside-toplevel
+    # This can't be reset, so it is the peak of the whole process. macOS
+    # reports it in bytes, and everything else in kilobytes.
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+  except ImportError:
+    return None
+
+
+def benchmark( # pylint: disable=too-many-locals
+    size: int, seeds: List[int], memory: bool) -> SizeResult:
+  """Returns the mean time of each stage for caverns of the given size."""
+  timer = StageTimer()
+  logger: Logger = MemoryLogger(timer) if memory else timer
+  runs = 0
+  failures = 0
+  tiles = 0
+  script_lines = 0
+  rss = None
+  per_cavern_rss = True
+  for seed in seeds:
+    per_cavern_rss &= reset_peak_rss()
+    cavern = Cavern(Context.generate(logger, seed, size=size), lean=True)
+    try:
+      cavern.generate()
+    except GenerationError:
+      failures += 1
+      continue
+    finally:
+      cavern_rss = peak_rss()
+      if cavern_rss is not None:
+        rss = max(rss or 0, cavern_rss)
+    runs += 1
+    _, _, width, height = cavern.diorama.bounds
+    tiles += width * height
+    script_lines += len(cavern.diorama.script)
+  n = max(runs, 1)
+  return SizeResult(
+      size=size,
+      runs=runs,
+      failures=failures,
+      tiles=tiles // n,
+      script_lines=script_lines // n,
+      stages={
+          k: v / max(runs + failures, 1) for k, v in timer.totals.items()},
+      peak_rss=rss,
+      per_cavern_rss=per_cavern_rss,
+      memory=(
+          logger.report(ROOT) if isinstance(logger, MemoryLogger) else None))
+
+
+def print_table(results: List[SizeResult]):
+  def row(label: str, values: List[Optional[float]]):
+    print(f'{label:>12} ' + ' '.join(
+        f'{v:>9.1f}' if v is not None else f'{"":>9}' for v in values))
+
+  print(f'{"size":>12} ' + ' '.join(f'{r.size:>9d}' for r in results))
+  print(f'{"tiles":>12} ' + ' '.join(f'{r.tiles:>9d}' for r in results))
+  print(f'{"failures":>12} ' + ' '.join(f'{r.failures:>9d}' for r in results))
+  print(f'{"script lines":>12} ' + ' '.join(
+      f'{r.script_lines:>9d}' for r in results))
+  per_cavern_rss = all(r.per_cavern_rss for r in results)
+  row('peak RSS MB' if per_cavern_rss else 'process RSS', [
+      r.peak_rss / (1 << 20) if r.peak_rss is not None else None
+      for r in results])
+  if not per_cavern_rss:
+    print('(peak RSS of the whole process so far in MB, since it could not be '
+          'reset for each cavern)')
+  print('\nms per cavern')
+  for stage in STAGES:
+    row(stage, [r.stages.get(stage, 0) * 1000 for r in results])
+  totals = [sum(r.stages.values()) * 1000 for r in results]
+  row('total', totals)
+  print('\nms per 1000 tiles')
+  for stage in STAGES:
+    row(stage, [
+        r.stages.get(stage, 0) * 1e6 / r.tiles if r.tiles else None
+        for r in results])
+  row('total', [
+      t * 1000 / r.tiles if r.tiles else None
+      for t, r in zip(totals, results)])
+
+
+def main():
+  parser = argparse.ArgumentParser(
+    prog='benchmark',
+    description='Times each stage of generation across cavern sizes.')
+  parser.add_argument(
+    '--sizes',
+    type=int,
+    nargs='+',
+    default=[60, 100, 150, 200, 300],
+    help='The cavern sizes to try.')
+  parser.add_argument(
+    '--memory',
+    action=argparse.BooleanOptionalAction,
+    help='Measure the memory each stage allocates with tracemalloc.')
+  add_seed_range(parser, 3, 'How many seeds to generate at each size.')
+  args = parser.parse_args()
+
+  seeds = list(seed_range(parser, args))
+  results = []
+  for size in args.sizes:
+    print(f'Generating {len(seeds)} caverns of size {size}...', file=sys.stderr)
+    results.append(benchmark(size, seeds, args.memory))
+  print_table(results)
+  for r in results:
+    if r.memory:
+      print(f'\nMemory for size {r.size}\n{r.memory}')
+
+
+if __name__ == '__main__':
+  main()
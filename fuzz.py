@@ -0,0 +1,303 @@
+#!/usr/bin/python3
+"""
+Generates caverns over a range of seeds and groups everything that went wrong.
+
+  fuzz.py -s 0 -c 100000 -o fuzz/
+  fuzz.py -s 0 -c 100000 --perturb 0.5 -o fuzz/
+
+Failures are grouped by the type of exception and the functions it was raised
+through, and warnings are grouped by their message with any numbers removed.
+Every cavern's scripts are validated, so mistakes in them are warnings too.
+For each group, a file in the output directory has how often it happened, a
+traceback, and the smallest reproducer found: a seed and the fewest overrides
+that still cause it. With --perturb, every cavern also gets random overrides
+that scale its tuning values by up to that fraction either way.
+"""
+
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+import argparse
+import concurrent.futures
+import dataclasses
+import hashlib
+import json
+import os
+import os.path
+import random
+import re
+import sys
+import traceback
+
+from lib import Cavern
+from lib.base import Context, Curve, GenerationError, Logger, QuietLogger
+from lib.cli import add_jobs, add_seed_range, seed_range
+from lib.version import VERSION
+
+# How many seeds each worker process fuzzes at a time.
+CHUNK_SIZE = 256
+# How many seeds to remember for each bucket.
+SAMPLE_SIZE = 20
+# How many frames from the innermost end of a traceback make its signature.
+SIGNATURE_FRAMES = 6
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+_NUMBER_RE = re.compile(r'(0x)?[0-9a-fA-F]*[0-9][0-9a-fA-F]*')
+
+# Overrides for a single cavern, as they would be given to hognose --set.
+Overrides = Tuple[Tuple[str, str], ...]
+
+# A problem seen while generating one cavern.
+Problem = NamedTuple(
+    'Problem',
+    kind=str,       # 'error' or 'warning'
+    signature=str,  # The same for every problem in a bucket
+    detail=str,     # A traceback or message
+)
+
+Bucket = NamedTuple(
+    'Bucket',
+    kind=str,
+    signature=str,
+    count=int,
+    samples=Tuple[Tuple[int, Overrides], ...],
+    detail=str,
+)
+
+
+class _CollectingLogger(QuietLogger):
+  """Keeps warnings instead of printing them."""
+
+  def __init__(self):
+    self.warnings: List[str] = []
+
+  def log_warning(self, message):
+    self.warnings.append(message)
+
+
+def _normalize(message: str) -> str:
+  return _NUMBER_RE.sub('#', message)
+
+
+def error_signature(e: BaseException) -> str:
+  """Describes where an exception came from, ignoring specific values."""
+  frames = traceback.extract_tb(e.__traceback__)[-SIGNATURE_FRAMES:]
+  def where(filename):
+    # Library paths differ between machines, so only their names are kept.
+    if filename.startswith(ROOT + os.sep):
+      return os.path.relpath(filename, ROOT)
+    return os.path.basename(filename)
+  path = ' < '.join(
+      f'{where(f.filename)}:{f.name}' for f in reversed(frames))
+  return f'{type(e).__name__}: {_normalize(str(e))} @ {path}'
+
+
+def run(seed: int, overrides: Overrides) -> List[Problem]:
+  """Generates one cavern and returns everything that went wrong."""
+  logger = _CollectingLogger()
+  problems = []
+  try:
+    cavern = Cavern(
+        Context.generate(
+            logger, seed, **Context.coerce_overrides(dict(overrides))),
+        lean=True, keep_diorama=False, validate=True)
+    cavern.generate()
+  except GenerationError as e:
+    cause = e.__cause__ or e
+    problems.append(Problem(
+        'error',
+        error_signature(cause),
+        ''.join(traceback.format_exception(cause))))
+  except Exception as e: # pylint: disable=broad-exception-caught
+    # Failed while building the context, most likely from bad overrides.
+    problems.append(Problem(
+        'error',
+        error_signature(e),
+        ''.join(traceback.format_exception(e))))
+  for message in dict.fromkeys(logger.warnings):
+    problems.append(Problem('warning', _normalize(message), message))
+  return problems
+
+
+def _format(value: Any) -> str:
+  if isinstance(value, tuple):
+    return ','.join(_format(v) for v in value)
+  if isinstance(value, float):
+    return f'{value:.4g}'
+  return str(value)
+
+
+def perturb(seed: int, fraction: float) -> Overrides:
+  """
+  Returns random overrides for seed that scale each tuning value by up to
+  fraction either way. The same seed and fraction always give the same
+  overrides.
+  """
+  if not fraction:
+    return ()
+  rng = random.Random(f'fuzz:{seed}:{fraction}')
+  context = Context.generate(Logger(), seed)
+  def scale(value):
+    if isinstance(value, Curve): # pylint: disable=isinstance-second-argument-not-valid-type
+      return Curve(*(scale(v) for v in value))
+    if isinstance(value, tuple):
+      # Coverage ranges must stay in order.
+      return tuple(sorted(scale(v) for v in value))
+    if isinstance(value, bool):
+      return value
+    factor = rng.uniform(1 - fraction, 1 + fraction)
+    if isinstance(value, int):
+      return max(1, round(value * factor))
+    return value * factor
+  def h():
+    for f in dataclasses.fields(Context):
+      if f.name in (
+          'logger', 'seed', 'rng', 'biome', 'has_monsters', 'size',
+          'placement_version'):
+        continue
+      yield f.name, _format(scale(getattr(context, f.name)))
+  return tuple(h())
+
+
+def _fuzz_span(job: Tuple[int, int, float]) -> Dict[str, Bucket]:
+  start, stop, fraction = job
+  buckets: Dict[str, Bucket] = {}
+  for seed in range(start, stop):
+    overrides = perturb(seed, fraction)
+    for problem in run(seed, overrides):
+      b = buckets.get(problem.signature)
+      if b:
+        buckets[problem.signature] = b._replace(
+            count=b.count + 1,
+            samples=(b.samples + ((seed, overrides),))[:SAMPLE_SIZE])
+      else:
+        buckets[problem.signature] = Bucket(
+            problem.kind, problem.signature, 1, ((seed, overrides),),
+            problem.detail)
+  return buckets
+
+
+def _merge(into: Dict[str, Bucket], other: Dict[str, Bucket]):
+  for signature, b in other.items():
+    if signature in into:
+      a = into[signature]
+      into[signature] = a._replace(
+          count=a.count + b.count,
+          samples=(a.samples + b.samples)[:SAMPLE_SIZE])
+    else:
+      into[signature] = b
+
+
+def _reproduces(
+    kind: str, signature: str, seed: int, overrides: Overrides) -> bool:
+  return any(
+      p.kind == kind and p.signature == signature
+      for p in run(seed, overrides))
+
+
+def minimize(bucket: Bucket) -> Tuple[int, Overrides]:
+  """
+  Finds the smallest reproducer for a bucket. Samples with fewer overrides
+  are tried first, then overrides are removed one at a time for as long as
+  the problem still happens.
+  """
+  seed, overrides = min(bucket.samples, key=lambda s: (len(s[1]), s[0]))
+  if not overrides:
+    return seed, overrides
+  i = 0
+  while i < len(overrides):
+    candidate = overrides[:i] + overrides[i + 1:]
+    if _reproduces(bucket.kind, bucket.signature, seed, candidate):
+      overrides = candidate
+    else:
+      i += 1
+  return seed, overrides
+
+
+def write_report(
+    out: str, buckets: Dict[str, Bucket], seeds: int, minimized: bool):
+  os.makedirs(out, exist_ok=True)
+  summary = []
+  for b in sorted(buckets.values(), key=lambda b: -b.count):
+    bucket_id = hashlib.sha256(b.signature.encode('utf-8')).hexdigest()[:12]
+    seed, overrides = minimize(b) if minimized else b.samples[0]
+    # run() validates scripts, so the reproducer has to as well.
+    command = ' '.join(
+        [f'python hognose.py -s {seed:x} --validate']
+        + [f'--set {k}={v}' for k, v in overrides]
+        + ['-o -'])
+    with open(os.path.join(out, f'{bucket_id}.json'), 'w',
+              encoding='utf-8') as f:
+      json.dump({
+          'kind': b.kind,
+          'signature': b.signature,
+          'count': b.count,
+          'frequency': b.count / seeds,
+          'reproducer': {
+              'seed': f'{seed:x}',
+              'overrides': dict(overrides),
+              'command': command,
+          },
+          'samples': [
+              {'seed': f'{s:x}', 'overrides': dict(o)} for s, o in b.samples],
+          'detail': b.detail,
+      }, f, indent=2)
+    summary.append((bucket_id, b))
+  with open(os.path.join(out, 'summary.txt'), 'w', encoding='utf-8') as f:
+    f.write(f'Hognose {VERSION}: {seeds} caverns\n')
+    for bucket_id, b in summary:
+      f.write(
+          f'{b.count:8d} {b.count / seeds:8.3%} {b.kind:7s} {bucket_id} '
+          f'{b.signature}\n')
+  return summary
+
+
+def main():
+  parser = argparse.ArgumentParser(
+    prog='fuzz',
+    description=(
+        'Generates caverns over a range of seeds and groups the errors and '
+        'warnings they produce.'))
+  add_seed_range(parser, 10_000)
+  parser.add_argument(
+    '-o', '--out',
+    required=True,
+    metavar='DIR',
+    help='Where to write a summary and a file for each bucket.')
+  parser.add_argument(
+    '--perturb',
+    type=float,
+    default=0,
+    metavar='FRACTION',
+    help=(
+        'Randomly scale every tuning value of each cavern by up to this '
+        'fraction, such as 0.5 for anywhere from half to one and a half '
+        'times the usual value.'))
+  parser.add_argument(
+    '--minimize',
+    action=argparse.BooleanOptionalAction,
+    default=True,
+    help='Look for the smallest reproducer of each bucket.')
+  add_jobs(parser)
+  args = parser.parse_args()
+  seeds = seed_range(parser, args)
+
+  jobs = [
+      (s, min(s + CHUNK_SIZE, seeds.stop), args.perturb)
+      for s in seeds[::CHUNK_SIZE]]
+  buckets: Dict[str, Bucket] = {}
+  done = 0
+  with concurrent.futures.ProcessPoolExecutor(args.jobs) as executor:
+    for job, result in zip(jobs, executor.map(_fuzz_span, jobs)):
+      _merge(buckets, result)
+      done += job[1] - job[0]
+      print(
+          f'\r{done}/{args.count} caverns, {len(buckets)} buckets',
+          end='', file=sys.stderr)
+  print(file=sys.stderr)
+  summary = write_report(args.out, buckets, args.count, args.minimize)
+  for bucket_id, b in summary:
+    print(f'{b.count:8d} {b.kind:7s} {bucket_id} {b.signature}')
+
+
+if __name__ == '__main__':
+  main()
@@ -10,9 +10,12 @@ import sys
 import threading
 import time
 
-from lib import Cavern
+from lib import Cavern, STAGES
 from lib.base import (
-    Context, GenerationError, Logger, MultiCavernLogger, MAX_SEED)
+    ChromeTraceLogger, Context, GenerationError, Logger, MemoryLogger,
+    MultiCavernLogger, RngProfile, MAX_SEED)
+from lib.cache import CachedCavern, CavernCache, summarize
+from lib.cli import add_overrides
 from lib.version import VERSION_INFO, VERSION
 
 if TYPE_CHECKING:
@@ -23,9 +26,7 @@ __version__ = VERSION
 
 
 def _seeds(parser, args) -> List[int]:
-  seed: Optional[str] = args.seed
-
-  def parse(): # pylint: disable=inconsistent-return-statements
+  def parse(seed: Optional[str]): # pylint: disable=inconsistent-return-statements
     # No seed: Use seconds since epoch
     if seed is None:
       return int(time.time()) % MAX_SEED
@@ -56,10 +57,25 @@ def _seeds(parser, args) -> List[int]:
       f'- A hexadecimal number between 0 and {MAX_SEED - 1:x}\n'
       '- A Hognose level name like HN-A199-91118')
 
-  return [(parse() + i) % MAX_SEED for i in range(0, args.count)]
+  if args.seeds_from:
+    if args.seed is not None:
+      parser.error('Use either -s or --seeds-from, not both.')
+    if args.seeds_from == '-':
+      lines = sys.stdin.readlines()
+    else:
+      with open(args.seeds_from, encoding='utf-8') as f:
+        lines = f.readlines()
+    seeds = [parse(line) for line in lines if line.strip()]
+    if args.count is not None and len(seeds) > args.count:
+      print(
+          f'warning: Only using the first {args.count} of the {len(seeds)} '
+          f'seeds in {args.seeds_from}', file=sys.stderr)
+      seeds = seeds[:args.count]
+    return seeds
+  return [(parse(args.seed) + i) % MAX_SEED for i in range(0, args.count)]
 
 
-def main():
+def main(): # pylint: disable=too-many-branches,too-many-locals,too-many-statements
   parser = argparse.ArgumentParser(
     prog='hognose',
     description='Procedurally generates caverns for Manic Miners.',
@@ -68,15 +84,27 @@ def main():
     '-b', '--briefing',
     action=argparse.BooleanOptionalAction,
     help='Print the briefing after generating.')
+  parser.add_argument(
+    '--cache',
+    metavar='DIR',
+    help=(
+        'Keep generated caverns in DIR, and load them from there instead of '
+        'generating them again. Can be shared between processes.'))
+  parser.add_argument(
+    '--cache-size',
+    type=int,
+    default=1024,
+    metavar='MB',
+    help='Remove the least recently used caverns from --cache past this size.')
   parser.add_argument(
     '-c', '--count',
     type=int,
-    choices=range(1,9999),
-    default=1,
+    choices=range(1, 10000),
     metavar='(1-9999)',
     help=(
         'How many caverns to generate. When generating multiple caverns, -o '
-        'must be a directory.'))
+        'must be a directory. With --seeds-from, this is the most seeds to '
+        'read, and every seed in the file is used if it isn\'t given.'))
   parser.add_argument(
     '-d', '--draw',
     action='append_const',
@@ -84,71 +112,180 @@ def main():
     help=(
         'Draw the cavern generation process to the screen. Repeat for more '
         'verbose drawing. This will cause caverns to generate slower.'))
+  parser.add_argument(
+    '--draw-memory',
+    type=int,
+    default=512,
+    metavar='MB',
+    help=(
+        'Roughly how much memory -d may use to keep past frames. Older '
+        'frames are thinned out and then discarded beyond this.'))
+  parser.add_argument(
+    '--memory',
+    action=argparse.BooleanOptionalAction,
+    help=(
+        'Measure the memory allocated by each stage with tracemalloc and '
+        'print a summary at the end. This is slow.'))
   parser.add_argument(
     '-o', '--out',
     metavar='(-|FILE|DIR)',
     help=(
         'Where to write the file. Use - for stdout. If this is a directory, a '
         'filename will be generated from the level name.'))
+  parser.add_argument(
+    '--profile-rng',
+    action=argparse.BooleanOptionalAction,
+    help=(
+        'Count the random values drawn by each kind of step and each planner, '
+        'and print them for each cavern and for all of them together, along '
+        'with a fingerprint of what was drawn.'))
   parser.add_argument(
     '-s', '--seed',
     help='Use SEED for cavern generation.')
+  parser.add_argument(
+    '--seeds-from',
+    metavar='(-|FILE)',
+    help=(
+        'Generate a cavern for each seed in FILE, one per line. Use - for '
+        'stdin. See seed_search.py for a way to find seeds.'))
+  add_overrides(
+      parser,
+      'Override a value in the generation context, such as '
+      'weave_ratio=0.3 or crystal_richness=0.5,1,1. Can be repeated.')
+  parser.add_argument(
+    '--trace',
+    metavar='FILE',
+    help=(
+        'Write how long each stage took to FILE in Chrome trace event format. '
+        'Open it with chrome://tracing or https://ui.perfetto.dev.'))
+  parser.add_argument(
+    '--until',
+    choices=STAGES,
+    metavar='STAGE',
+    help=(
+        'Stop generating each cavern after STAGE. Useful with -d or --trace '
+        'to look at only part of the process. Stages are: '
+        f'{", ".join(STAGES)}.'))
+  parser.add_argument(
+    '--validate',
+    action=argparse.BooleanOptionalAction,
+    help='Check the scripts of each cavern for mistakes and warn about them.')
   parser.add_argument(
     '-v', '--version',
     action='version',
     version=VERSION)
 
   args = parser.parse_args()
-  if args.briefing is None and args.draw is None and args.out is None:
+  if all(a is None for a in (
+      args.briefing, args.draw, args.out, args.trace, args.memory,
+      args.profile_rng, args.until)):
     parser.error(
         'Nothing to do. Specify -d to draw cavern or -o to output to file.')
+  if args.until and (args.briefing or args.out):
+    parser.error('-b and -o need every stage to run, so they can\'t be used '
+                 'with --until.')
   if args.briefing and args.out == '-':
     parser.error(
         'Stubbornly refusing to print both briefing and level.dat to stdout.')
 
-  if args.count > 1:
+  try:
+    overrides = Context.parse_overrides(args.set)
+  except ValueError as e:
+    parser.error(str(e))
+
+  if args.count is None and not args.seeds_from:
+    args.count = 1
+  seeds = _seeds(parser, args)
+
+  if len(seeds) > 1:
     if (args.out is not None
         and (args.out == '-' or not os.path.isdir(args.out))):
       parser.error('-o must be a directory when generating multiple caverns.')
 
-  seeds = _seeds(parser, args)
-
   inx: 'Optional[Inspector]' = None
   if args.draw:
     from inspector import Inspector # pylint: disable=import-outside-toplevel
-    inx = Inspector(len(args.draw))
+    inx = Inspector(len(args.draw), args.draw_memory * 1024 * 1024)
   logger: Logger = (inx or Logger())
+  tracer: Optional[ChromeTraceLogger] = None
+  if args.trace:
+    tracer = ChromeTraceLogger(logger)
+    logger = tracer
+  memory: Optional[MemoryLogger] = None
+  if args.memory:
+    memory = MemoryLogger(logger)
+    logger = memory
 
   def graphics():
     if inx:
       typing.cast('Inspector', inx).run()
   graphics_thread = threading.Thread(target=graphics)
   graphics_thread.start()
+  cache: Optional[CavernCache] = None
+  rng_profile: Optional[RngProfile] = RngProfile() if args.profile_rng else None
+  if args.cache:
+    cache = CavernCache(args.cache, args.cache_size * 1024 * 1024)
   for i, seed in enumerate(seeds):
-    context = Context.generate(
-        seed=seed,
-        logger=MultiCavernLogger(logger, i, len(seeds)))
-    cavern = Cavern(context)
     start_time = time.time_ns()
-    try:
-      cavern.generate()
-      if args.out == '-':
-        print(cavern.serialized)
-      elif args.out:
-        filename = args.out
-        if os.path.isdir(filename):
-          filename = os.path.join(filename, f'{cavern.diorama.level_name}.dat')
-        with open(filename, 'w', encoding='utf-8') as f:
-          f.write(cavern.serialized)
-      if args.briefing:
-        print(cavern.diorama.briefing)
-      print((
-        f'Generated {cavern.diorama.level_name} with seed {hex(context.seed)} '
-        f'in {(time.time_ns() - start_time) // 1_000_000}ms'),
-        file=sys.stderr)
-    except GenerationError:
-      print(
-          f'Failed to generate cave {hex(context.seed)}',
+    result: Optional[CachedCavern] = None
+    # Drawing, tracing, profiling, --validate and --until all need to
+    # actually run the stages.
+    if cache and not (
+        args.draw or args.trace or args.memory or args.profile_rng
+        or args.validate or args.until):
+      result = cache.get(seed, overrides)
+    cached = result is not None
+    if result is None:
+      context = Context.generate(
+          seed=seed,
+          logger=MultiCavernLogger(logger, i, len(seeds)),
+          **overrides)
+      profile = context.rng.profile() if rng_profile else None
+      # The inspector draws what each stage made, so keep all of it.
+      cavern = Cavern(
+          context, lean=not args.draw, validate=bool(args.validate))
+      try:
+        cavern.generate(until=args.until)
+      except GenerationError:
+        print(
+            f'Failed to generate cave {hex(context.seed)}',
+            file=sys.stderr)
+        continue
+      finally:
+        if rng_profile and profile:
+          print(f'Random values drawn for seed {hex(seed)}\n'
+                f'{profile.report()}\n', file=sys.stderr)
+          rng_profile.add(profile)
+      if not cavern.is_done():
+        print((
+          f'Generated seed {hex(context.seed)} until {cavern.stage} '
+          f'in {(time.time_ns() - start_time) // 1_000_000}ms'),
+          file=sys.stderr)
+        continue
+      result = cache.put(cavern, overrides) if cache else summarize(cavern)
+    if args.out == '-':
+      print(result.serialized)
+    elif args.out:
+      filename = args.out
+      if os.path.isdir(filename):
+        filename = os.path.join(filename, f'{result.level_name}.dat')
+      with open(filename, 'w', encoding='utf-8') as f:
+        f.write(result.serialized)
+    if args.briefing:
+      print(result.briefing)
+    print((
+      f'{"Loaded" if cached else "Generated"} {result.level_name} '
+      f'with seed {hex(seed)} '
+      f'in {(time.time_ns() - start_time) // 1_000_000}ms'),
+      file=sys.stderr)
+  if tracer:
+    with open(args.trace, 'w', encoding='utf-8') as f:
+      tracer.write(f)
+  if rng_profile and len(seeds) > 1:
+    print(f'Random values drawn for all {len(seeds)} caverns\n'
+          f'{rng_profile.report()}', file=sys.stderr)
+  if memory:
+    print(memory.report(os.path.dirname(os.path.abspath(__file__))),
           file=sys.stderr)
   graphics_thread.join()
 
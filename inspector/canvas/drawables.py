@@ -1,6 +1,7 @@
-from typing import Optional, Tuple
+from typing import Callable, Optional, Tuple, TypeVar
 
 import abc
+import collections
 import enum
 import functools
 import math
@@ -18,6 +19,10 @@ class Drawable(abc.ABC):
 
 
 Color = Tuple[int, int, int]
+T = TypeVar('T')
+
+# How many rendered lines of text each font keeps around.
+TEXT_CACHE_SIZE = 4096
 
 
 class Fill(Drawable):
@@ -78,15 +83,48 @@ class Rect(Drawable):
       dc.tr(self._thickness))
 
 
+class _LruCache():
+
+  def __init__(self, size: int):
+    self._size = size
+    self._items: collections.OrderedDict = collections.OrderedDict()
+
+  def get(self, key, fn: Callable[[], T]) -> T:
+    try:
+      self._items.move_to_end(key)
+      return self._items[key]
+    except KeyError:
+      value = fn()
+      self._items[key] = value
+      if len(self._items) > self._size:
+        self._items.popitem(last=False)
+      return value
+
+
 class Font():
   def __init__(self, *args, **kwargs):
     self._args = args
     self._kwargs = kwargs
+    self._surfaces = _LruCache(TEXT_CACHE_SIZE)
+    self._sizes = _LruCache(TEXT_CACHE_SIZE)
 
   @functools.cached_property
   def proxied(self):
     return pygame.font.SysFont(*self._args, **self._kwargs)
 
+  def render(self, line: str, color: Color) -> pygame.Surface:
+    """Renders a single line of text, reusing earlier surfaces."""
+    return self._surfaces.get(
+        (line, color), lambda: self.proxied.render(line, False, color))
+
+  def size(self, text: str) -> Tuple[int, int]:
+    """The width of the widest line and the total height of text."""
+    def measure():
+      dims = tuple(
+          self.proxied.size(line) for line in text.splitlines() or ('',))
+      return max(w for w, _ in dims), sum(h for _, h in dims)
+    return self._sizes.get(text, measure)
+
 
 class Gravity(enum.Enum):
   TOP_LEFT = (-1, -1)
@@ -113,12 +151,12 @@ class RawText():
   @functools.cached_property
   def _measurements(self):
     gx, gy = self._gravity
-    _, th = self._font.proxied.size('M')
+    _, th = self._font.size('M')
     lines = self._text.splitlines()
 
     def h():
       for i, line in enumerate(lines):
-        tw, _ = self._font.proxied.size(line)
+        tw, _ = self._font.size(line)
         ox = 0
         oy = th * i
         if gx >= 0:
@@ -131,7 +169,7 @@ class RawText():
   def draw(self, dc, color, origin):
     x0, y0 = dc.tr(origin)
     for line, ox, oy in self._measurements:
-      font_surface = self._font.proxied.render(line, False, color)
+      font_surface = self._font.render(line, color)
       dc.surface.blit(font_surface, (x0 + ox, y0 + oy))
 
 
@@ -184,11 +222,9 @@ class LabelIfFits(Drawable): # pylint: disable=too-many-instance-attributes
     self._gravity: Gravity = gravity
     self._fallback: Optional[Drawable] = fallback
 
-  @functools.cached_property
+  @property
   def min_size(self):
-    dims = tuple(
-        self._font.proxied.size(line) for line in self._text.splitlines())
-    return max(w for w, h in dims), sum(h for w, h in dims)
+    return self._font.size(self._text)
 
   @functools.cached_property
   def _text_origin(self):
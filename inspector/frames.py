@@ -0,0 +1,195 @@
+"""
+Cheap snapshots of a cavern that can be drawn later.
+
+Capturing a frame happens on the generation thread, so it only copies the
+state needed to draw it. Drawables are built by the inspector on demand.
+"""
+
+from typing import (
+    Any, Dict, FrozenSet, Iterable, NamedTuple, Optional, Tuple)
+
+import abc
+
+from inspector.canvas import Canvas, FrozenCanvas
+from inspector.infograph.bsod import push_bsod
+from inspector.infograph.state import push_state
+from lib.planners import Planner, SomaticPlanner, StemPlanner
+from lib.planners.caves.base import BaseCavePlanner
+from lib.plastic import Tile, TileMap
+
+BubbleSummary = NamedTuple(
+    'BubbleSummary', id=int, left=int, top=int, width=int, height=int)
+BaseplateSummary = NamedTuple(
+    'BaseplateSummary',
+    id=int, kind=str, left=int, top=int, width=int, height=int)
+PathSummary = NamedTuple(
+    'PathSummary', kind=str, centers=Tuple[Tuple[float, float], ...])
+PlannerSummary = NamedTuple(
+    'PlannerSummary',
+    id=int,
+    is_stem=bool,
+    is_cave=bool,
+    fluid_type=Optional[Tile],
+    inspect_color=Optional[Tuple[int, int, int]],
+    pearl_radius=int,
+    baseplates=Tuple[Tuple[Tuple[float, float], int], ...],
+    center=Tuple[float, float],
+    has_pearl=bool,
+    expected_crystals=int)
+
+
+class Frame(abc.ABC):
+  """A single step the inspector can show."""
+
+  @abc.abstractmethod
+  def push(self, canvas: Canvas):
+    pass
+
+  def render(self) -> FrozenCanvas:
+    canvas = Canvas()
+    self.push(canvas)
+    return canvas.freeze()
+
+
+class BsodFrame(Frame):
+  """The crash screen."""
+
+  def __init__(self, seed: int, exception: Exception):
+    self.seed = seed
+    self.exception = exception
+
+  def push(self, canvas):
+    push_bsod(canvas, self.seed, self.exception)
+
+
+class DioramaSnapshot():
+  """The parts of a Diorama the inspector draws."""
+  # pylint: disable=too-many-instance-attributes
+
+  def __init__(self, diorama, previous: Optional['DioramaSnapshot']):
+    # Consecutive frames share anything the generator hasn't changed.
+    # Comparing two small dicts is much cheaper than keeping a second copy.
+    def share(name, value):
+      if previous:
+        prev = getattr(previous, name)
+        if prev == value:
+          return prev
+      return value
+    # The diorama keeps track of which tiles change, so there's no need to
+    # compare them all to find out whether the previous copy can be shared.
+    tiles = diorama.tiles
+    changes = tiles.changes() if isinstance(tiles, TileMap) else None
+    # The positions changed since the previous snapshot, if that's known.
+    self.tile_changes: Optional[FrozenSet[Tuple[int, int]]] = (
+        changes if previous else None)
+    if self.tile_changes is not None and not self.tile_changes:
+      self.tiles: Dict[Tuple[int, int], Tile] = previous.tiles
+    else:
+      self.tiles = dict(tiles)
+    self.crystals: Dict[Tuple[int, int], int] = share(
+        'crystals', dict(diorama.crystals))
+    self.ore: Dict[Tuple[int, int], int] = share('ore', dict(diorama.ore))
+    self.erosions = share('erosions', dict(diorama.erosions))
+    self.landslides = share('landslides', dict(diorama.landslides))
+    self.buildings = share('buildings', tuple(diorama.buildings))
+    self.creatures = share('creatures', tuple(diorama.creatures))
+    self.miners = share('miners', tuple(diorama.miners))
+    self.bounds = diorama.bounds
+    self.level_name: str = diorama.level_name
+    self.briefing: str = diorama.briefing
+    self.objectives: Tuple[str, ...] = share('objectives', tuple(
+        o.description for o in diorama.objectives))
+    self.script_len: int = len(diorama.script)
+
+  @property
+  def crystal_yield(self) -> int:
+    return (
+      sum(self.crystals.values())
+      + sum(t.crystal_yield for t in self.tiles.values())
+      + sum(b.type.crystals for b in self.buildings))
+
+  @property
+  def ore_yield(self) -> int:
+    return (
+      sum(self.ore.values())
+      + sum(t.ore_yield for t in self.tiles.values()))
+
+
+def _summarize_planner(planner: Planner) -> PlannerSummary:
+  is_stem = isinstance(planner, StemPlanner)
+  somatic = planner if isinstance(planner, SomaticPlanner) else None
+  return PlannerSummary(
+      id=planner.id,
+      is_stem=is_stem,
+      is_cave=(
+          (is_stem and planner.kind == StemPlanner.CAVE)
+          or isinstance(planner, BaseCavePlanner)),
+      fluid_type=planner.fluid_type,
+      inspect_color=somatic.inspect_color if somatic else None,
+      pearl_radius=planner.pearl_radius,
+      baseplates=tuple(
+          (bp.center, bp.pearl_radius) for bp in planner.baseplates),
+      center=planner.center,
+      has_pearl=bool(somatic and somatic.pearl),
+      expected_crystals=somatic.expected_crystals if somatic else 0)
+
+
+class StateFrame(Frame):
+  """A snapshot of a Cavern at some point during generation."""
+  # pylint: disable=too-many-instance-attributes
+
+  def __init__(
+      self,
+      cavern,
+      details: Any,
+      warnings: Iterable[str],
+      previous: Optional['StateFrame']):
+    self.context = cavern.context
+    self.stage: str = cavern.stage
+    self.warnings: Tuple[str, ...] = tuple(warnings)
+    if previous and previous.warnings == self.warnings:
+      self.warnings = previous.warnings
+
+    self.bubbles: Tuple[BubbleSummary, ...] = ()
+    self.baseplates: Tuple[BaseplateSummary, ...] = ()
+    self.paths: Tuple[PathSummary, ...] = ()
+    self.planners: Optional[Tuple[PlannerSummary, ...]] = None
+    if cavern.conquest:
+      self.planners = tuple(
+          _summarize_planner(p) for p in cavern.conquest.planners)
+      if previous and previous.planners == self.planners:
+        self.planners = previous.planners
+    else:
+      self.bubbles = tuple(
+          BubbleSummary(b.id, b.left, b.top, b.width, b.height)
+          for b in cavern.bubbles)
+      self.baseplates = tuple(
+          BaseplateSummary(
+              bp.id, bp.kind, bp.left, bp.top, bp.width, bp.height)
+          for bp in cavern.baseplates)
+      self.paths = tuple(
+          PathSummary(p.kind, tuple(bp.center for bp in p.baseplates))
+          for p in cavern.paths)
+
+    self.diorama = DioramaSnapshot(
+        cavern.diorama, previous.diorama if previous else None)
+    self.objective_positions: Tuple[Tuple[int, int], ...] = ()
+    if cavern.stage == 'adjure' and cavern.adjurator:
+      self.objective_positions = tuple(cavern.adjurator.positions)
+    self.serialized_len: Optional[int] = (
+        len(cavern.serialized) if cavern.serialized else None)
+
+    # Pearls and script fragments don't change once they are built, so
+    # they can be kept as-is. Anything else is reduced to its description.
+    self.pearl = None
+    self.details = details
+    if isinstance(details, Planner):
+      self.pearl = getattr(details, 'pearl', None)
+      self.details = str(details)
+
+  @property
+  def seed(self) -> int:
+    return self.context.seed
+
+  def push(self, canvas):
+    push_state(canvas, self)
@@ -0,0 +1,296 @@
+"""
+Bounded-memory storage for inspector frames.
+
+Frames are grouped into segments. Each segment begins with a keyframe that
+is kept whole, followed by deltas that record what changed in the diorama
+since the frame before. When the history grows past its memory budget, old
+segments are thinned out and then dropped entirely.
+"""
+
+from typing import Deque, Dict, List, Optional, Tuple
+
+import collections
+import copy
+import threading
+
+from inspector.frames import DioramaSnapshot, Frame, StateFrame
+
+# Start a new keyframe after this many frames.
+KEYFRAME_INTERVAL = 32
+# Rough cost in bytes of one dict entry or tuple item held by a frame.
+ENTRY_COST = 100
+# Rough cost in bytes of everything else in a frame.
+FRAME_COST = 2_000
+
+_DICT_FIELDS = ('tiles', 'crystals', 'ore', 'erosions', 'landslides')
+_VALUE_FIELDS = (
+    'buildings', 'creatures', 'miners', 'bounds', 'level_name', 'briefing',
+    'objectives', 'script_len')
+
+_DictChange = Tuple[Dict, Tuple]
+
+
+def _value_cost(value) -> int:
+  return len(value) if isinstance(value, tuple) else 1
+
+
+class DioramaDelta():
+  """The difference between two consecutive diorama snapshots."""
+
+  def __init__(self, dicts: Dict[str, _DictChange], values: Dict[str, object]):
+    self.dicts = dicts
+    self.values = values
+
+  @classmethod
+  def between(
+      cls,
+      before: DioramaSnapshot,
+      after: DioramaSnapshot) -> 'DioramaDelta':
+    dicts = {}
+    for name in _DICT_FIELDS:
+      b = getattr(before, name)
+      a = getattr(after, name)
+      if a is b:
+        continue
+      keys = after.tile_changes if name == 'tiles' else None
+      if keys is not None:
+        # Only these tiles can differ, so there's no need to compare them all.
+        changed = {k: a[k] for k in keys if k in a and b.get(k) != a[k]}
+        removed = tuple(k for k in keys if k in b and k not in a)
+      else:
+        changed = dict(a.items() - b.items())
+        removed = tuple(b.keys() - a.keys())
+      if changed or removed:
+        dicts[name] = (changed, removed)
+    values = {}
+    for name in _VALUE_FIELDS:
+      a = getattr(after, name)
+      if a != getattr(before, name):
+        values[name] = a
+    return cls(dicts, values)
+
+  def then(self, other: 'DioramaDelta') -> 'DioramaDelta':
+    """Combines this delta with the one that follows it."""
+    dicts = {}
+    for name in self.dicts.keys() | other.dicts.keys():
+      c1, r1 = self.dicts.get(name, ({}, ()))
+      c2, r2 = other.dicts.get(name, ({}, ()))
+      changed = {k: v for k, v in c1.items() if k not in r2}
+      changed.update(c2)
+      removed = tuple(set(r1).difference(c2).union(r2))
+      dicts[name] = (changed, removed)
+    return DioramaDelta(dicts, {**self.values, **other.values})
+
+  @property
+  def cost(self) -> int:
+    return ENTRY_COST * (
+        sum(len(c) + len(r) for c, r in self.dicts.values())
+        + sum(_value_cost(v) for v in self.values.values()))
+
+
+def _replay(
+    diorama: DioramaSnapshot,
+    deltas: List[DioramaDelta]) -> DioramaSnapshot:
+  if not deltas:
+    return diorama
+  result = copy.copy(diorama)
+  copied = set()
+  for delta in deltas:
+    for name, (changed, removed) in delta.dicts.items():
+      if name not in copied:
+        setattr(result, name, dict(getattr(result, name)))
+        copied.add(name)
+      d = getattr(result, name)
+      d.update(changed)
+      for k in removed:
+        d.pop(k, None)
+    for name, value in delta.values.items():
+      setattr(result, name, value)
+  return result
+
+
+def _frame_cost(frame: Frame) -> int:
+  if isinstance(frame, StateFrame):
+    diorama = frame.diorama
+    return FRAME_COST + ENTRY_COST * (
+        sum(len(getattr(diorama, name)) for name in _DICT_FIELDS)
+        + sum(_value_cost(getattr(diorama, name)) for name in _VALUE_FIELDS))
+  return FRAME_COST
+
+
+# Each entry is (serial, frame, delta). The keyframe has no delta. Every
+# other entry holds a copy of its frame without the diorama.
+_Entry = Tuple[int, Frame, Optional[DioramaDelta]]
+
+
+class _Segment():
+
+  def __init__(self, serial: int, keyframe: Frame):
+    self.entries: List[_Entry] = [(serial, keyframe, None)]
+    self.cost = _frame_cost(keyframe)
+
+  def __len__(self):
+    return len(self.entries)
+
+  def append(self, serial: int, frame: StateFrame, delta: DioramaDelta):
+    shell = copy.copy(frame)
+    shell.diorama = None
+    self.entries.append((serial, shell, delta))
+    self.cost += FRAME_COST + delta.cost
+
+  def decimate(self):
+    """Drops every other frame after the keyframe."""
+    kept = self.entries[:1]
+    cost = _frame_cost(self.entries[0][1])
+    pending: Optional[DioramaDelta] = None
+    for i, (serial, shell, delta) in enumerate(self.entries[1:]):
+      assert delta is not None
+      if pending:
+        delta = pending.then(delta)
+      if i % 2 == 0:
+        pending = delta
+      else:
+        pending = None
+        kept.append((serial, shell, delta))
+        cost += FRAME_COST + delta.cost
+    self.entries = kept
+    self.cost = cost
+
+  def frame(self, offset: int, start: Optional[Tuple[int, Frame]]) -> Frame:
+    """
+    Rebuilds the frame at offset.
+
+    If given, start is an (offset, frame) pair from earlier in this segment
+    to replay from instead of the keyframe.
+    """
+    base_offset, base = start or (0, self.entries[0][1])
+    _, shell, _ = self.entries[offset]
+    if offset == base_offset or not isinstance(base, StateFrame):
+      return base if offset == base_offset else shell
+    frame = copy.copy(shell)
+    frame.diorama = _replay(
+        base.diorama,
+        [d for _, _, d in self.entries[base_offset + 1:offset + 1]])
+    return frame
+
+
+class FrameHistory(): # pylint: disable=too-many-instance-attributes
+  """
+  A list of frames with a cursor, kept within a memory budget.
+
+  The cursor follows new frames while it is on the last one. Frames are
+  evicted from the front of the history, and never from the segment the
+  cursor is in or the segment new frames are going to.
+  """
+
+  def __init__(self, budget: int):
+    self.budget = budget
+    self._segments: Deque[_Segment] = collections.deque()
+    self._len = 0
+    self._cost = 0
+    self._index = 0
+    self._serial = 0
+    self._last: Optional[Frame] = None
+    self._cached: Optional[Tuple[int, Frame]] = None
+    self._lock = threading.Lock()
+
+  def __len__(self):
+    return self._len
+
+  @property
+  def index(self) -> int:
+    return self._index
+
+  def append(self, frame: Frame):
+    with self._lock:
+      last = self._last
+      tail = self._segments[-1] if self._segments else None
+      if (tail
+          and len(tail) < KEYFRAME_INTERVAL
+          and isinstance(frame, StateFrame)
+          and isinstance(last, StateFrame)
+          and last.seed == frame.seed):
+        self._cost -= tail.cost
+        tail.append(
+            self._serial,
+            frame,
+            DioramaDelta.between(last.diorama, frame.diorama))
+        self._cost += tail.cost
+      else:
+        self._segments.append(_Segment(self._serial, frame))
+        self._cost += self._segments[-1].cost
+      self._serial += 1
+      self._len += 1
+      self._last = frame
+      if self._index == self._len - 2:
+        self._index += 1
+      self._enforce_budget()
+
+  def seek(self, offset: int):
+    with self._lock:
+      self._index = min(max(self._index + offset, 0), self._len - 1)
+
+  def key(self) -> int:
+    """A number that identifies the frame at the cursor."""
+    with self._lock:
+      segment, offset = self._locate(self._index)
+      return segment.entries[offset][0]
+
+  def current(self) -> Frame:
+    """The frame at the cursor."""
+    with self._lock:
+      segment, offset = self._locate(self._index)
+      serial = segment.entries[offset][0]
+      if self._cached and self._cached[0] == serial:
+        return self._cached[1]
+      start = None
+      if self._cached:
+        # Replay from the last frame shown if it comes earlier in this
+        # segment, so stepping forward only applies one delta.
+        for i, (s, _, _) in enumerate(segment.entries[:offset]):
+          if s == self._cached[0]:
+            start = (i, self._cached[1])
+            break
+      frame = segment.frame(offset, start)
+      self._cached = (serial, frame)
+      return frame
+
+  def _locate(self, index: int) -> Tuple[_Segment, int]:
+    for segment in self._segments:
+      if index < len(segment):
+        return segment, index
+      index -= len(segment)
+    raise IndexError(index)
+
+  def _enforce_budget(self):
+    if self._cost <= self.budget:
+      return
+    # The cursor's segment and the tail segment must stay intact.
+    cursor = self._locate(self._index)[0]
+    tail = self._segments[-1]
+    before_cursor = True
+    for segment in self._segments:
+      if self._cost <= self.budget:
+        return
+      if segment is cursor:
+        before_cursor = False
+      if segment is cursor or segment is tail or len(segment) < 2:
+        continue
+      dropped = len(segment)
+      self._cost -= segment.cost
+      segment.decimate()
+      self._cost += segment.cost
+      dropped -= len(segment)
+      self._len -= dropped
+      if before_cursor:
+        self._index -= dropped
+    while self._cost > self.budget:
+      victim = next(
+          (seg for seg in self._segments if seg not in (cursor, tail)), None)
+      if victim is None:
+        return
+      if victim is self._segments[0]:
+        self._index -= len(victim)
+      self._segments.remove(victim)
+      self._cost -= victim.cost
+      self._len -= len(victim)
@@ -1,12 +1,13 @@
+from typing import Iterable, Tuple
+
 from inspector.canvas import Canvas, Circle
-from lib.holistics import Adjurator
 
 OBJECTIVE_COLOR = (0x00, 0xff, 0xff)
 
 
-def push_adjurator(canvas: Canvas, adjurator: Adjurator):
+def push_adjurator(canvas: Canvas, positions: Iterable[Tuple[int, int]]):
   pc = Canvas()
-  for x, y in adjurator.positions:
+  for x, y in positions:
     pc.push(Circle(
         color=OBJECTIVE_COLOR,
         origin=(x + 0.5, y + 0.5),
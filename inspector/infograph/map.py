@@ -4,7 +4,7 @@ from inspector.canvas import (
     Canvas, Circle, Label, LabelIfFits, Line, RadialLabel, Rect, v)
 from inspector.infograph.common import (
     FONT_TINY, Z_BOUNDS, Z_TILES, Z_ENTITIES, Z_CRYSTALS, Z_ORE, Z_HAZARDS)
-from lib.plastic import Diorama, Entity, Tile
+from lib.plastic import Entity, Tile
 
 BUILDING_COLOR = (0xff, 0xff, 0x00)
 BUILDING_LABEL_COLOR = (0x44, 0x44, 0x00)
@@ -43,7 +43,7 @@ def _push_resource(canvas, count, color, origin):
         thickness=v.a(1)))
 
 
-def _push_resources(canvas: Canvas, diorama: Diorama):
+def _push_resources(canvas: Canvas, diorama):
   oc = Canvas()
   ec = Canvas()
   for (x, y) in set(diorama.tiles) | set(diorama.ore) | set(diorama.crystals):
@@ -62,7 +62,7 @@ def _push_resources(canvas: Canvas, diorama: Diorama):
   canvas.push(ec.freeze(), Z_CRYSTALS)
 
 
-def _push_hazards(canvas: Canvas, diorama: Diorama):
+def _push_hazards(canvas: Canvas, diorama):
   pc = Canvas()
   lc = Canvas()
   for (x, y), event in diorama.erosions.items():
@@ -112,7 +112,7 @@ def _entity_line(entity: Entity, color, length, thickness) -> Line:
       thickness=thickness)
 
 
-def _push_entities(canvas: Canvas, diorama: Diorama):
+def _push_entities(canvas: Canvas, diorama):
   pc = Canvas()
   for building in diorama.buildings:
     rect = (
@@ -148,7 +148,7 @@ def _push_entities(canvas: Canvas, diorama: Diorama):
   canvas.push(pc.freeze(), Z_ENTITIES)
 
 
-def push_map(canvas: Canvas, diorama: Diorama):
+def push_map(canvas: Canvas, diorama):
   pc = Canvas()
   for (x, y), tile in diorama.tiles.items():
     color = tile.inspect_color
@@ -1,10 +1,8 @@
-from typing import Union
-
 import itertools
 
 from inspector.canvas import Canvas, Gravity, Rect, LabelIfFits, Line, v
 from inspector.infograph.common import FONT_TINY, Z_SPACES, Z_PATHS
-from lib.outlines import Bubble, Baseplate, Path
+from lib.outlines import Baseplate, Path
 
 
 BUBBLE_OUTLINE_COLOR = (0x10, 0x00, 0x77)
@@ -26,7 +24,7 @@ PATH_COLORS = {
 }
 
 
-def _space_rect(space: Union[Bubble, Baseplate]):
+def _space_rect(space):
   return (
       space.left,
       space.top,
@@ -68,10 +66,10 @@ def push_outlines(canvas: Canvas, bubbles, baseplates, paths):
     color = PATH_COLORS[path.kind]
     if not color:
       continue
-    for a, b in itertools.pairwise(path.baseplates):
+    for a, b in itertools.pairwise(path.centers):
       pc.push(Line(
           color=color,
-          start=a.center,
-          end=b.center,
+          start=a,
+          end=b,
           thickness=v.a(3) if path.kind == Path.SPANNING else v.a(2)))
   canvas.push(pc.freeze(), Z_PATHS)
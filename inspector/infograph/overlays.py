@@ -5,44 +5,44 @@ from inspector.infograph.common import (
 from lib.utils.text import word_wrap
 
 
-def _title(cavern):
-  name = cavern.diorama.level_name or f'0x{cavern.context.seed:08x}'
-  return f'{name} {cavern.stage}'
+def _title(frame):
+  name = frame.diorama.level_name or f'0x{frame.seed:08x}'
+  return f'{name} {frame.stage}'
 
 
-def _description(cavern): # pylint: disable=too-many-return-statements
-  if cavern.stage == 'init':
-    return str(cavern.context)
-  if cavern.stage == 'script':
+def _description(frame): # pylint: disable=too-many-return-statements
+  if frame.stage == 'init':
+    return str(frame.context)
+  if frame.stage == 'script':
     return ''
-  if cavern.stage == 'fence':
-    t = cavern.context.size
-    _, _, w, h = cavern.diorama.bounds
+  if frame.stage == 'fence':
+    t = frame.context.size
+    _, _, w, h = frame.diorama.bounds
     return f'Target size: {t}x{t}\nActual size: {w}x{h}'
-  if cavern.stage == 'serialize':
+  if frame.stage == 'serialize':
     return (
-        f'{len(cavern.diorama.script):d} script lines\n'
-        f'Total file size: {len(cavern.serialized)//1024:d}kB')
-  if cavern.diorama.briefing:
-    return word_wrap(cavern.diorama.briefing, 60)
-  if cavern.diorama.objectives:
-    return '\n'.join(
-        o.description for o in cavern.diorama.objectives)
-  if cavern.conquest:
-    cy = cavern.diorama.crystal_yield
-    ce = sum(p.expected_crystals for p in cavern.conquest.somatic_planners)
+        f'{frame.diorama.script_len:d} script lines\n'
+        f'Total file size: {frame.serialized_len//1024:d}kB')
+  if frame.diorama.briefing:
+    return word_wrap(frame.diorama.briefing, 60)
+  if frame.diorama.objectives:
+    return '\n'.join(frame.diorama.objectives)
+  if frame.planners is not None:
+    cy = frame.diorama.crystal_yield
+    ce = sum(p.expected_crystals for p in frame.planners)
     crystals = f'{cy:d}/{ce:d}' if cy and ce and cy != ce else f'{ce:d}'
-    ore = cavern.diorama.ore_yield
+    ore = frame.diorama.ore_yield
     return f'{crystals} EC\n{ore:d} Ore'
   return ''
 
 
-def push_overlays(canvas: Canvas, cavern, details, warnings):
+def push_overlays(canvas: Canvas, frame):
   pc = Canvas()
+  details = frame.details
   detail_str = f'{details}\n' if details else ''
   pc.push(Label(
       font=FONT_MED,
-      text=detail_str + _description(cavern),
+      text=detail_str + _description(frame),
       color=OVERLAY_COLOR,
       origin=(v.LEFT + OVERLAY_PADDING, v.BOTTOM - OVERLAY_PADDING),
       shadow_color=OVERLAY_SHADOW_COLOR,
@@ -50,7 +50,7 @@ def push_overlays(canvas: Canvas, cavern, details, warnings):
       gravity=Gravity.BOTTOM_LEFT))
   pc.push(Label(
       font=FONT_BIG,
-      text=_title(cavern),
+      text=_title(frame),
       color=OVERLAY_COLOR,
       origin=(v.LEFT + OVERLAY_PADDING, v.TOP + OVERLAY_PADDING),
       shadow_color=OVERLAY_SHADOW_COLOR,
@@ -58,7 +58,7 @@ def push_overlays(canvas: Canvas, cavern, details, warnings):
       gravity=Gravity.TOP_LEFT))
   pc.push(Label(
       font=FONT_MED,
-      text='\n'.join(warnings),
+      text='\n'.join(frame.warnings),
       color=WARNING_COLOR,
       origin=(v.RIGHT - OVERLAY_PADDING, v.BOTTOM - OVERLAY_PADDING),
       shadow_color=OVERLAY_SHADOW_COLOR,
@@ -1,12 +1,8 @@
-from typing import Iterable
-
 import itertools
 
 from inspector.canvas import (
     Canvas, Circle, Color, Gravity, Label, LabelIfFits, Line, v)
 from inspector.infograph.common import FONT_TINY, Z_PLANNERS, Z_PEARL
-from lib.planners import Planner, SomaticPlanner, StemPlanner
-from lib.planners.caves.base import BaseCavePlanner
 from lib.plastic import Tile
 from lib.utils.geometry import adjacent_8way
 
@@ -34,61 +30,50 @@ PEARL_OUTER_LAYER_COLORS = [
 ]
 
 
-def _planner_is_big_cave(planner: Planner):
-  return (
-      (isinstance(planner, StemPlanner) and planner.kind == StemPlanner.CAVE)
-      or isinstance(planner, BaseCavePlanner))
-
-
-def _planner_border_color(planner: Planner) -> Color:
-  if isinstance(planner, StemPlanner):
+def _planner_border_color(planner) -> Color:
+  if planner.is_stem:
     if planner.fluid_type:
       return planner.fluid_type.inspect_color
-    if planner.kind == StemPlanner.CAVE:
+    if planner.is_cave:
       return (0x77, 0x00, 0x10)
     return (0x44, 0x00, 0x08)
-  assert isinstance(planner, SomaticPlanner)
   return planner.inspect_color
 
 
-def _planner_bg_color(planner: Planner) -> Color:
-  if isinstance(planner, StemPlanner):
-    if planner.kind == StemPlanner.CAVE:
+def _planner_bg_color(planner) -> Color:
+  if planner.is_stem:
+    if planner.is_cave:
       return (0x77, 0x00, 0x10)
     return (0x44, 0x00, 0x08)
-  assert isinstance(planner, SomaticPlanner)
   if planner.fluid_type:
     return planner.fluid_type.inspect_color
   return Tile.FLOOR.inspect_color
 
 
-def _planner_fg_color(planner: Planner) -> Color:
-  if isinstance(planner, StemPlanner) or planner.fluid_type:
+def _planner_fg_color(planner) -> Color:
+  if planner.is_stem or planner.fluid_type:
     return (0xff, 0xff, 0xff)
-  assert isinstance(planner, SomaticPlanner)
   return planner.inspect_color
 
 
-def _planner_label_radius(planner: Planner, border_thickness):
-  if _planner_is_big_cave(planner):
+def _planner_label_radius(planner, border_thickness):
+  if planner.is_cave:
     return planner.pearl_radius - border_thickness
   return v.s(1)
 
 
-def _planner_line_radius(planner: Planner, border_thickness):
+def _planner_line_radius(planner, border_thickness):
   del border_thickness
-  if _planner_is_big_cave(planner):
-    return v.s(min(bp.pearl_radius for bp in planner.baseplates))
-  if isinstance(planner, StemPlanner):
-    if planner.kind == StemPlanner.CAVE:
-      return v.s(1)
+  if planner.is_cave:
+    return v.s(min(pr for _, pr in planner.baseplates))
+  if planner.is_stem:
     return 0
   return v.s(0.5)
 
 
 def _origin(planner):
-  if _planner_is_big_cave(planner):
-    return max(planner.baseplates, key=lambda bp: bp.pearl_radius).center
+  if planner.is_cave:
+    return max(planner.baseplates, key=lambda bp: bp[1])[0]
   return planner.center
 
 
@@ -121,30 +106,30 @@ def _draw_planner(canvas, planner):
       gravity=Gravity.CENTER), z_fg)
 
   # Border lines
-  for a, b in itertools.pairwise(planner.baseplates):
+  for (a, _), (b, _) in itertools.pairwise(planner.baseplates):
     canvas.push(Line(
         color=border_color,
-        start=a.center,
-        end=b.center,
+        start=a,
+        end=b,
         thickness=(line_radius + border_thickness) * 2), z_border)
     if line_radius:
       canvas.push(Line(
           color=bg_color,
-          start=a.center,
-          end=b.center,
+          start=a,
+          end=b,
           thickness=line_radius * 2), z_bg)
 
   # Additional circles to connect lines together in a less jarring fashion
   if len(planner.baseplates) > 1:
-    for bp in planner.baseplates:
+    for center, _ in planner.baseplates:
       canvas.push(Circle(
           color=border_color,
-          origin=bp.center,
+          origin=center,
           radius=line_radius + border_thickness), z_border)
       if line_radius:
         canvas.push(Circle(
             color=bg_color,
-            origin=bp.center,
+            origin=center,
             radius=line_radius), z_bg)
 
 
@@ -175,21 +160,17 @@ def _draw_pearl(canvas: Canvas, pearl):
   h(pearl.outer, PEARL_OUTER_LAYER_COLORS, 1)
 
 
-def push_planners(canvas: Canvas, planners: Iterable[Planner], details):
+def push_planners(canvas: Canvas, planners, pearl):
   st_pc = Canvas()
   so_pc = Canvas()
   for planner in planners:
-    if isinstance(planner, StemPlanner):
+    if planner.is_stem:
       _draw_planner(st_pc, planner)
-    else:
-      assert isinstance(planner, SomaticPlanner)
-      if not planner.pearl:
-        _draw_planner(so_pc, planner)
+    elif not planner.has_pearl:
+      _draw_planner(so_pc, planner)
   canvas.push(st_pc.freeze(), Z_PLANNERS)
   canvas.push(so_pc.freeze(), Z_PLANNERS)
-  if (isinstance(details, Planner)
-      and hasattr(details, 'pearl')
-      and details.pearl):
+  if pearl:
     pc = Canvas()
-    _draw_pearl(pc, details.pearl)
+    _draw_pearl(pc, pearl)
     canvas.push(pc.freeze(), Z_PEARL)
@@ -1,7 +1,6 @@
 from typing import List, Tuple
 
 import itertools
-import re
 
 from inspector.canvas import Canvas, LabelIfFits, Line, Rect, v
 from inspector.infograph.common import FONT_TINY, Z_SCRIPT
@@ -11,15 +10,11 @@ POI_LABEL_COLOR = (0x00, 0x00, 0x00)
 POI_PATH_COLOR = (0xff, 0xff, 0xff)
 POI_COLOR = (0x00, 0xff, 0xff)
 
-POI_RE = re.compile(r'y@(-?\d+),x@(-?\d+)')
-
 
 def push_script(canvas: Canvas, details):
   pc = Canvas()
   if isinstance(details, ScriptFragment):
-    poi: List[Tuple[int, int]] = []
-    for y, x in POI_RE.findall(str(details)):
-      poi.append((int(y), int(x)))
+    poi: List[Tuple[int, int]] = [(t.y, t.x) for t in details.tiles]
     for (y1, x1), (y2, x2) in itertools.pairwise(poi):
       pc.push(Line(
           color=POI_PATH_COLOR,
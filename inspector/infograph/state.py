@@ -9,14 +9,14 @@ from inspector.infograph.planners import push_planners
 from inspector.infograph.scripts import push_script
 
 
-def push_state(canvas, cavern, details, warnings):
+def push_state(canvas, frame):
   canvas.push(Fill(color=(0, 0, 0)), Z_BACKGROUND)
-  if cavern.conquest:
-    push_planners(canvas, cavern.conquest.planners, details)
+  if frame.planners is not None:
+    push_planners(canvas, frame.planners, frame.pearl)
   else:
-    push_outlines(canvas, cavern.bubbles, cavern.baseplates, cavern.paths)
-  push_map(canvas, cavern.diorama)
-  if cavern.stage == 'adjure':
-    push_adjurator(canvas, cavern.adjurator)
-  push_script(canvas, details)
-  push_overlays(canvas, cavern, details, warnings)
+    push_outlines(canvas, frame.bubbles, frame.baseplates, frame.paths)
+  push_map(canvas, frame.diorama)
+  if frame.stage == 'adjure':
+    push_adjurator(canvas, frame.objective_positions)
+  push_script(canvas, frame.details)
+  push_overlays(canvas, frame)
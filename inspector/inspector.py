@@ -1,14 +1,15 @@
-from typing import List
+from typing import Optional
 
+import collections
 import os
 
 # Disable pygame's output on import
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1' # pylint: disable=wrong-import-position
 import pygame # pylint: disable=wrong-import-order,wrong-import-position
 
-from inspector.canvas import Canvas, FrozenCanvas, DrawContext
-from inspector.infograph.bsod import push_bsod
-from inspector.infograph.state import push_state
+from inspector.canvas import FrozenCanvas, DrawContext
+from inspector.frames import BsodFrame, Frame, StateFrame
+from inspector.history import FrameHistory
 from inspector.infograph.ui_overlay import UiOverlay
 from lib import Cavern
 from lib.base import Logger
@@ -16,14 +17,18 @@ from lib.version import VERSION
 
 UPDATE_REQUESTED = pygame.event.Event(pygame.event.custom_type())
 ZOOM_LEVELS = (3, 6, 12, 24, 48)
+# How many rendered frames to keep around for scrubbing back and forth.
+RENDER_CACHE_SIZE = 8
 
 
 class Inspector(Logger): # pylint: disable=too-many-instance-attributes
 
-  def __init__(self, verbosity):
+  def __init__(self, verbosity, memory_budget: int = 512 * 1024 * 1024):
     super().__init__()
-    self.frames: List[FrozenCanvas] = []
-    self._frame_index = 0
+    self.frames = FrameHistory(memory_budget)
+    self._last_state: Optional[StateFrame] = None
+    self._rendered: collections.OrderedDict[int, FrozenCanvas] = (
+        collections.OrderedDict())
     self.progress: float = 0
     self.scale = 6
     self.zoom = 1
@@ -39,9 +44,9 @@ class Inspector(Logger): # pylint: disable=too-many-instance-attributes
   def log_state(self, cavern, verbosity, details):
     if verbosity > self.verbosity:
       return
-    canvas = Canvas()
-    push_state(canvas, cavern, details, self.warnings)
-    self._push_frame(canvas.freeze())
+    self._last_state = StateFrame(
+        cavern, details, self.warnings, self._last_state)
+    self._push_frame(self._last_state)
 
   def log_warning(self, message: str):
     super().log_warning(message)
@@ -56,9 +61,7 @@ class Inspector(Logger): # pylint: disable=too-many-instance-attributes
       super().log_warning('Failed to draw final state')
     super().log_exception(cavern, e)
     pygame.display.set_caption('Crashed :(')
-    canvas = Canvas()
-    push_bsod(canvas, cavern.context.seed, e)
-    self._push_frame(canvas.freeze())
+    self._push_frame(BsodFrame(cavern.context.seed, e))
 
   def run(self):
     self._running = True
@@ -78,10 +81,8 @@ class Inspector(Logger): # pylint: disable=too-many-instance-attributes
     except pygame.error:
       pass
 
-  def _push_frame(self, frame: FrozenCanvas):
+  def _push_frame(self, frame: Frame):
     self.frames.append(frame)
-    if self._frame_index == len(self.frames) - 2:
-      self._frame_index += 1
     self._notify_update()
 
   def _draw(self, window_surface, ui_overlay):
@@ -91,14 +92,25 @@ class Inspector(Logger): # pylint: disable=too-many-instance-attributes
           ZOOM_LEVELS[self.zoom],
           self.offset_x,
           self.offset_y)
-      self.frames[self._frame_index].draw(dc)
+      self._render().draw(dc)
       ui_overlay.update(
-          index=self._frame_index,
+          index=self.frames.index,
           progress=self.progress,
           total=len(self.frames))
       ui_overlay.draw(dc)
       pygame.display.flip()
 
+  def _render(self) -> FrozenCanvas:
+    key = self.frames.key()
+    if key in self._rendered:
+      self._rendered.move_to_end(key)
+      return self._rendered[key]
+    canvas = self.frames.current().render()
+    self._rendered[key] = canvas
+    if len(self._rendered) > RENDER_CACHE_SIZE:
+      self._rendered.popitem(last=False)
+    return canvas
+
   def _input(self):
     def events():
       yield pygame.event.wait()
@@ -117,11 +129,9 @@ class Inspector(Logger): # pylint: disable=too-many-instance-attributes
           self._running = False
           return
         if event.key == pygame.K_LEFT:
-          self._frame_index = max(self._frame_index - increment, 0)
+          self.frames.seek(-increment)
         elif event.key == pygame.K_RIGHT:
-          self._frame_index = min(
-              self._frame_index + increment,
-              len(self.frames) - 1)
+          self.frames.seek(increment)
         elif event.key == pygame.K_UP:
           self.zoom = min(self.zoom + 1, len(ZOOM_LEVELS) - 1)
         elif event.key == pygame.K_DOWN:
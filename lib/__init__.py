@@ -1,2 +1,2 @@
-from .cavern import Cavern
+from .cavern import Cavern, CONTEXT_FIRST_USED, STAGES
 from . import version
@@ -1,7 +1,9 @@
 """Base classes used by all other classes in Hognose."""
 
-from .context import Biome, Context, Curve
+from .context import Biome, Context, Curve, InitialRoll, MAX_NATURAL_SIZE
 from .errors import GenerationError, NotHaltingError
-from .logger import Logger, MultiCavernLogger
+from .logger import (
+    ChromeTraceLogger, Logger, MemoryLogger, MultiCavernLogger, QuietLogger,
+    StageMemory)
 from .procedural_thing import ProceduralThing
-from .pseudorandom import Rng, MAX_SEED
+from .pseudorandom import PreparedBids, Rng, RngProfile, MAX_SEED
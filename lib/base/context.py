@@ -1,10 +1,12 @@
-from typing import NamedTuple, Tuple, TypeVar
+from typing import (
+    Any, Dict, Iterable, Mapping, NamedTuple, Tuple, TypeVar, get_args,
+    get_origin)
 
 import dataclasses
 import enum
 
 from lib.base.logger import Logger
-from lib.base.pseudorandom import DiceBox
+from lib.base.pseudorandom import DiceBox, Rng
 
 T = TypeVar('T')
 
@@ -16,6 +18,20 @@ class Biome(enum.Enum):
   LAVA = 'lava'
 
 
+# The values drawn for a seed before anything else.
+InitialRoll = NamedTuple(
+    'InitialRoll',
+    biome=Biome,
+    has_monsters=bool,
+    size=int,
+)
+
+# The largest size a cavern rolls naturally. Larger sizes can be set with an
+# override for "marathon" levels, which get proportionally more special
+# baseplates so caves are as dense as in a normal-sized cavern.
+MAX_NATURAL_SIZE = 80
+SPECIAL_BASEPLATE_COUNT = 20
+
 # Scale values so caves have higher risk and reward away from spawn
 Curve = NamedTuple(
     'Curve',
@@ -25,6 +41,42 @@ Curve = NamedTuple(
 )
 
 
+# Fields that identify a cavern rather than tune how it generates.
+_NOT_OVERRIDABLE = ('logger', 'seed', 'rng')
+
+
+def _coerce(t, value): # pylint: disable=too-many-return-statements
+  if not isinstance(value, str):
+    return value
+  if t is bool:
+    v = value.strip().lower()
+    if v in ('1', 'true', 'yes', 'on'):
+      return True
+    if v in ('0', 'false', 'no', 'off'):
+      return False
+    raise ValueError(f'{repr(value)} is not true or false')
+  if t is int:
+    return int(value, 0)
+  if t is float:
+    return float(value)
+  if isinstance(t, type) and issubclass(t, enum.Enum):
+    return t(value.strip().lower())
+  items = value.split(',')
+  if isinstance(t, type) and issubclass(t, tuple) and hasattr(t, '_fields'):
+    # A NamedTuple, such as Curve
+    item_types = tuple(t.__annotations__.values())
+  elif get_origin(t) is tuple:
+    item_types = get_args(t)
+  else:
+    raise TypeError(f'Can\'t convert strings to {t}')
+  if len(items) != len(item_types):
+    raise ValueError(
+        f'Expected {len(item_types)} comma-separated values, '
+        f'got {repr(value)}')
+  result = tuple(_coerce(it, item) for it, item in zip(item_types, items))
+  return t(*result) if hasattr(t, '_fields') else result
+
+
 @dataclasses.dataclass(frozen=True)
 class Context(): # pylint: disable=too-many-instance-attributes
   """A collection of constants used in level generation."""
@@ -109,6 +161,11 @@ class Context(): # pylint: disable=too-many-instance-attributes
   # must be collected as a goal. Rock Radiers levels tend to be about 20%.
   crystal_goal_ratio: float
 
+  # Which version of resource and recharge seam placement to use. Version 1
+  # keeps existing caverns the same. Version 2 also prefers recharge seams
+  # with solid rock at their corners, which version 1 meant to do but didn't.
+  placement_version: int
+
   def __str__(self):
     def h():
       yield f'seed: 0x{self.seed:08x}'
@@ -118,22 +175,62 @@ class Context(): # pylint: disable=too-many-instance-attributes
     return '\n'.join(h())
 
   @classmethod
-  def coerce_overrides(cls, overrides):
-    #types = {f.name: f.type for f in dataclasses.fields(cls)}
+  def coerce_overrides(cls, overrides: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Converts override values given as strings to the types of the fields
+    they override. Tuples and curves are written as comma-separated values,
+    like "0.5,1,1". Values that aren't strings are kept as they are.
+
+    Raises ValueError for unknown fields or values that don't convert.
+    """
+    types = {
+        f.name: f.type for f in dataclasses.fields(cls)
+        if f.name not in _NOT_OVERRIDABLE}
 
     def h():
       for k, v in overrides.items():
-        yield k, v
-    return {h()}
+        if k not in types:
+          raise ValueError(f'{repr(k)} is not a value that can be overridden')
+        try:
+          yield k, _coerce(types[k], v)
+        except (TypeError, ValueError) as e:
+          raise ValueError(f'Bad value for {k}: {e}') from e
+    return dict(h())
+
+  @classmethod
+  def parse_overrides(cls, assignments: Iterable[str]) -> Dict[str, Any]:
+    """Parses and coerces overrides written like "key=value"."""
+    def h():
+      for a in assignments:
+        k, sep, v = a.partition('=')
+        if not sep:
+          raise ValueError(f'{repr(a)} should look like key=value')
+        yield k.strip(), v
+    return cls.coerce_overrides(dict(h()))
+
+  @staticmethod
+  def _roll(rng: Rng) -> InitialRoll:
+    biome = rng.uniform_choice(Biome)
+    has_monsters = rng.chance(0.75)
+    target_size = rng.uniform_int(min=50, max=MAX_NATURAL_SIZE)
+    return InitialRoll(biome, has_monsters, target_size)
+
+  @classmethod
+  def prescreen(cls, seed: int) -> InitialRoll:
+    """
+    Returns the biome, monsters and size generate would pick for seed.
+
+    This is much cheaper than generate, so it can be used to search through
+    many seeds at once. Overrides are not taken into account.
+    """
+    return cls._roll(DiceBox.stream(seed, ('init', -1)))
 
   @classmethod
   def generate(cls, logger: Logger, seed: int, **overrides):
     dice_box = DiceBox(seed)
-    rng = dice_box['init', -1]
-
-    biome = rng.uniform_choice(Biome)
-    if 'biome' in overrides:
-      biome = overrides[biome]
+    biome, has_monsters, target_size = cls._roll(dice_box['init', -1])
+    biome = overrides.get('biome', biome)
+    target_size = overrides.get('size', target_size)
 
     def for_biome(rock: T, ice: T, lava: T) -> T:
       if biome == Biome.ROCK:
@@ -142,9 +239,6 @@ class Context(): # pylint: disable=too-many-instance-attributes
         return ice
       return lava
 
-    has_monsters = rng.chance(0.75)
-    target_size = rng.uniform_int(min=50, max=80)
-
     kwargs = {
       'logger': logger,
       'seed': seed,
@@ -154,7 +248,9 @@ class Context(): # pylint: disable=too-many-instance-attributes
       'size': target_size,
       'baseplate_max_side_ratio': 0.33,
       'baseplate_max_oblongness': 3,
-      'special_baseplate_count': 20,
+      'special_baseplate_count': round(
+          SPECIAL_BASEPLATE_COUNT
+          * max(1, target_size / MAX_NATURAL_SIZE) ** 2),
       'weave_ratio': 0.21,
       'water_coverage': for_biome(
           (0.00, 0.20),
@@ -181,6 +277,7 @@ class Context(): # pylint: disable=too-many-instance-attributes
       'hall_landslide_freq': 1.20,
       'min_landslide_period': 15.0,
       'crystal_goal_ratio': 0.20,
+      'placement_version': 1,
     }
 
     kwargs.update(overrides)
@@ -1,7 +1,14 @@
-from typing import Any, TYPE_CHECKING
+from typing import (
+    Any, Dict, List, NamedTuple, Optional, TextIO, Tuple, TYPE_CHECKING)
 
+import contextlib
+import itertools
+import json
+import os
 import sys
+import time
 import traceback
+import tracemalloc
 
 if TYPE_CHECKING:
   from lib import Cavern
@@ -10,6 +17,13 @@ if TYPE_CHECKING:
 class Logger():
   """A basic logger."""
 
+  # The most verbose log_state calls this logger wants to receive. Caverns
+  # don't call log_state at all for anything above this.
+  verbosity: int = 0
+  # Whether this logger wants trace spans and events. Caverns don't call
+  # any trace_ methods unless this is set.
+  tracing: bool = False
+
   def log_progress(self, progress: float):
     pass
 
@@ -25,22 +39,218 @@ class Logger():
         ''.join(traceback.format_exception(type(e), e, e.__traceback__)),
         file=sys.stderr)
 
+  def trace_begin(
+      self, cavern: 'Cavern', name: str, args: Optional[Dict[str, Any]]):
+    """Starts a span of work on cavern."""
+
+  def trace_end(self, cavern: 'Cavern', name: str):
+    """Ends the most recent span started on cavern."""
+
+  def trace_event(
+      self, cavern: 'Cavern', name: str, args: Optional[Dict[str, Any]]):
+    """Marks something that happened at a single point in time."""
+
+  @contextlib.contextmanager
+  def span(self, cavern: 'Cavern', name: str, args=None):
+    self.trace_begin(cavern, name, args)
+    try:
+      yield
+    finally:
+      self.trace_end(cavern, name)
+
+
+class QuietLogger(Logger):
+  """Ignores warnings and exceptions, for tools that report failures."""
+
+  def log_warning(self, message):
+    pass
+
+  def log_exception(self, cavern, e):
+    pass
+
+
+class ProxyLogger(Logger):
+  """
+  Passes everything through to another logger. Subclasses override only
+  what they handle themselves.
+  """
+
+  def __init__(self, proxied: Logger):
+    self._proxied = proxied
+
+  @property
+  def verbosity(self):
+    return self._proxied.verbosity
+
+  @property
+  def tracing(self):
+    return self._proxied.tracing
+
+  def log_progress(self, progress):
+    self._proxied.log_progress(progress)
+
+  def log_state(self, cavern, verbosity, details):
+    self._proxied.log_state(cavern, verbosity, details)
+
+  def log_warning(self, message):
+    self._proxied.log_warning(message)
+
+  def log_exception(self, cavern, e):
+    self._proxied.log_exception(cavern, e)
+
+  def trace_begin(self, cavern, name, args=None):
+    self._proxied.trace_begin(cavern, name, args)
+
+  def trace_end(self, cavern, name):
+    self._proxied.trace_end(cavern, name)
 
-class MultiCavernLogger(Logger):
+  def trace_event(self, cavern, name, args=None):
+    self._proxied.trace_event(cavern, name, args)
+
+
+class MultiCavernLogger(ProxyLogger):
+  """Reports the progress of one cavern as part of generating several."""
 
   def __init__(self, proxied, index, count):
-    self._proxied: Logger = proxied
+    super().__init__(proxied)
     self._index: int = index
     self._count: int = count
 
   def log_progress(self, progress: float):
     self._proxied.log_progress((self._index + progress) / self._count)
 
-  def log_state(self, *args, **kwargs):
-    self._proxied.log_state(*args, **kwargs)
 
-  def log_warning(self, *args, **kwargs):
-    self._proxied.log_warning(*args, **kwargs)
+class ChromeTraceLogger(ProxyLogger):
+  """
+  Records trace spans in Chrome's trace event format.
+
+  Each cavern is drawn as its own thread, named after its seed. Open the
+  output with chrome://tracing or https://ui.perfetto.dev.
+  Everything else is passed through to the proxied logger.
+  """
+
+  tracing = True
+
+  def __init__(self, proxied):
+    super().__init__(proxied)
+    self._pid = os.getpid()
+    self._events: List[Dict[str, Any]] = []
+    self._seeds = set()
+
+  def log_exception(self, cavern, e):
+    self.trace_event(cavern, 'exception', {'error': repr(e)})
+    self._proxied.log_exception(cavern, e)
+
+  def _push(self, cavern, ph, name, args=None):
+    seed = cavern.context.seed
+    if seed not in self._seeds:
+      self._seeds.add(seed)
+      self._events.append({
+          'name': 'thread_name',
+          'ph': 'M',
+          'pid': self._pid,
+          'tid': seed,
+          'args': {'name': f'{seed:08x}'}})
+    event = {
+        'name': name,
+        'ph': ph,
+        'ts': time.perf_counter_ns() / 1000,
+        'pid': self._pid,
+        'tid': seed}
+    if args:
+      event['args'] = args
+    if ph == 'i':
+      event['s'] = 't'
+    self._events.append(event)
+
+  def trace_begin(self, cavern, name, args=None):
+    self._push(cavern, 'B', name, args)
+
+  def trace_end(self, cavern, name):
+    self._push(cavern, 'E', name)
+
+  def trace_event(self, cavern, name, args=None):
+    self._push(cavern, 'i', name, args)
+
+  def write(self, f: TextIO):
+    json.dump({'traceEvents': self._events, 'displayTimeUnit': 'ms'}, f)
+
+
+StageMemory = NamedTuple(
+    'StageMemory',
+    seed=int,
+    stage=str,
+    allocated=int,  # Bytes allocated by the stage and still in use after it
+    peak=int,       # Most bytes the stage had allocated at once
+    top=Tuple[Tuple[str, int], ...],  # (file:line, bytes) allocating the most
+)
+
+
+class MemoryLogger(ProxyLogger):
+  """
+  Measures the memory allocated by each stage with tracemalloc.
+
+  Starts tracemalloc if it isn't already running, which slows generation
+  down considerably, and clears its traces at the start of every stage so
+  only that stage's allocations are counted. Only top-level spans (stages)
+  are measured. Everything is also passed through to the proxied logger.
+  """
+
+  tracing = True
+
+  def __init__(self, proxied, top: int = 5):
+    super().__init__(proxied)
+    self._top = top
+    self._depth = 0
+    self.stages: List[StageMemory] = []
+    if not tracemalloc.is_tracing():
+      tracemalloc.start()
+
+  def trace_begin(self, cavern, name, args=None):
+    if self._depth == 0:
+      tracemalloc.clear_traces()
+      tracemalloc.reset_peak()
+    self._depth += 1
+    self._proxied.trace_begin(cavern, name, args)
+
+  def trace_end(self, cavern, name):
+    self._proxied.trace_end(cavern, name)
+    self._depth -= 1
+    if self._depth == 0:
+      allocated, peak = tracemalloc.get_traced_memory()
+      top = ()
+      if self._top:
+        stats = (
+            st for st in tracemalloc.take_snapshot().statistics('lineno')
+            if st.traceback[0].filename != __file__)
+        top = tuple(
+            (f'{st.traceback[0].filename}:{st.traceback[0].lineno}', st.size)
+            for st in itertools.islice(stats, self._top))
+      self.stages.append(StageMemory(
+          cavern.context.seed, name, allocated, peak, top))
 
-  def log_exception(self, *args, **kwargs):
-    self._proxied.log_exception(*args, **kwargs)
+  def report(self, root: str = '') -> str:
+    """
+    Summarizes every stage measured so far: the mean bytes allocated and
+    highest peak across caverns, and the lines that allocated the most.
+    File names under root are shown relative to it.
+    """
+    by_stage: Dict[str, List[StageMemory]] = {}
+    for sm in self.stages:
+      by_stage.setdefault(sm.stage, []).append(sm)
+    def h():
+      yield f'{"stage":>12} {"allocated":>12} {"peak":>12}'
+      for stage, sms in by_stage.items():
+        allocated = sum(sm.allocated for sm in sms) // len(sms)
+        peak = max(sm.peak for sm in sms)
+        yield f'{stage:>12} {allocated // 1024:>10}kB {peak // 1024:>10}kB'
+        sites: Dict[str, int] = {}
+        for sm in sms:
+          for site, size in sm.top:
+            sites[site] = sites.get(site, 0) + size
+        for site, size in sorted(sites.items(), key=lambda i: -i[1])[
+            :self._top]:
+          if root and site.startswith(root):
+            site = os.path.relpath(site, root)
+          yield f'{"":>12} {size // len(sms) // 1024:>10}kB {site}'
+    return '\n'.join(h())
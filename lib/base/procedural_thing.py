@@ -1,15 +1,18 @@
 import abc
+from typing import Optional
 
 from lib.base.context import Context
+from lib.base.pseudorandom import DiceBox, KINDS
 
 
 class ProceduralThing(abc.ABC):
   """Base class for classes that use RNG."""
+  __slots__ = ('_id', '_context', '_rng')
 
   def __init__(self, id, context):
     self._id: int = id
     self._context: Context = context
-    self.rng = BoundDiceBox(self)
+    self._rng: Optional['BoundDiceBox'] = None
 
   @property
   def id(self) -> int:
@@ -19,12 +22,35 @@ class ProceduralThing(abc.ABC):
   def context(self) -> Context:
     return self._context
 
+  @property
+  def rng(self) -> 'BoundDiceBox':
+    # Made on first use and kept. It refers to the DiceBox rather than back
+    # to this thing, so things can still be freed by reference counting.
+    if self._rng is None:
+      self._rng = BoundDiceBox(self._context.rng, self._id)
+    return self._rng
+
+
+# One bit for each kind of stream.
+_KIND_BITS = {kind: 1 << i for i, kind in enumerate(KINDS)}
+
 
 class BoundDiceBox():
-  """A binding of DiceBox that uses the ID from this ProceduralThing."""
+  """A binding of DiceBox that uses the ID from a ProceduralThing."""
+  __slots__ = ('_dice', '_id', '_kinds')
 
-  def __init__(self, thing: ProceduralThing):
-    self._thing = thing
+  def __init__(self, dice: DiceBox, id: int):
+    self._dice = dice
+    self._id = id
+    # The kinds of stream asked for through this binding, as _KIND_BITS.
+    self._kinds = 0
 
   def __getitem__(self, kind: str):
-    return self._thing._context.rng[kind, self._thing._id]
+    self._kinds |= _KIND_BITS[kind]
+    return self._dice[kind, self._id]
+
+  def release(self):
+    """Drops every stream asked for through this binding."""
+    self._dice.release(
+        (kind, self._id)
+        for kind, bit in _KIND_BITS.items() if self._kinds & bit)
@@ -1,12 +1,21 @@
 """Base module for prng."""
 
-from typing import Dict, Iterable, Tuple, TypeVar
-
+from typing import (
+    Callable, Dict, Generic, Iterable, Iterator, List, Optional, Sequence,
+    Tuple, TypeVar)
+
+import bisect
+import collections.abc
+import hashlib
+import itertools
 import math
+import time
+import zlib
 
 import numpy as np
 
 T = TypeVar('T')
+K = TypeVar('K')
 
 # 2.1 billion levels ought to be enough for anyone.
 MAX_SEED = 0x8000_0000
@@ -112,32 +121,82 @@ class Rng():
         radius * r * math.sin(t) + origin[1])
 
   # Random item from a list
+  #
+  # Each of these takes any iterable, but a Sequence (such as a tuple, list or
+  # range) is used as it is rather than copied. The batch versions that
+  # return several items draw exactly the same values as calling the single
+  # version that many times, and leave the stream in the same state, so a
+  # loop can be switched to a batch without changing any cavern.
 
   def uniform_choice(self, choices: Iterable[T]) -> T:
     """Returns a uniformly random item from the given choices."""
-    c = tuple(choices)
+    c = _as_sequence(choices)
     return c[self._rng.integers(0, len(c))]
 
+  def uniform_choices(self, choices: Iterable[T], count: int) -> List[T]:
+    """Returns count items, as if by calling uniform_choice count times."""
+    c = _as_sequence(choices)
+    return [c[i] for i in self.uniform_indices(len(c), count)]
+
+  def uniform_indices(self, n: int, count: int) -> np.ndarray:
+    """
+    Returns count uniformly random indexes into a sequence of length n.
+    This draws the same values, and leaves the stream in the same state, as
+    calling uniform_choice count times on that sequence.
+    """
+    return self._rng.integers(0, n, size=count)
+
+  def sample_indices(self, n: int, count: int) -> np.ndarray:
+    """
+    Returns count different indexes into a sequence of length n, in random
+    order. This is its own kind of draw: it doesn't match any number of
+    calls to the other methods.
+    """
+    return self._rng.choice(n, size=count, replace=False)
+
   def beta_choice(self, choices: Iterable[T], a: float = 5, b: float = 5) -> T:
     """
     Returns a random item from the given choices using a beta distribution.
     """
-    c = tuple(choices)
+    c = _as_sequence(choices)
     return c[math.floor(self._rng.beta(a, b) * len(c))]
 
+  def beta_choices(
+      self,
+      choices: Iterable[T],
+      count: int,
+      a: float = 5,
+      b: float = 5) -> List[T]:
+    """Returns count items, as if by calling beta_choice count times."""
+    c = _as_sequence(choices)
+    indexes = (self._rng.beta(a, b, size=count) * len(c)).astype(np.intp)
+    return [c[i] for i in indexes]
+
   def weighted_choice(self, bids: Iterable[Tuple[float, T]]) -> T:
     """
     Given tuples of (weight, item), returns an item.
     The probability that any item is chosen is its weight divided by the total
     weight of all items.
     """
-    bids = tuple(b for b in bids if b[0] > 0)
-    n = self._rng.random() * sum(w for (w, _) in bids)
-    for w, result in bids:
-      n -= w
-      if n <= 0:
-        return result
-    return bids[-1][1]
+    return self.prepared_choice(self.prepare_weights(bids))
+
+  @staticmethod
+  def prepare_weights(bids: Iterable[Tuple[float, T]]) -> 'PreparedBids[T]':
+    """
+    Prepares tuples of (weight, item) once, so that prepared_choice and
+    prepared_choices can draw from them many times.
+    """
+    return PreparedBids(bids)
+
+  def prepared_choice(self, bids: 'PreparedBids[T]') -> T:
+    """Returns an item, exactly as weighted_choice would."""
+    return bids.items[bids.index(self._rng.random() * bids.total)]
+
+  def prepared_choices(self, bids: 'PreparedBids[T]', count: int) -> List[T]:
+    """Returns count items, as if by calling prepared_choice count times."""
+    return [
+        bids.items[i]
+        for i in bids.indexes(self._rng.random(count) * bids.total)]
 
   # Randomly shuffled list
 
@@ -148,6 +207,200 @@ class Rng():
     return result
 
 
+class PreparedBids(Generic[T]):
+  """
+  Bids with their cumulative weights, so an item can be found with a binary
+  search rather than a scan.
+
+  weighted_choice subtracts the weights one at a time, which can round
+  differently than the summed weights do. Within rounding error of the
+  boundary between two items, this falls back to that scan, so it always
+  picks the same item.
+  """
+  __slots__ = ('items', 'weights', 'total', '_cumulative', '_tolerance')
+
+  def __init__(self, bids: Iterable[Tuple[float, T]]):
+    bids = tuple(b for b in bids if b[0] > 0)
+    if not bids:
+      raise ValueError('At least one bid must have a positive weight')
+    self.items: Tuple[T, ...] = tuple(item for _, item in bids)
+    self.weights: Tuple[float, ...] = tuple(w for w, _ in bids)
+    self.total: float = sum(self.weights)
+    self._cumulative: List[float] = list(
+        itertools.accumulate(float(w) for w in self.weights))
+    # Each subtraction and each sum is off by at most half an ulp of the
+    # total, so the scan and the search can only disagree this close to a
+    # boundary.
+    self._tolerance = len(self.weights) * float(self.total) * 2.0 ** -51
+
+  def __len__(self):
+    return len(self.items)
+
+  def index(self, n: float) -> int:
+    """
+    Returns the index of the item that weighted_choice would choose for a
+    value n between 0 and the total weight.
+    """
+    cumulative = self._cumulative
+    i = min(bisect.bisect_left(cumulative, n), len(cumulative) - 1)
+    if (abs(cumulative[i] - n) <= self._tolerance
+        or (i > 0 and abs(n - cumulative[i - 1]) <= self._tolerance)):
+      return self._scan(n)
+    return i
+
+  def indexes(self, n: np.ndarray) -> np.ndarray:
+    """Like index, for many values at once."""
+    cumulative = np.array(self._cumulative)
+    result = np.searchsorted(cumulative, n, side='left')
+    result = np.minimum(result, len(cumulative) - 1)
+    near = np.abs(cumulative[result] - n) <= self._tolerance
+    before = result > 0
+    near[before] |= (
+        np.abs(n[before] - cumulative[result[before] - 1]) <= self._tolerance)
+    for i in np.flatnonzero(near):
+      result[i] = self._scan(float(n[i]))
+    return result
+
+  def _scan(self, n: float) -> int:
+    for i, w in enumerate(self.weights):
+      n -= w
+      if n <= 0:
+        return i
+    return len(self.weights) - 1
+
+
+class StreamProfile():
+  """What has been drawn from one stream, or a group of them."""
+
+  def __init__(self):
+    self.calls = 0
+    self.draws = 0
+    self.seconds = 0.0
+    # A CRC of every value drawn, in order (see _ProfiledGenerator). Values
+    # are hashed one at a time, so drawing several at once gives the same CRC
+    # as drawing them singly.
+    self.crc = 0
+
+  def add(self, other: 'StreamProfile'):
+    self.calls += other.calls
+    self.draws += other.draws
+    self.seconds += other.seconds
+    self.crc = zlib.crc32(other.crc.to_bytes(4, 'little'), self.crc)
+
+
+class RngProfile():
+  """
+  Counts the draws from every stream of a DiceBox, and how long they took.
+  Streams are kept by seed, kind and id, so caverns can be added together.
+
+  The fingerprint changes if any stream draws different values, or a
+  different number of them, so a test can assert on it to show that a
+  refactor didn't change what was drawn. It does not change when a loop is
+  switched to one of the batch methods that draw the same values.
+
+  Distributions like beta use the platform's math library, so their values
+  can differ in the last bit between machines, and so can the fingerprint.
+  Compare fingerprints taken on the same platform.
+  """
+
+  def __init__(self):
+    self.streams: Dict[Tuple[int, str, int], StreamProfile] = {}
+
+  def stream(self, index: Tuple[int, str, int]) -> StreamProfile:
+    result = self.streams.get(index)
+    if result is None:
+      result = self.streams[index] = StreamProfile()
+    return result
+
+  def add(self, other: 'RngProfile'):
+    """Adds another cavern's draws to these, to profile a batch."""
+    for index, stream in other.streams.items():
+      self.stream(index).add(stream)
+
+  def totals(
+      self,
+      key: Callable[[Tuple[int, str, int]], K]) -> Dict[K, StreamProfile]:
+    """Adds up the streams that have the same key."""
+    result: Dict[K, StreamProfile] = {}
+    for index, stream in self.streams.items():
+      k = key(index)
+      if k not in result:
+        result[k] = StreamProfile()
+      result[k].add(stream)
+    return result
+
+  def by_kind(self) -> Dict[str, StreamProfile]:
+    return self.totals(lambda index: index[1])
+
+  def by_id(self) -> Dict[Tuple[int, int], StreamProfile]:
+    """Totals by seed and id, since ids are reused by every cavern."""
+    return self.totals(lambda index: (index[0], index[2]))
+
+  def fingerprint(self) -> str:
+    """A hash of which values every stream drew."""
+    h = hashlib.sha256()
+    for (seed, kind, id), stream in sorted(self.streams.items()): # pylint: disable=redefined-builtin
+      h.update(
+          f'{seed:x} {kind} {id} {stream.draws} {stream.crc:08x}\n'.encode())
+    return h.hexdigest()[:16]
+
+  def report(self, top: int = 10) -> str:
+    """
+    Describes the draws of each kind, the top ids by time spent drawing, and
+    the fingerprint.
+    """
+    def rows(label: str, totals):
+      yield f'{label:>26} {"calls":>9} {"draws":>9} {"ms":>9}'
+      for k, s in totals:
+        yield f'{k:>26} {s.calls:>9d} {s.draws:>9d} {s.seconds * 1000:>9.2f}'
+    by_id = sorted(self.by_id().items(), key=lambda kv: -kv[1].seconds)
+    return '\n'.join((
+        *rows('kind', self.by_kind().items()),
+        '',
+        *rows('seed:id', (
+            (f'{seed:x}:{id}', s) for (seed, id), s in by_id[:top])),
+        '',
+        f'fingerprint {self.fingerprint()}'))
+
+
+class _ProfiledGenerator():
+  """Stands in for a NumPy Generator, noting everything drawn from it."""
+
+  def __init__(self, generator: np.random.Generator, stream: StreamProfile):
+    self._generator = generator
+    self._stream = stream
+
+  def __getattr__(self, name):
+    if name.startswith('_'):
+      # Don't pretend to have attributes pickle looks for.
+      raise AttributeError(name)
+    method = getattr(self._generator, name)
+    stream = self._stream
+    def profiled(*args, **kwargs):
+      start = time.perf_counter()
+      result = method(*args, **kwargs)
+      stream.seconds += time.perf_counter() - start
+      stream.calls += 1
+      if result is None:
+        # Shuffled in place. The items could be anything, so only their
+        # number is noted.
+        stream.draws += len(args[0])
+        data = np.array([len(args[0])], dtype=np.float64).tobytes()
+      else:
+        values = np.asarray(result, dtype=np.float64).ravel()
+        stream.draws += values.size
+        data = values.tobytes()
+      stream.crc = zlib.crc32(data, stream.crc)
+      return result
+    return profiled
+
+
+def _as_sequence(choices: Iterable[T]) -> Sequence[T]:
+  if isinstance(choices, collections.abc.Sequence):
+    return choices
+  return tuple(choices)
+
+
 class DiceBox():
   """
   A pile of prng streams.
@@ -163,16 +416,93 @@ class DiceBox():
   def __init__(self, seed: int):
     if seed not in range(0, MAX_SEED):
       raise ValueError(f'Seed {seed:x} is not between 0 and {MAX_SEED:x}')
-    main_rng = np.random.default_rng(seed)
-    self._seeds = {
-        kind: main_rng.integers(0, MAX_SEED)
-        for kind in KINDS}
+    self._seed = seed
+    # The seed for each kind, drawn the first time any stream is needed.
+    self._seeds: Optional[Dict[str, int]] = None
     self._rng: Dict[Tuple[str, int], Rng] = {}
+    # The lowest and highest id released for each kind.
+    self._released: Dict[str, Tuple[int, int]] = {}
+    self._profile: Optional[RngProfile] = None
 
   def __getitem__(self, index: Tuple[str, int]) -> Rng:
-    if index not in self._rng:
-      # To get the seed for this specific RNG, just shift it by a fixed amount.
-      # 1999 is an arbitrarily chosen constant.
-      seed = (self._seeds[index[0]] + index[1] * 1999) % MAX_SEED
-      self._rng[index] = Rng(np.random.default_rng(seed))
-    return self._rng[index]
+    rng = self._rng.get(index)
+    if rng is None:
+      kind, id = index # pylint: disable=redefined-builtin
+      released = self._released.get(kind)
+      if released and released[0] <= id <= released[1]:
+        # Starting it over would quietly repeat values it already gave.
+        raise ValueError(
+            f'{kind} streams with ids {released[0]} to {released[1]} '
+            'were released')
+      if self._seeds is None:
+        self._seeds = dict(zip(KINDS, _kind_seeds(self._seed, len(KINDS))))
+      rng = self._rng[index] = Rng(_stream_seed(self._seeds[kind], id))
+      if self._profile is not None:
+        self._watch(index, rng)
+    return rng
+
+  def __len__(self):
+    """The number of streams being kept."""
+    return len(self._rng)
+
+  def __iter__(self) -> Iterator[Tuple[str, int]]:
+    """The indexes of the streams being kept."""
+    return iter(tuple(self._rng))
+
+  def release(self, indexes: Iterable[Tuple[str, int]]):
+    """
+    Drops the given streams. Use this once the things that use them are
+    done, so a long-running process doesn't keep a stream for everything it
+    has ever generated. Other streams with the same ids are kept.
+
+    Only the range of ids released for each kind is remembered, so asking
+    for any stream of that kind with an id in that range raises ValueError
+    unless it is still kept.
+    """
+    for index in indexes:
+      kind, id = index # pylint: disable=redefined-builtin
+      self._rng.pop(index, None)
+      low, high = self._released.get(kind, (id, id))
+      self._released[kind] = (min(low, id), max(high, id))
+
+  def profile(self) -> RngProfile:
+    """
+    Starts counting the draws from every stream, if it hasn't started yet,
+    and returns the profile that will hold them. Draws made before this is
+    first called are not counted. Profiling makes every draw slower.
+    """
+    if self._profile is None:
+      self._profile = RngProfile()
+      for index, rng in self._rng.items():
+        self._watch(index, rng)
+    return self._profile
+
+  def _watch(self, index: Tuple[str, int], rng: Rng):
+    # pylint: disable=protected-access
+    rng._rng = _ProfiledGenerator(
+        rng._rng, self._profile.stream((self._seed, *index)))
+
+  @staticmethod
+  def stream(seed: int, index: Tuple[str, int]) -> Rng:
+    """
+    Returns a fresh copy of DiceBox(seed)[index].
+
+    This only draws the seeds up to the requested kind, so it is much faster
+    than building a whole DiceBox when only one stream is needed.
+    """
+    if seed not in range(0, MAX_SEED):
+      raise ValueError(f'Seed {seed:x} is not between 0 and {MAX_SEED:x}')
+    kind, id = index # pylint: disable=redefined-builtin
+    kind_seeds = _kind_seeds(seed, KINDS.index(kind) + 1)
+    return Rng(_stream_seed(kind_seeds[-1], id))
+
+
+def _kind_seeds(seed: int, count: int) -> List[int]:
+  # The same values drawing them one at a time would give.
+  return np.random.default_rng(seed).integers(0, MAX_SEED, size=count).tolist()
+
+
+def _stream_seed(kind_seed: int, id: int) -> int: # pylint: disable=redefined-builtin
+  # To get the seed for this specific RNG, just shift it by a fixed amount.
+  # 1999 is an arbitrarily chosen constant.
+  return (kind_seed + id * 1999) % MAX_SEED
@@ -0,0 +1,190 @@
+"""
+An on-disk cache of generated caverns.
+
+Entries are keyed by a hash of the seed, the Hognose version and any context
+overrides, so a new version never reads caverns generated by an old one.
+Each entry is a .dat file with the serialized cavern, plus a .json file with
+its metadata. Both are written to a temporary file and renamed into place,
+and the .json is written last, so any number of processes can share one
+cache directory without seeing partial entries.
+"""
+
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import hashlib
+import json
+import os
+import os.path
+import tempfile
+import time
+
+from lib.base import Context, Logger
+from lib.cavern import Cavern
+from lib.version import VERSION
+
+# How long a file that isn't part of a complete entry is left alone, in case
+# another process is still writing it.
+STALE_SECONDS = 3600
+
+CachedCavern = NamedTuple(
+    'CachedCavern',
+    seed=int,
+    serialized=str,
+    level_name=str,
+    briefing=str,
+    stats=Dict[str, Any],
+)
+
+
+def summarize(cavern: Cavern) -> CachedCavern:
+  """Returns what the cache would store for a fully generated cavern."""
+  diorama = cavern.diorama
+  _, _, width, height = diorama.bounds or (0, 0, 0, 0)
+  return CachedCavern(
+      seed=cavern.context.seed,
+      serialized=cavern.serialized,
+      level_name=diorama.level_name,
+      briefing=diorama.briefing,
+      stats={
+          'biome': cavern.context.biome.value,
+          'has_monsters': cavern.context.has_monsters,
+          'size': cavern.context.size,
+          'width': width,
+          'height': height,
+          'floor': sum(1 for t in diorama.tiles.values() if not t.is_wall),
+          'crystals': diorama.crystal_yield,
+          'ore': diorama.ore_yield,
+          'objectives': [o.description for o in diorama.objectives],
+          'script_lines': len(diorama.script),
+      })
+
+
+class CavernCache():
+  """A directory of generated caverns, evicted least recently used first."""
+
+  def __init__(self, path: str, max_bytes: int):
+    self.path = path
+    self.max_bytes = max_bytes
+    os.makedirs(path, exist_ok=True)
+
+  @staticmethod
+  def key(seed: int, overrides: Dict[str, Any]) -> str:
+    # repr is stable for everything a Context holds (numbers, enums, tuples).
+    data = repr((seed, VERSION, sorted(overrides.items())))
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+  def _file(self, key: str, ext: str) -> str:
+    return os.path.join(self.path, f'{key}.{ext}')
+
+  def get(self, seed: int, overrides: Dict[str, Any]) -> Optional[CachedCavern]:
+    """Returns the cached cavern for seed, or None if there isn't one."""
+    key = self.key(seed, overrides)
+    try:
+      with open(self._file(key, 'json'), encoding='utf-8') as f:
+        meta = json.load(f)
+      with open(self._file(key, 'dat'), encoding='utf-8') as f:
+        serialized = f.read()
+      # The metadata file's mtime marks when the entry was last used.
+      os.utime(self._file(key, 'json'))
+    except (OSError, ValueError):
+      # Missing, evicted by another process, or unreadable.
+      return None
+    return CachedCavern(
+        seed=seed,
+        serialized=serialized,
+        level_name=meta['level_name'],
+        briefing=meta['briefing'],
+        stats=meta['stats'])
+
+  def put(self, cavern: Cavern, overrides: Dict[str, Any]) -> CachedCavern:
+    """Adds a fully generated cavern to the cache."""
+    entry = summarize(cavern)
+    key = self.key(entry.seed, overrides)
+    self._write(self._file(key, 'dat'), entry.serialized)
+    self._write(self._file(key, 'json'), json.dumps({
+        'seed': entry.seed,
+        'version': VERSION,
+        'overrides': {k: repr(v) for k, v in overrides.items()},
+        'level_name': entry.level_name,
+        'briefing': entry.briefing,
+        'stats': entry.stats,
+    }))
+    self.evict()
+    return entry
+
+  def generate(
+      self,
+      seed: int,
+      logger: Optional[Logger] = None,
+      **overrides) -> CachedCavern:
+    """
+    Returns the cavern for seed from the cache, or generates and caches it.
+
+    Raises GenerationError if the cavern is not cached and fails to generate.
+    """
+    entry = self.get(seed, overrides)
+    if entry is None:
+      cavern = Cavern(Context.generate(logger or Logger(), seed, **overrides))
+      cavern.generate()
+      entry = self.put(cavern, overrides)
+    return entry
+
+  def _write(self, filename: str, data: str):
+    fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+    try:
+      with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(data)
+      os.replace(tmp, filename)
+    except BaseException:
+      os.unlink(tmp)
+      raise
+
+  def evict(self):
+    """
+    Removes the least recently used entries until under max_bytes.
+
+    Files that aren't part of a complete entry count toward the size as
+    well. Metadata without its cavern can never be read, so it is removed
+    right away. A cavern without metadata, or a temporary file, may still
+    be being written by another process, so it is only removed once it is
+    too old for that.
+    """
+    files: Dict[str, List[Tuple[str, float, int]]] = {}
+    with os.scandir(self.path) as it:
+      for e in it:
+        stem, ext = os.path.splitext(e.name)
+        if ext not in ('.json', '.dat', '.tmp'):
+          continue
+        try:
+          st = e.stat()
+        except OSError:
+          continue
+        files.setdefault(stem, []).append((ext, st.st_mtime, st.st_size))
+    now = time.time()
+    entries = []
+    total = 0
+    for stem, parts in files.items():
+      exts = {ext: mtime for ext, mtime, _ in parts}
+      size = sum(size for _, _, size in parts)
+      if exts.keys() == {'.json', '.dat'}:
+        # The metadata file's mtime marks when the entry was last used.
+        entries.append((exts['.json'], stem, size, tuple(exts)))
+        total += size
+      elif '.json' in exts or now - max(exts.values()) > STALE_SECONDS:
+        self._remove(stem, exts)
+      else:
+        total += size
+    entries.sort()
+    for _, stem, size, exts in entries:
+      if total <= self.max_bytes:
+        break
+      self._remove(stem, exts)
+      total -= size
+
+  def _remove(self, stem: str, exts: Iterable[str]):
+    # Metadata first, so no one can find a cavern that is half removed.
+    for ext in sorted(exts, key=lambda ext: ext != '.json'):
+      try:
+        os.unlink(os.path.join(self.path, stem + ext))
+      except FileNotFoundError:
+        pass
@@ -1,26 +1,182 @@
 from collections.abc import Callable
-from typing import Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
 
+import contextlib
+import dataclasses
+import io
 import itertools
+import pickle
 
-from lib.base import GenerationError
-from lib.holistics import Adjurator, patch
+from lib.base import Context, GenerationError, Logger
+from lib.holistics import Adjurator, patch, validate_script
 from lib.lore import Lore
 from lib.outlines import Path, Bubble, Baseplate, Partition
 from lib.planners import Conquest, Planner, StemPlanner
 from lib.plastic import Diorama, ScriptFragment
 from lib.utils.delaunay import slorp
+from lib.version import VERSION
 
 V_DONE = 1
 V_MAJOR = 2
 V_MINOR = 3
 V_VERBOSE = 4
 
+_NO_SPAN = contextlib.nullcontext()
+Predicate = Callable[['Cavern'], bool]
+
+# Stages of generation, in order. Each stage runs the Cavern method of the same
+# name with a leading underscore.
+STAGES: Tuple[str, ...] = (
+  # I. Outlines
+  # Determine the approximate size and location of the caves in this
+  # cavern, as well as the set of paths that will connect them.
+  # Roughly based on this algorithm:
+  # https://www.gamedeveloper.com/programming/procedural-dungeon-generation-algorithm
+
+  # Generate "bubbles", which are rectangles of arbitrary sizes, and
+  # place them roughly in a random pile in the center of the map.
+  'partition',
+  # Choose the largest lots to become "special".
+  'discriminate',
+  # Create a triangular mesh between the centers of all special lots.
+  # These will be treated as the non-overlapping edges of a graph,
+  # with nodes at each special lot.
+  'triangulate',
+  # Compute the minimum spanning tree of the graph generated above.
+  # This ensures the graph is fully connected, so the cavern will
+  # actually be playable.
+  'span',
+  # Edges connect two special lots with a straight line. To make this more
+  # interesting, add back any lots the edge intersects, forming a
+  # zigzagging path between the two.
+  'bore',
+  # Add a few edges back in to make the cave more interesting.
+  # Discard the remaining edges.
+  'weave',
+  # Discard any remaining baseplates that aren't part of a path.
+  'cull',
+
+  # II. Planners
+  # Using the outline as a guide, decide what to do with, then build each
+  # individual cave and hall.
+
+  # Assign the paths and special lots to "planners", which will decide
+  # what to put in the lots they are given.
+  'negotiate',
+  # Pick some planners and hint they should primarily contain water or
+  # lava. Perform a depth-first search so the result will have more rivers \
+  # than single lakes.
+  'flood',
+  # The planners we have so far are basically stem cells.
+  # Do a breadth-first search starting from the spawn and choose more
+  # concretely what type of planner each cave and hall will be.
+  'conquest',
+  # Place tiles in the rough shape of each planner's layout.
+  # Because planners overlap, some overwriting is expected.
+  'rough',
+  # Reinforce any wall that would immediately collapse.
+  'patch',
+  # Do a second pass with planners placing everything else they want to
+  # have in the level.
+  'fine',
+
+  # III. Polish
+  # Look at the entire level to make sure it all fits together, then do
+  # some final steps to put everything in the right place.
+
+  # Figure out which tiles are discovered at the beginning of the level.
+  'discover',
+  # Determine the objectives for the level.
+  'adjure',
+  # Write the objectives.
+  'enscribe',
+  # Add scripting logic.
+  'script',
+  # Compute the final bounds of the level.
+  'fence',
+  # Serialize the output. If asked to, check the scripts for mistakes
+  # first. This needs the final bounds to check that every tile the scripts
+  # use is in the level.
+  'serialize',
+)
+
+# The first stage that reads each Context value. When restoring a checkpoint,
+# a value can only be overridden if the checkpoint is from before the stage
+# that uses it. Values not listed here are used before partition ends.
+CONTEXT_FIRST_USED: Dict[str, str] = {
+  'special_baseplate_count': 'discriminate',
+  'weave_ratio': 'weave',
+  'water_coverage': 'flood',
+  'lava_coverage': 'flood',
+  'water_spread': 'flood',
+  'lava_spread': 'flood',
+  'cave_erode_chance': 'flood',
+  'hall_erode_chance': 'flood',
+  # These are baked into each planner as it is conquered, so they can't be
+  # changed by resuming after conquest. Richness also decides how many
+  # crystals each planner expects, which conquest uses to choose planners,
+  # so it can't be moved later without changing caverns. To sweep these,
+  # checkpoint after flood instead.
+  'crystal_richness': 'conquest',
+  'ore_richness': 'conquest',
+  'monster_spawn_rate': 'conquest',
+  'monster_wave_size': 'conquest',
+  'cave_baroqueness': 'rough',
+  'hall_baroqueness': 'rough',
+  'recharge_seam_chance': 'fine',
+  'placement_version': 'fine',
+  'cave_landslide_chance': 'fine',
+  'hall_landslide_chance': 'fine',
+  'cave_landslide_freq': 'fine',
+  'hall_landslide_freq': 'fine',
+  'min_landslide_period': 'fine',
+  'crystal_goal_ratio': 'adjure',
+}
+
+
+class _CheckpointPickler(pickle.Pickler):
+  """Pickles a cavern, leaving out its context."""
+
+  def __init__(self, file, context: Context):
+    super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+    self._context = context
+
+  def persistent_id(self, obj):
+    return 'context' if obj is self._context else None
+
+
+class _CheckpointUnpickler(pickle.Unpickler):
+  """Unpickles a cavern, giving it a new context."""
+  context: Optional[Context] = None
+
+  def persistent_load(self, pid):
+    if pid == 'context' and self.context:
+      return self.context
+    raise pickle.UnpicklingError(f'Unexpected persistent id {repr(pid)}')
+
 
 class Cavern(): # pylint: disable=too-many-instance-attributes
-  def __init__(self, context):
+  def __init__(
+      self,
+      context,
+      lean: bool = False,
+      keep_diorama: bool = True,
+      validate: bool = False):
+    """
+    lean: Release everything a stage made as soon as no later stage needs
+      it, rather than keeping it to look at afterward. Use this when
+      generating many caverns.
+    keep_diorama: In lean mode, whether to keep the diorama after it has
+      been serialized. Turn this off when only the serialized cavern is
+      needed.
+    validate: Check the scripts for mistakes while serializing, logging a
+      warning for each one.
+    """
     # Context object, which contains value tweaks and RNG
     self.context = context
+    self._lean = lean
+    self._keep_diorama = keep_diorama
+    self._validating = validate
 
     # Actual content data, which steps will fill in
     self.stage: str = 'init'
@@ -28,104 +184,79 @@ class Cavern(): # pylint: disable=too-many-instance-attributes
     self.baseplates: List[Baseplate] = []
     self.paths: List[Path] = []
     self.conquest: Optional[Conquest] = None
-    self._diorama: Diorama = Diorama(context)
+    self._diorama: Optional[Diorama] = Diorama(context)
     self._serialized: Optional[str] = None
     self.adjurator: Optional[Adjurator] = None
     self._lore: Optional[Lore] = None
 
+    # Copied from the logger at the start of generation so stages can skip
+    # logging entirely when nobody is listening.
+    self._verbosity: int = 0
+    self._tracing: bool = False
+
   @property
   def planners(self) -> Iterable[Planner]:
     return self.conquest.planners if self.conquest else tuple()
 
   @property
-  def diorama(self) -> Diorama:
+  def diorama(self) -> Optional[Diorama]:
+    """The diorama, or None if it was released in lean mode."""
     return self._diorama
 
   @property
   def serialized(self) -> Optional[str]:
     return self._serialized
 
-  def generate(self):
-    """Generates the cavern."""
-    stages: Tuple[Tuple[str, Callable[[], None]]] = (
-      # I. Outlines
-      # Determine the approximate size and location of the caves in this
-      # cavern, as well as the set of paths that will connect them.
-      # Roughly based on this algorithm:
-      # https://www.gamedeveloper.com/programming/procedural-dungeon-generation-algorithm
-
-      # Generate "bubbles", which are rectangles of arbitrary sizes, and
-      # place them roughly in a random pile in the center of the map.
-      ('partition', self._partition),
-      # Choose the largest lots to become "special".
-      ('discriminate', self._discriminate),
-      # Create a triangular mesh between the centers of all special lots.
-      # These will be treated as the non-overlapping edges of a graph,
-      # with nodes at each special lot.
-      ('triangulate', self._triangulate),
-      # Compute the minimum spanning tree of the graph generated above.
-      # This ensures the graph is fully connected, so the cavern will
-      # actually be playable.
-      ('span', self._span),
-      # Edges connect two special lots with a straight line. To make this more
-      # interesting, add back any lots the edge intersects, forming a
-      # zigzagging path between the two.
-      ('bore', self._bore),
-      # Add a few edges back in to make the cave more interesting.
-      # Discard the remaining edges.
-      ('weave', self._weave),
-      # Discard any remaining baseplates that aren't part of a path.
-      ('cull', self._cull),
-
-      # II. Planners
-      # Using the outline as a guide, decide what to do with, then build each
-      # individual cave and hall.
-
-      # Assign the paths and special lots to "planners", which will decide
-      # what to put in the lots they are given.
-      ('negotiate', self._negotiate),
-      # Pick some planners and hint they should primarily contain water or
-      # lava. Perform a depth-first search so the result will have more rivers \
-      # than single lakes.
-      ('flood', self._flood),
-      # The planners we have so far are basically stem cells.
-      # Do a breadth-first search starting from the spawn and choose more
-      # concretely what type of planner each cave and hall will be.
-      ('conquest', self._conquest),
-      # Place tiles in the rough shape of each planner's layout.
-      # Because planners overlap, some overwriting is expected.
-      ('rough', self._rough),
-      # Reinforce any wall that would immediately collapse.
-      ('patch', self._patch),
-      # Do a second pass with planners placing everything else they want to
-      # have in the level.
-      ('fine', self._fine),
-
-      # III. Polish
-      # Look at the entire level to make sure it all fits together, then do
-      # some final steps to put everything in the right place.
-
-      # Figure out which tiles are discovered at the beginning of the level.
-      ('discover', self._discover),
-      # Determine the objectives for the level.
-      ('adjure', self._adjure),
-      # Write the objectives.
-      ('enscribe', self._enscribe),
-      # Add scripting logic.
-      ('script', self._script),
-      # Compute the final bounds of the level.
-      ('fence', self._fence),
-      # Serialize the output.
-      ('serialize', self._serialize),
-    )
+  def generate(
+      self,
+      until: Optional[str] = None,
+      predicates: Optional[Mapping[str, Predicate]] = None) -> bool:
+    """
+    Generates the cavern.
+
+    If the cavern was stopped partway or restored from a checkpoint, this
+    picks up after the last stage it finished.
+
+    until: If given, stop after this stage instead of running all of them.
+    predicates: Maps stage names to functions that are called with this
+      cavern right after that stage. If any returns False, the cavern is
+      rejected and generation stops there.
+
+    Returns False if the cavern was rejected, or True otherwise.
+    """
+    predicates = predicates or {}
+    for stage in itertools.chain((until,) if until else (), predicates):
+      if stage not in STAGES:
+        raise ValueError(f'Unknown stage {repr(stage)}')
+    if self.stage == 'done':
+      return True
+    start = STAGES.index(self.stage) + 1 if self.stage in STAGES else 0
+    stop = STAGES.index(until) + 1 if until else len(STAGES)
+    stages = STAGES[start:stop]
+    logger = self.context.logger
+    self._verbosity = logger.verbosity
+    self._tracing = logger.tracing
     try:
       self._log_state(V_MINOR)
-      for i, (stage, fn) in enumerate(stages):
+      for i, stage in enumerate(stages):
         self.stage = stage
-        fn()
-        self.context.logger.log_progress(i / (len(stages) - 1))
-      self.stage = 'done'
+        with self._traced(stage):
+          getattr(self, f'_{stage}')()
+        # Predicates see everything the stage made, even in lean mode.
+        accepted = stage not in predicates or predicates[stage](self)
+        if self._lean:
+          self._release(stage)
+        logger.log_progress(i / max(len(stages) - 1, 1))
+        if not accepted:
+          if self._tracing:
+            logger.trace_event(self, 'rejected', {'stage': stage})
+          logger.log_progress(1)
+          self._log_state(V_DONE)
+          return False
+      if stop == len(STAGES):
+        self.stage = 'done'
       self._log_state(V_DONE)
+      return True
     except Exception as e:
       self.context.logger.log_progress(1)
       self.context.logger.log_exception(self, e)
@@ -134,8 +265,94 @@ class Cavern(): # pylint: disable=too-many-instance-attributes
   def is_done(self) -> bool:
     return self._serialized is not None
 
+  def checkpoint(self) -> bytes:
+    """
+    Saves everything generated so far, including the positions of all the
+    RNG streams, so Cavern.restore can continue after the current stage.
+    """
+    if self.stage not in STAGES:
+      raise ValueError(f'Can\'t checkpoint a cavern at stage {self.stage}')
+    context = self.context
+    header = {
+        'version': VERSION,
+        'stage': self.stage,
+        'context': {
+            f.name: getattr(context, f.name)
+            for f in dataclasses.fields(context)
+            if f.name not in ('logger', 'rng')},
+        'rng': context.rng,
+    }
+    f = io.BytesIO()
+    pickler = _CheckpointPickler(f, context)
+    pickler.dump(header)
+    pickler.dump(self)
+    return f.getvalue()
+
+  @classmethod
+  def restore(cls, checkpoint: bytes, logger: Logger, **overrides) -> 'Cavern':
+    """
+    Loads a cavern saved by checkpoint.
+
+    overrides: Context values to change. Each must be one that is first
+      used by a stage after the checkpoint (see CONTEXT_FIRST_USED).
+    """
+    unpickler = _CheckpointUnpickler(io.BytesIO(checkpoint))
+    header = unpickler.load()
+    if header['version'] != VERSION:
+      raise ValueError(
+          f'Checkpoint is from Hognose {header["version"]}, '
+          f'but this is {VERSION}')
+    stage = header['stage']
+    values = header['context']
+    for k, v in overrides.items():
+      if k not in values:
+        raise ValueError(f'Unknown context value {repr(k)}')
+      if v != values[k] and (
+          k not in CONTEXT_FIRST_USED
+          or STAGES.index(CONTEXT_FIRST_USED[k]) <= STAGES.index(stage)):
+        raise ValueError(
+            f'{k} was already used by the time {stage} finished, '
+            'so it can\'t be changed')
+    unpickler.context = Context(
+        logger=logger, rng=header['rng'], **{**values, **overrides})
+    cavern = unpickler.load()
+    if not isinstance(cavern, cls):
+      raise ValueError('Checkpoint does not contain a cavern')
+    return cavern
+
+  def _release(self, stage: str):
+    """Drops whatever no stage after this one needs."""
+    if stage == 'negotiate':
+      # Planners keep the baseplates they were given until script. The rest,
+      # and the paths, aren't needed.
+      self.bubbles = []
+      self.baseplates = []
+      self.paths = []
+    elif stage == 'script':
+      # Some planners and their monster spawners refer to each other, so they
+      # wait for the garbage collector. Drop their pearls now instead. The
+      # lore refers back to this cavern, so dropping it breaks that cycle.
+      for planner in self.conquest.somatic_planners:
+        planner.release_pearl()
+      # Nothing after this draws from the planners' streams.
+      for planner in self.conquest.planners:
+        planner.rng.release()
+      self.conquest = None
+      self.adjurator = None
+      self._lore = None
+    elif stage == 'serialize' and not self._keep_diorama:
+      self._diorama = None
+
   def _log_state(self, verbosity, details=None):
-    self.context.logger.log_state(self, verbosity, details)
+    if verbosity <= self._verbosity:
+      self.context.logger.log_state(self, verbosity, details)
+
+  def _traced(self, name: str, planner: Optional[Planner] = None):
+    """A context manager that traces the work done inside it."""
+    if self._tracing:
+      return self.context.logger.span(
+          self, name, {'planner': str(planner)} if planner else None)
+    return _NO_SPAN
 
   def _partition(self):
     """Randomly place randomly sized rectangular bubbles near the center."""
@@ -209,7 +426,8 @@ class Cavern(): # pylint: disable=too-many-instance-attributes
   def _rough(self):
     """Do a rough draft of tile placement that may be overwritten."""
     for planner in self.conquest.somatic_planners:
-      planner.rough(self.diorama.tiles)
+      with self._traced('planner', planner):
+        planner.rough(self.diorama.tiles)
       self._log_state(V_MINOR, planner)
     self._log_state(V_MAJOR)
 
@@ -221,7 +439,8 @@ class Cavern(): # pylint: disable=too-many-instance-attributes
   def _fine(self):
     """Put anything else in the level the planners want to have."""
     for planner in self.conquest.somatic_planners:
-      planner.fine(self.diorama)
+      with self._traced('planner', planner):
+        planner.fine(self.diorama)
       self._log_state(V_VERBOSE, planner)
     self._log_state(V_MAJOR)
 
@@ -283,5 +502,8 @@ class Cavern(): # pylint: disable=too-many-instance-attributes
 
   def _serialize(self):
     """Dump everything to a string."""
+    if self._validating:
+      for problem in validate_script(self.diorama):
+        self.context.logger.log_warning(f'Script: {problem}')
     self._serialized = self.diorama.serialize()
     self._log_state(V_MINOR)
@@ -0,0 +1,55 @@
+"""Command line arguments shared by the scripts that generate caverns."""
+
+import argparse
+import os
+
+from lib.base import MAX_SEED
+
+
+def add_seed_range(
+    parser: argparse.ArgumentParser,
+    count: int,
+    count_help: str = 'How many seeds to generate.'):
+  """Adds -s, the first seed in hexadecimal, and -c, how many to use."""
+  parser.add_argument(
+    '-s', '--seed',
+    type=lambda s: int(s, 16),
+    default=0,
+    help='The first seed to use, in hexadecimal.')
+  parser.add_argument(
+    '-c', '--count',
+    type=int,
+    default=count,
+    help=count_help)
+
+
+def seed_range(
+    parser: argparse.ArgumentParser, args: argparse.Namespace) -> range:
+  """
+  Returns the seeds given by add_seed_range, or exits if there are none or
+  they are too big.
+  """
+  if args.count < 1:
+    parser.error('Count must be at least 1')
+  if args.seed + args.count > MAX_SEED:
+    parser.error(f'Seeds must be less than {MAX_SEED:x}')
+  return range(args.seed, args.seed + args.count)
+
+
+def add_overrides(parser: argparse.ArgumentParser, help_text: str):
+  """Adds --set, which can be given any number of times."""
+  parser.add_argument(
+    '--set',
+    action='append',
+    default=[],
+    metavar='KEY=VALUE',
+    help=help_text)
+
+
+def add_jobs(parser: argparse.ArgumentParser):
+  """Adds -j, how many processes to use."""
+  parser.add_argument(
+    '-j', '--jobs',
+    type=int,
+    default=os.cpu_count(),
+    help='How many processes to use.')
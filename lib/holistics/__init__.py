@@ -1,2 +1,3 @@
 from .adjurator import Adjurator
 from .patcher import patch
+from .validator import validate_script
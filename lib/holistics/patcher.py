@@ -1,34 +1,57 @@
-from typing import Dict, Tuple
+from typing import Dict, Iterable, Tuple
+
+import collections
 
 from lib.plastic import Tile
 
 
-def patch(tiles: Dict[Tuple[int, int], Tile]):
+def _candidates(
+    tiles: Dict[Tuple[int, int], Tile]) -> Iterable[Tuple[int, int]]:
+  """
+  Yields every wall with at least three floor neighbors, in the order a
+  column-by-column scan of the map would find them.
+  """
   left = min(x for x, y in tiles)
   right = max(x for x, y in tiles)
   top = min(y for x, y in tiles)
   bottom = max(y for x, y in tiles)
-  for x in range(left, right + 1):
-    for y in range(top, bottom + 1):
-      if not tiles.get((x, y), Tile.SOLID_ROCK).is_wall:
-        continue
-      neighbors = tuple(
-          ((ox, oy), tiles.get((x + ox, y + oy), Tile.SOLID_ROCK))
-          for (ox, oy)
-          in ((0, -1), (0, 1), (-1, 0), (1, 0)))
-      wall_neighbors = tuple(
-          (ox, oy)
-          for (ox, oy), tile
-          in neighbors
-          if tile.is_wall)
-      if len(wall_neighbors) > 1:
-        continue
-      if not wall_neighbors:
-        wall_neighbors = ((0, -1),)
-        tiles[x, y - 1] = Tile.DIRT
-      ox, oy = wall_neighbors[0]
-      # Right turn
-      tiles[x - oy, y + ox] = Tile.DIRT
-      # Remaining square
-      if not tiles.get((x + ox - oy, y + ox + oy), Tile.SOLID_ROCK).is_wall:
-        tiles[x + ox - oy, y + ox + oy] = Tile.DIRT
+  floor_neighbors = collections.Counter(
+      (x + ox, y + oy)
+      for (x, y), tile in tiles.items()
+      if not tile.is_wall
+      for (ox, oy) in ((0, -1), (0, 1), (-1, 0), (1, 0)))
+  return sorted(
+      (x, y) for (x, y), count in floor_neighbors.items()
+      if count >= 3
+      and left <= x <= right
+      and top <= y <= bottom
+      and tiles.get((x, y), Tile.SOLID_ROCK).is_wall)
+
+
+def patch(tiles: Dict[Tuple[int, int], Tile]):
+  # Patching only ever turns floor into wall, so no tile can become a
+  # candidate that wasn't one to start with. Each still needs to be checked
+  # again when it is reached.
+  for x, y in _candidates(tiles):
+    if not tiles.get((x, y), Tile.SOLID_ROCK).is_wall:
+      continue
+    neighbors = tuple(
+        ((ox, oy), tiles.get((x + ox, y + oy), Tile.SOLID_ROCK))
+        for (ox, oy)
+        in ((0, -1), (0, 1), (-1, 0), (1, 0)))
+    wall_neighbors = tuple(
+        (ox, oy)
+        for (ox, oy), tile
+        in neighbors
+        if tile.is_wall)
+    if len(wall_neighbors) > 1:
+      continue
+    if not wall_neighbors:
+      wall_neighbors = ((0, -1),)
+      tiles[x, y - 1] = Tile.DIRT
+    ox, oy = wall_neighbors[0]
+    # Right turn
+    tiles[x - oy, y + ox] = Tile.DIRT
+    # Remaining square
+    if not tiles.get((x + ox - oy, y + ox + oy), Tile.SOLID_ROCK).is_wall:
+      tiles[x + ox - oy, y + ox + oy] = Tile.DIRT
@@ -0,0 +1,142 @@
+"""Checks generated scripts for mistakes the game would only find in play."""
+
+from typing import Dict, Iterable, List, Set, Tuple
+
+import re
+
+from lib.plastic import Diorama, ScriptFragment
+
+_TYPES = frozenset((
+    'arrow', 'bool', 'building', 'creature', 'float', 'int', 'intarray',
+    'miner', 'string', 'timer', 'vehicle'))
+
+# Names made up by planners start with a lowercase letter and a prefix that
+# ends with an underscore, like monsterSpawner_p12_state. Names built into the
+# game (crystals, Crystal_C) never look like that.
+_NAME_RE = re.compile(r'(?<!\w)[a-z][A-Za-z0-9]*_\w+')
+_STRING_RE = re.compile(r'"(?:\\.|[^"\\])*"')
+_DECLARATION_RE = re.compile(
+    r'^(?P<type>\w+) (?P<name>\w+)(?:=(?P<value>.*))?$')
+_EVENT_RE = re.compile(r'^(?P<name>\w+)::(?P<rest>.*)$')
+_TRIGGER_RE = re.compile(
+    r'^(?:if|when)\((?P<condition>[^)]*)\)(?P<events>(?:\[[^\]]*\])+)$')
+_BRACKET_RE = re.compile(r'\[([^\]]*)\]')
+
+
+class _Validator(): # pylint: disable=too-many-instance-attributes
+
+  def __init__(self, bounds: Tuple[int, int, int, int]):
+    left, top, width, height = bounds
+    self._offset = (-left, -top)
+    self._size = (width, height)
+    self.problems: List[str] = []
+    self._variables: Set[str] = set()
+    self._events: Set[str] = set()
+    # Which fragment first defined something with each prefix.
+    self._prefixes: Dict[str, int] = {}
+    # Names that are used, with the line that used them. These are checked at
+    # the end because events can be used before they are defined.
+    self._used_variables: List[Tuple[str, str]] = []
+    self._used_events: List[Tuple[str, str]] = []
+
+  def _text(self, line) -> str:
+    if isinstance(line, str):
+      return line
+    ox, oy = self._offset
+    width, height = self._size
+    def h():
+      for part in line:
+        if isinstance(part, str):
+          yield part
+        else:
+          x, y = part.x + ox, part.y + oy
+          if not (0 <= x < width and 0 <= y < height):
+            self.problems.append(
+                f'Tile {x},{y} is outside the {width}x{height} cavern')
+          yield f'{y},{x}'
+    return ''.join(h())
+
+  def _define(self, names: Set[str], name: str, kind: str, fragment: int):
+    if name in self._variables or name in self._events:
+      self.problems.append(f'{kind} {name} is defined more than once')
+    names.add(name)
+    prefix = self._prefix_of(name)
+    if prefix:
+      first = self._prefixes.setdefault(prefix, fragment)
+      if first != fragment:
+        self.problems.append(
+            f'{kind} {name} uses the prefix {prefix}, which belongs to '
+            'another fragment')
+
+  @staticmethod
+  def _prefix_of(name: str) -> str:
+    if _NAME_RE.fullmatch(name):
+      return name[:name.rindex('_') + 1]
+    return ''
+
+  def _use(self, text: str, line: str):
+    """Notes every made-up name in a statement or condition."""
+    text = _STRING_RE.sub('""', text)
+    for event in _BRACKET_RE.findall(text):
+      # Brackets have either the name of an event or a statement.
+      if _NAME_RE.fullmatch(event):
+        self._used_events.append((event, line))
+      else:
+        self._use(event, line)
+    text = _BRACKET_RE.sub('', text)
+    # So does a line in an event.
+    if _NAME_RE.fullmatch(text.rstrip(';')):
+      self._used_events.append((text.rstrip(';'), line))
+      return
+    for name in _NAME_RE.findall(text):
+      self._used_variables.append((name, line))
+
+  def fragment(self, index: int, fragment: ScriptFragment):
+    in_event = False
+    for line in fragment.lines:
+      text = self._text(line)
+      if not text:
+        in_event = False
+      elif text.startswith('#'):
+        pass
+      elif in_event:
+        if not text.endswith(';'):
+          self.problems.append(f'Statement does not end with ";": {text}')
+        self._use(text, text)
+      elif m := _EVENT_RE.match(text):
+        self._define(self._events, m.group('name'), 'Event', index)
+        self._use(m.group('rest'), text)
+        in_event = True
+      elif m := _TRIGGER_RE.match(text):
+        self._use(m.group('condition'), text)
+        self._use(m.group('events'), text)
+      elif (m := _DECLARATION_RE.match(text)) and m.group('type') in _TYPES:
+        self._define(self._variables, m.group('name'), 'Variable', index)
+        value = _STRING_RE.sub('', m.group('value') or '')
+        for name in _NAME_RE.findall(value):
+          self._used_variables.append((name, text))
+      else:
+        self.problems.append(f'Unrecognized line: {text}')
+
+  def finish(self):
+    for name, line in self._used_events:
+      if name not in self._events:
+        self.problems.append(f'Event {name} is never defined: {line}')
+    for name, line in self._used_variables:
+      if name not in self._variables:
+        self.problems.append(f'Variable {name} is never declared: {line}')
+
+
+def validate_script(diorama: Diorama) -> Iterable[str]:
+  """
+  Checks the script of a diorama that has its final bounds. This makes sure
+  that every event and variable used is defined exactly once, that no two
+  fragments define things with the same prefix, that every event statement
+  ends with a semicolon, and that every tile is in bounds. Returns a
+  description of each problem found.
+  """
+  validator = _Validator(diorama.bounds)
+  for i, fragment in enumerate(diorama.script.fragments):
+    validator.fragment(i, fragment)
+  validator.finish()
+  return validator.problems
@@ -199,8 +199,10 @@ class PgBuilder():
     other = self._coerce(other)
     return PgBuilder(
         self._pg,
-        tuple(set(self._heads + other._heads)),
-        tuple(set(self._tails + other._tails)),
+        # Deduplicate in order. A set would order phrases by their hash,
+        # which changes from run to run, and so would the generated text.
+        tuple(dict.fromkeys(self._heads + other._heads)),
+        tuple(dict.fromkeys(self._tails + other._tails)),
         self._bypass or other._bypass)
 
   def __ror__(self, other) -> 'PgBuilder':
@@ -1,7 +1,5 @@
 from typing import Literal
 
-import functools
-
 from lib.outlines.bubble import Bubble
 from lib.outlines.space import Space
 
@@ -14,6 +12,8 @@ class Baseplate(Space):
   SPECIAL = 'special'
   HALL = 'hall'
 
+  __slots__ = ('_left', '_top', '_right', '_bottom', 'kind')
+
   def __init__(self, bubble: Bubble, context):
     super().__init__(bubble.id, context)
     self._left = round(bubble.left)
@@ -50,15 +50,15 @@ class Baseplate(Space):
   def bottom(self) -> int:
     return self._bottom
 
-  @functools.cached_property
+  @property
   def width(self) -> int:
     return self._right - self._left
 
-  @functools.cached_property
+  @property
   def height(self) -> int:
     return self._bottom - self._top
 
-  @functools.cached_property
+  @property
   def center(self):
     return (self.left + self.width / 2, self.top + self.height / 2)
 
@@ -74,6 +74,6 @@ class Baseplate(Space):
           return True
     return False
 
-  @functools.cached_property
+  @property
   def pearl_radius(self):
     return min(self.width, self.height) // 2
@@ -3,6 +3,7 @@ from lib.outlines.space import Space
 
 class Bubble(Space):
   """An abstract Space that can be cut and modified."""
+  __slots__ = ('left', 'top', 'right', 'bottom')
 
   def __init__(
           self,
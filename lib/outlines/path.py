@@ -1,8 +1,10 @@
-from typing import Dict, Iterable, List, Literal, Set, Tuple
+from typing import Dict, Iterable, List, Literal, Optional, Set
 
 import math
 import operator
 
+import numpy as np
+
 from lib.base import Context, ProceduralThing
 from lib.outlines.baseplate import Baseplate
 from lib.utils.geometry import plot_line
@@ -15,6 +17,8 @@ class Path(ProceduralThing):
   SPANNING = 'spanning'
   AUXILIARY = 'auxiliary'
 
+  __slots__ = ('kind', 'baseplates')
+
   def __init__(self, id: int, context: Context,
                baseplates: Iterable[Baseplate]):
     super().__init__(id, context)
@@ -48,44 +52,50 @@ class Path(ProceduralThing):
   @staticmethod
   def minimum_spanning_tree(paths: Iterable['Path']):
     """Assigns the SPANNING kind to an MST of the given paths."""
-    next_cluster = 0
-    clusters = {}
+    # Kruskal's algorithm, with a union-find forest of baseplates.
+    parents: Dict[Baseplate, Baseplate] = {}
+
+    def find(bp: Baseplate) -> Baseplate:
+      root = bp
+      while parents.get(root, root) is not root:
+        root = parents[root]
+      # Point everything on the way directly at the root.
+      while bp is not root:
+        parents[bp], bp = root, parents[bp]
+      return root
+
     for path in sorted(paths, key=Path.bat_distance):
-      origin = path.origin
-      destination = path.destination
-      if origin in clusters:
-        if destination in clusters:
-          origin_cluster = clusters[origin]
-          destination_cluster = clusters[destination]
-          if destination_cluster == origin_cluster:
-            # This would create a cycle. Skip it.
-            continue
-          # This connects two existing clusters. Unite them.
-          for k, v in tuple(clusters.items()):
-            if v == destination_cluster:
-              clusters[k] = origin_cluster
-        else:
-          # Destination is not yet clustered. Add it to the origin's cluster.
-          clusters[destination] = clusters[origin]
-      else:
-        if destination in clusters:
-          # Origin is not yet clustered. Add it to the destination's cluster.
-          clusters[origin] = clusters[destination]
-        else:
-          # Neither lots are clustered. Create a new cluster.
-          clusters[origin] = next_cluster
-          clusters[destination] = next_cluster
-          next_cluster += 1
+      origin = find(path.origin)
+      destination = find(path.destination)
+      if origin is destination:
+        # This would create a cycle. Skip it.
+        continue
+      parents[destination] = origin
       path.kind = Path.SPANNING
 
   @staticmethod
   def bore(paths: List['Path'], baseplates: List[Baseplate]):
     """Adds baseplates to paths that intersect them."""
-    baseplate_index: Dict[Tuple[int, int], Baseplate] = {}
-    for bp in baseplates:
-      for x in range(bp.left, bp.right):
-        for y in range(bp.top, bp.bottom):
-          baseplate_index[x, y] = bp
+    if not baseplates:
+      return
+    # Which baseplate covers each tile, as an index into baseplates plus one
+    # so that 0 means none. Filling rectangles of an array is much cheaper
+    # than a dict entry per tile, which matters for large caverns.
+    left = min(bp.left for bp in baseplates)
+    top = min(bp.top for bp in baseplates)
+    width = max(bp.right for bp in baseplates) - left
+    height = max(bp.bottom for bp in baseplates) - top
+    index = np.zeros((max(width, 0), max(height, 0)), dtype=np.int32)
+    for i, bp in enumerate(baseplates, 1):
+      index[bp.left - left:bp.right - left, bp.top - top:bp.bottom - top] = i
+    columns: List[List[int]] = index.tolist()
+
+    def baseplate_at(x: int, y: int) -> Optional[Baseplate]:
+      if 0 <= x - left < width and 0 <= y - top < height:
+        i = columns[x - left][y - top]
+        if i:
+          return baseplates[i - 1]
+      return None
 
     def gen_path_plates(path: 'Path') -> Iterable[Baseplate]:
       last = path.origin
@@ -93,7 +103,7 @@ class Path(ProceduralThing):
       yield last
       while True:
         for x, y in plot_line(last.center, path.destination.center):
-          bp = baseplate_index.get((x, y))
+          bp = baseplate_at(x, y)
           if bp == path.destination:
             yield bp
             return
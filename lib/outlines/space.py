@@ -9,6 +9,7 @@ from lib.base import ProceduralThing
 
 class Space(ProceduralThing):
   """Base class for a single rectangle in the map area."""
+  __slots__ = ()
 
   @property
   def area(self):
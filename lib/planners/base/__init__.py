@@ -2,3 +2,4 @@ from .planner import Planner
 from .somatic import SomaticPlanner
 from .stem import StemPlanner
 from .pearl import Oyster, Layer
+from .placement import TileArrays, deposit
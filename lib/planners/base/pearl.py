@@ -191,6 +191,8 @@ class Oyster():
 
 
 class PearlTile():
+  __slots__ = ('pos', 'layer', 'sequence')
+
   def __init__(self, pos, layer, sequence):
     self.pos: Tuple[int, int] = pos
     self.layer: int = layer
@@ -240,3 +242,6 @@ class Pearl():
 
   def __getitem__(self, pos: Tuple[int, int]):
     return self._by_pos[pos]
+
+  def get(self, pos: Tuple[int, int]) -> Optional[PearlTile]:
+    return self._by_pos.get(pos)
@@ -0,0 +1,108 @@
+"""Scoring and filling tiles around a planner in bulk."""
+
+from typing import Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from lib.plastic import Tile
+
+# Every tile as a small integer, so tiles can be kept in arrays.
+_TILES = tuple(Tile)
+_CODES = {tile: i for i, tile in enumerate(_TILES)}
+
+SIDES = ((0, -1), (0, 1), (-1, 0), (1, 0))
+CORNERS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+# The columns of a TileArrays: the tile itself, then its neighbors.
+_OFFSETS = ((0, 0),) + SIDES + CORNERS
+
+
+def _mask(tiles: Iterable[Tile]) -> np.ndarray:
+  mask = np.zeros(len(_TILES), dtype=bool)
+  for tile in tiles:
+    mask[_CODES[tile]] = True
+  return mask
+
+
+_PASSABLE_BY_MINER = _mask(t for t in Tile if t.passable_by_miner)
+
+
+class TileArrays():
+  """
+  The tiles at and around some positions, looked up in a diorama once.
+  Each query answers for every position at once, as an array in the same
+  order as the positions.
+  """
+
+  def __init__(
+      self,
+      tiles: Mapping[Tuple[int, int], Tile],
+      positions: Iterable[Tuple[int, int]]):
+    self.positions = tuple(positions)
+    get = tiles.get
+    self._codes = np.array(
+        [_CODES[get((x + ox, y + oy), Tile.SOLID_ROCK)]
+         for x, y in self.positions
+         for ox, oy in _OFFSETS],
+        dtype=np.uint8).reshape(-1, len(_OFFSETS))
+
+  def __len__(self):
+    return len(self.positions)
+
+  def _neighbors(self, offsets: Sequence[Tuple[int, int]]) -> np.ndarray:
+    return self._codes[:, [_OFFSETS.index(o) for o in offsets]]
+
+  def is_tile(self, tiles: Iterable[Tile]) -> np.ndarray:
+    """Returns whether each position is one of the given tiles."""
+    return _mask(tiles)[self._codes[:, 0]]
+
+  def count(
+      self,
+      tiles: Iterable[Tile],
+      offsets: Sequence[Tuple[int, int]] = SIDES) -> np.ndarray:
+    """Counts the neighbors at offsets that are one of the given tiles."""
+    return _mask(tiles)[self._neighbors(offsets)].sum(axis=1)
+
+  def count_passable_by_miner(
+      self, offsets: Sequence[Tuple[int, int]] = SIDES) -> np.ndarray:
+    """Counts the neighbors at offsets that miners can walk on or drill."""
+    return _PASSABLE_BY_MINER[self._neighbors(offsets)].sum(axis=1)
+
+  def best(
+      self,
+      scores: np.ndarray,
+      where: np.ndarray) -> Optional[Tuple[int, int]]:
+    """
+    Returns the position with the highest score where where is True, or None
+    if there isn't one. Ties go to the greatest position, the same as taking
+    the max of (score, position) tuples.
+    """
+    indexes = np.flatnonzero(where)
+    if not indexes.size:
+      return None
+    xs, ys = np.array(self.positions)[indexes].T
+    best = indexes[np.lexsort((ys, xs, scores[indexes]))[-1]]
+    return self.positions[best]
+
+
+def deposit(
+    tiles: Dict[Tuple[int, int], Tile],
+    resource: Dict[Tuple[int, int], int],
+    seam: Tile,
+    positions: Sequence[Tuple[int, int]],
+    hits: np.ndarray):
+  """
+  Adds hits[i] of a resource to the wall at positions[i]. The result is the
+  same as adding them one at a time, where a wall that already holds 3 turns
+  into a seam the next time it gets one. None of the walls may be seams yet.
+  """
+  for i in np.flatnonzero(hits):
+    pos = positions[i]
+    existing = resource.get(pos, 0)
+    k = int(hits[i])
+    # How many more the wall can hold before it would become a seam.
+    room = max(0, 3 - existing)
+    if k > room:
+      tiles[pos] = seam
+      resource[pos] = existing + k - 4
+    else:
+      resource[pos] = existing + k
@@ -2,6 +2,7 @@ import typing
 from typing import Dict, Iterable, Optional, Tuple, TYPE_CHECKING
 
 import abc
+import collections
 import functools
 
 from lib.planners.base.pearl import Oyster, Pearl
@@ -69,6 +70,10 @@ class SomaticPlanner(Planner):
         if place:
           tiles[pt.pos] = place
 
+  def release_pearl(self):
+    """Drops the pearl, which nothing needs after scripts are written."""
+    self._pearl = None
+
   @abc.abstractmethod
   def fine(self, diorama: Diorama):
     pass
@@ -123,31 +128,34 @@ class SomaticPlanner(Planner):
     pass
 
   def build_pearl(self):
-    # pylint: disable=too-many-locals
+    # pylint: disable=too-many-branches,too-many-locals
     rng = self.rng['rough.pearl']
     nucleus = self.make_nucleus()
+    pearl = self._pearl
+    pearl_radius = self.pearl_radius
+    baroqueness = self.baroqueness
     last_layer = []
-    for layer_num in range(0, self.pearl_radius + 4):
+    for layer_num in range(0, pearl_radius + 4):
       this_layer = []
       # Add tiles from nucleus
       for x, y in nucleus.get(layer_num, []):
-        if (x, y) not in self._pearl:
-          self._pearl.mark(pos=(x, y), layer=layer_num)
+        if (x, y) not in pearl:
+          pearl.mark(pos=(x, y), layer=layer_num)
           this_layer.append((x, y))
-      queue = []
+      queue = collections.deque()
       # Starting at each point in the last layer,
       for x, y in last_layer:
         # Push all adjacent tiles onto the queue.
         for ox, oy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
           nx, ny = (x + ox, y + oy)
-          if (nx, ny) not in self._pearl:
+          if (nx, ny) not in pearl:
             queue.append((nx, ny, -oy, ox))
       while queue:
-        x, y, vx, vy = queue.pop(0)
-        if (x, y) in self._pearl:
+        x, y, vx, vy = queue.popleft()
+        if (x, y) in pearl:
           continue
         # Mark the cursor point.
-        self._pearl.mark(pos=(x, y), layer=layer_num)
+        pearl.mark(pos=(x, y), layer=layer_num)
         this_layer.append((x, y))
         # As it turns right, (vx, vy) as it turns right cycles between:
         # (1, 0) -> (0, 1) -> (-1, 0) -> (0, -1) -> ...
@@ -164,23 +172,23 @@ class SomaticPlanner(Planner):
             for ox, oy, vx, vy in offsets
         )
 
-        def is_enclosed():
-          # pylint: disable=cell-var-from-loop
-          for nx, ny, _, _ in next_points:
-            if (nx, ny) not in self._pearl:
-              continue
-            info = self._pearl[nx, ny]
-            if info.layer == layer_num and info.sequence + 4 < len(this_layer):
-              return True
-          return False
-        if not is_enclosed():
+        # Stop if this would run into a tile placed earlier in this layer.
+        enclosed = False
+        for nx, ny, _, _ in next_points:
+          info = pearl.get((nx, ny))
+          if (info
+              and info.layer == layer_num
+              and info.sequence + 4 < len(this_layer)):
+            enclosed = True
+            break
+        if not enclosed:
           for nx, ny, nvx, nvy in next_points:
             # If the point was not visited and the rng allows it
-            if (nx, ny) in self._pearl:
+            if (nx, ny) in pearl:
               continue
-            if (layer_num > self.pearl_radius
-                or not rng.chance(self.baroqueness)):
+            if (layer_num > pearl_radius
+                or not rng.chance(baroqueness)):
               # Push it to the queue and don't check any other movements.
-              queue.insert(0, (nx, ny, nvx, nvy))
+              queue.appendleft((nx, ny, nvx, nvy))
               break
       last_layer = this_layer
@@ -1,12 +1,14 @@
 from typing import Optional, TYPE_CHECKING
 
-import collections
 import functools
 import itertools
 import math
 
+import numpy as np
+
 from lib.planners.caves.monster_spawners import MonsterSpawner
-from lib.planners.base import SomaticPlanner
+from lib.planners.base import SomaticPlanner, TileArrays, deposit
+from lib.planners.base.placement import CORNERS
 from lib.plastic import Creature, Diorama, ScriptFragment, Tile
 from lib.utils.geometry import plot_line
 
@@ -140,71 +142,43 @@ class BaseCavePlanner(SomaticPlanner):
           tiles,
           resource,
           count):
-    t = tuple(
-      pearl_info.pos
-      for pearl_info
-      in self.pearl.inner
-      if tiles.get(pearl_info.pos) in (
-          Tile.DIRT, Tile.LOOSE_ROCK, Tile.HARD_ROCK))
+    walls = frozenset((Tile.DIRT, Tile.LOOSE_ROCK, Tile.HARD_ROCK))
+    get = tiles.get
+    t = tuple(pt.pos for pt in self.pearl.inner if get(pt.pos) in walls)
     if t:
-      for _ in range(count):
-        x, y = rng.uniform_choice(t)
-        existing = resource.get((x, y), 0)
-        if existing >= 3 and tiles.get((x, y)) != seam:
-          tiles[x, y] = seam
-          resource[x, y] = existing - 3
-        else:
-          resource[x, y] = existing + 1
+      hits = np.bincount(rng.uniform_indices(len(t), count), minlength=len(t))
+      deposit(tiles, resource, seam, t, hits)
     else:
-      def placements():
-        for pearl_info in self.pearl.outer:
-          x, y = pearl_info.pos
-          tile = tiles.get((x, y), Tile.SOLID_ROCK)
-          if tile == Tile.SOLID_ROCK:
-            neighbor_count = collections.Counter()
-            for (ox, oy) in ((0, -1), (0, 1), (-1, 0), (1, 0)):
-              neighbor_count[
-                  tiles.get((x + ox, y + oy), Tile.SOLID_ROCK)] += 1
-            if any(
-                    n not in (Tile.SOLID_ROCK, Tile.RECHARGE_SEAM)
-                    for n in neighbor_count):
-              yield neighbor_count[Tile.SOLID_ROCK], (x, y)
-          elif tile in (Tile.DIRT, Tile.LOOSE_ROCK, Tile.HARD_ROCK):
-            yield 4, (x, y)
-      try:
-        _, (x, y) = max(placements())
-        remaining = count
-        if remaining >= 4:
-          tiles[x, y] = seam
-          remaining -= 4
-        elif tiles.get((x, y), Tile.SOLID_ROCK) == Tile.SOLID_ROCK:
-          tiles[x, y] = Tile.LOOSE_ROCK
-        resource[x, y] += remaining
-      except ValueError:
+      # Put everything in the one wall that is most out of the way.
+      arrays = TileArrays(tiles, (pt.pos for pt in self.pearl.outer))
+      solid = arrays.is_tile((Tile.SOLID_ROCK,))
+      pos = arrays.best(
+          np.where(solid, arrays.count((Tile.SOLID_ROCK,)), 4),
+          (solid & (arrays.count((Tile.SOLID_ROCK, Tile.RECHARGE_SEAM)) < 4))
+          | arrays.is_tile(walls))
+      if pos is None:
         self.context.logger.log_warning(
             f'Failed to place {resource_name} in #{self.id}')
+        return
+      remaining = count
+      if remaining >= 4:
+        tiles[pos] = seam
+        remaining -= 4
+      elif tiles.get(pos, Tile.SOLID_ROCK) == Tile.SOLID_ROCK:
+        tiles[pos] = Tile.LOOSE_ROCK
+      resource[pos] += remaining
 
   def place_recharge_seam(self, diorama):
-    # pylint: disable=too-many-nested-blocks
-    def placements():
-      for pearl_info in self.pearl.outer:
-        x, y = pearl_info.pos
-        if diorama.tiles.get((x, y), Tile.SOLID_ROCK) == Tile.SOLID_ROCK:
-          neighbor_count = collections.Counter()
-          for (ox, oy) in ((0, -1), (0, 1), (-1, 0), (1, 0)):
-            neighbor_count[
-                diorama.tiles.get((x + ox, y + oy),
-                                  Tile.SOLID_ROCK)] += 1
-          if any(n.passable_by_miner for n in neighbor_count):
-            value = neighbor_count[Tile.SOLID_ROCK] * 5
-            for ox in (-1, 1):
-              for oy in (-1, 1):
-                if diorama.tiles.get((), Tile.SOLID_ROCK) == Tile.SOLID_ROCK:
-                  value += 1
-            yield value, (x, y)
-    try:
-      _, (x, y) = max(placements())
-      diorama.tiles[x, y] = Tile.RECHARGE_SEAM
-    except ValueError:
+    arrays = TileArrays(diorama.tiles, (pt.pos for pt in self.pearl.outer))
+    scores = 5 * arrays.count((Tile.SOLID_ROCK,))
+    if self.context.placement_version >= 2:
+      scores += arrays.count((Tile.SOLID_ROCK,), CORNERS)
+    pos = arrays.best(
+        scores,
+        arrays.is_tile((Tile.SOLID_ROCK,))
+        & (arrays.count_passable_by_miner() > 0))
+    if pos is None:
       self.context.logger.log_warning(
           f'Failed to place recharge seam in #{self.id}')
+    else:
+      diorama.tiles[pos] = Tile.RECHARGE_SEAM
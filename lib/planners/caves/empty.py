@@ -12,7 +12,8 @@ class EmptyCavePlanner(BaseCavePlanner):
 def bids(stem, conquest):
   if stem.fluid_type is None:
     pr = stem.pearl_radius
-    fh = any(p.fluid_type is not None for p in conquest.intersecting(stem))
+    nb = conquest.neighborhood(stem)
+    fh = nb.dry < nb.size
     if pr < 4:
       yield (0.04, lambda: EmptyCavePlanner(stem, Oysters.FILLED))
     if pr < 10:
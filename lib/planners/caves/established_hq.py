@@ -6,7 +6,8 @@ from lib.planners.caves.base import BaseCavePlanner
 from lib.holistics import Adjurator
 from lib.planners.base import Oyster, Layer
 from lib.plastic import (
-    Building, Facing, Position, Script, ScriptFragment, Tile)
+    Building, BuildingPlacer, Facing, Position, Script, ScriptFragment,
+    ScriptTile, Tile)
 from lib.utils.geometry import plot_line
 
 
@@ -63,7 +64,7 @@ class EstablishedHQCavePlanner(BaseCavePlanner):
       super().fine_landslides(diorama)
       return
 
-  def fine_buildings(self, diorama):
+  def fine_buildings(self, diorama): # pylint: disable=too-many-locals
     rng = self.rng['place_buildings']
     bp = max(self.baseplates, key=lambda b: b.pearl_radius)
 
@@ -86,23 +87,31 @@ class EstablishedHQCavePlanner(BaseCavePlanner):
           layer = pt.layer
         q.append(pt)
       yield from rng.shuffle(q)
-    # Iterate through queue pf possible positions, roughly from inside out, and
-    # queue of building templates in a predetermined order of importance.
-    for pt in pq():
-      if not template_queue:
-        break
+    placer = self._building_placer(diorama)
+    # Go through the possible positions, roughly from inside out, and place
+    # the building templates in a predetermined order of importance. Each
+    # template picks up from the position after the last one placed.
+    queue = ((pt.pos, self._outward_facings(pt)) for pt in pq())
+    while template_queue:
       type, level, is_rubble = template_queue[0]
-      building = self._make_building(
-          diorama, type, pt, level)
-      if building:
-        template_queue.pop(0)
-        buildings.append(building)
-        if not is_rubble:
-          diorama.buildings.append(building)
-        for x, y in building.foundation_tiles:
-          diorama.tiles[x, y] = (
-              Tile.LANDSLIDE_RUBBLE_4 if is_rubble else Tile.FOUNDATION)
-        continue
+      fit = placer.first_fit(type, queue)
+      if not fit:
+        break
+      building = Building.at_tile(type, *fit, level)
+      template_queue.pop(0)
+      buildings.append(building)
+      if not is_rubble:
+        diorama.buildings.append(building)
+      for x, y in building.foundation_tiles:
+        diorama.tiles[x, y] = (
+            Tile.LANDSLIDE_RUBBLE_4 if is_rubble else Tile.FOUNDATION)
+      placer.occupy(building.foundation_tiles)
+    else:
+      # Every template was placed, so the loop didn't break. Placing one
+      # position at a time took one more position from pq() before noticing
+      # that, and taking it can shuffle another layer, so take it here too to
+      # keep rng where existing seeds expect it.
+      next(queue, None)
     if template_queue:
       self.context.logger.log_warning(
           f'failed to place remaining {len(template_queue)} buildings')
@@ -123,14 +132,18 @@ class EstablishedHQCavePlanner(BaseCavePlanner):
     if not self.is_ruin:
       return
     rng = self.rng['place_buildings']
-    for pt in self._pearl.inner:
-      if diorama.tiles.get(pt.pos, Tile.SOLID_ROCK) == Tile.FLOOR:
-        diorama.tiles[pt.pos] = rng.beta_choice(a=1, b=3, choices=(
-            Tile.FLOOR,
-            Tile.LANDSLIDE_RUBBLE_1,
-            Tile.LANDSLIDE_RUBBLE_2,
-            Tile.LANDSLIDE_RUBBLE_3,
-            Tile.LANDSLIDE_RUBBLE_4))
+    floor = tuple(
+        pt.pos for pt in self._pearl.inner
+        if diorama.tiles.get(pt.pos, Tile.SOLID_ROCK) == Tile.FLOOR)
+    rubble = rng.beta_choices(
+        (Tile.FLOOR,
+         Tile.LANDSLIDE_RUBBLE_1,
+         Tile.LANDSLIDE_RUBBLE_2,
+         Tile.LANDSLIDE_RUBBLE_3,
+         Tile.LANDSLIDE_RUBBLE_4),
+        len(floor), a=1, b=3)
+    for pos, tile in zip(floor, rubble):
+      diorama.tiles[pos] = tile
 
   def _get_building_templates(
       self) -> Iterable[Tuple[Building.Type, int, bool]]:
@@ -173,22 +186,27 @@ class EstablishedHQCavePlanner(BaseCavePlanner):
       elif self.is_ruin and rng.chance(0.40):
         yield type, level, True
 
-  def _make_building(
-      self, diorama, type, pt, level) -> Optional[Building]:
+  def _building_placer(self, diorama) -> BuildingPlacer:
+    # Most of the pearl is within its radius of the baseplates.
+    r = self.pearl_radius
+    return BuildingPlacer(
+        (min(bp.left for bp in self.baseplates) - r,
+         min(bp.top for bp in self.baseplates) - r,
+         max(bp.right for bp in self.baseplates) + r,
+         max(bp.bottom for bp in self.baseplates) + r),
+        lambda pos: diorama.tiles.get(pos) == Tile.FLOOR)
+
+  def _outward_facings(self, pt) -> Iterable[Facing]:
+    """Yields the facings that point toward a lower layer of the pearl."""
+    x, y = pt.pos
     for facing, ox, oy in (
         (Facing.NORTH, 0, -1),
         (Facing.EAST, 1, 0),
         (Facing.SOUTH, 0, 1),
         (Facing.WEST, -1, 0)):
-      x, y = pt.pos
-      if (x + ox, y + oy) in self.pearl:
-        pt2 = self.pearl[x + ox, y + oy]
-        if pt2.layer < pt.layer:
-          b = Building.at_tile(type, pt.pos, facing, level)
-          if all(diorama.tiles.get((x, y)) == Tile.FLOOR
-                 for x, y in b.foundation_tiles):
-            return b
-    return None
+      pt2 = self.pearl.get((x + ox, y + oy))
+      if pt2 and pt2.layer < pt.layer:
+        yield facing
 
   def adjure(self, adjurator):
     if not self.is_spawn:
@@ -206,10 +224,10 @@ class EstablishedHQCavePlanner(BaseCavePlanner):
     def h():
       yield '# Objective: Find the lost Rock Raider HQ'
       yield f'string {prefix}discoverMessage="{msg}"'
-      yield f'if(change:y@{y:d},x@{x:d})[{prefix}onDiscover]'
+      yield ('if(change:', ScriptTile(x, y), f')[{prefix}onDiscover]')
       yield f'{prefix}onDiscover::;'
       yield f'msg:{prefix}discoverMessage;'
-      yield f'pan:y@{math.floor(cy):d},x@{math.floor(cx):d};'
+      yield ('pan:', ScriptTile(math.floor(cx), math.floor(cy)), ';')
       yield 'wait:1;'
       yield f'{Adjurator.VAR_FOUND_HQ}=1;'
       yield ''
@@ -220,9 +238,7 @@ def bids(stem, conquest):
   if (stem.fluid_type is None
       and stem.pearl_radius > 5
       and stem.hops_to_spawn <= 4
-      and not any(
-          isinstance(p, EstablishedHQCavePlanner)
-          for p in conquest.planners)):
+      and not conquest.count(EstablishedHQCavePlanner)):
     yield (1, lambda: EstablishedHQCavePlanner(
         stem, Oysters.DEFAULT, False, False, is_ruin=False))
 
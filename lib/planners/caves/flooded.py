@@ -32,6 +32,8 @@ class ContiguousFloodedCavePlanner(FloodedCavePlanner):
 
 def bids(stem, conquest):
   pr = stem.pearl_radius
+  nb = conquest.neighborhood(stem)
+  fh = nb.dry < nb.size
   if stem.fluid_type == Tile.WATER:
     if pr < 10:
       yield (1, lambda: ContiguousFloodedCavePlanner(
@@ -39,7 +41,7 @@ def bids(stem, conquest):
     if pr > 5:
       yield (2, lambda: ContiguousFloodedCavePlanner(
           stem, Oysters.ISLAND))
-      if not any(p.fluid_type for p in conquest.intersecting(stem)):
+      if not fh:
         yield (1, lambda: FloodedCavePlanner(
             stem, Oysters.PENINSULA))
   elif stem.fluid_type == Tile.LAVA:
@@ -49,7 +51,7 @@ def bids(stem, conquest):
     if pr > 5:
       yield (1, lambda: ContiguousFloodedCavePlanner(
           stem, Oysters.LAVA_ISLAND))
-      if not any(p.fluid_type for p in conquest.intersecting(stem)):
+      if not fh:
         yield (1, lambda: FloodedCavePlanner(
             stem, Oysters.LAVA_PENINSULA))
 
@@ -6,7 +6,7 @@ from lib.planners.caves.base import BaseCavePlanner
 from lib.base import Biome
 from lib.holistics import Adjurator
 from lib.planners.base import Oyster, Layer
-from lib.plastic import Position, Script, ScriptFragment, Tile
+from lib.plastic import Position, Script, ScriptFragment, ScriptTile, Tile
 
 
 class LostMinersCavePlanner(BaseCavePlanner):
@@ -49,9 +49,9 @@ class LostMinersCavePlanner(BaseCavePlanner):
     def h():
       yield '# Objective: Find lost miners'
       yield f'string {prefix}discoverMessage="{msg}"'
-      yield f'if(change:y@{y:d},x@{x:d})[{prefix}onDiscover]'
+      yield ('if(change:', ScriptTile(x, y), f')[{prefix}onDiscover]')
       yield f'{prefix}onDiscover::;'
-      yield f'pan:y@{y:d},x@{x:d};'
+      yield ('pan:', ScriptTile(x, y), ';')
       yield f'{global_count}={global_count}-{miners_found_count};'
       yield f'(({global_count}>0))[{prefix}incomplete][{on_found_all}];'
       yield ''
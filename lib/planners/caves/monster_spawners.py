@@ -1,11 +1,13 @@
-from typing import Iterable, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
+import collections
 import enum
 import itertools
 import math
 
 from lib.planners.base import SomaticPlanner
-from lib.plastic import Creature, Diorama, ScriptFragment, Tile
+from lib.plastic import (
+    Creature, Diorama, ScriptFragment, ScriptLine, ScriptTile, Tile)
 
 
 class ScriptInfo():
@@ -22,6 +24,80 @@ class ScriptInfo():
     self.emerges = tuple(emerges)
 
 
+NEIGHBORS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+
+def chokepoints( # pylint: disable=too-many-locals,too-many-branches
+    ring: List[Tuple[int, int]],
+    inside: Set[Tuple[int, int]],
+    tiles: Dict[Tuple[int, int], Tile]) -> Iterable[Tuple[int, int]]:
+  """
+  Returns the fewest tiles of ring that anything getting inside from the
+  outside has to pass through, in the order given.
+
+  The ring must surround inside, so that every tile next to an inside tile
+  is either in the ring, inside or solid rock. The tiles returned are a
+  minimum vertex cut of the ring between tiles next to the outside and tiles
+  next to the inside. Of all such cuts, this is the one closest to the
+  outside, so triggers placed there fire as early as possible.
+  """
+  def passable(pos):
+    return tiles.get(pos, Tile.SOLID_ROCK) != Tile.SOLID_ROCK
+  def neighbors(pos):
+    x, y = pos
+    return ((x + ox, y + oy) for ox, oy in NEIGHBORS)
+  index = {pos: i for i, pos in enumerate(ring)}
+  for pos in inside:
+    if passable(pos) and any(
+        passable(n) and n not in index and n not in inside
+        for n in neighbors(pos)):
+      # Something can get in without crossing the ring, so keep all of it.
+      return ring
+
+  # Each tile is split into an entry node (2i) and an exit node (2i + 1),
+  # joined by an edge with a capacity of 1. Everything else is unlimited.
+  source = 2 * len(ring)
+  sink = source + 1
+  capacity: Dict[int, Dict[int, int]] = collections.defaultdict(dict)
+  def connect(a, b, c):
+    capacity[a][b] = c
+    capacity[b].setdefault(a, 0)
+  unlimited = len(ring) + 1
+  for i, pos in enumerate(ring):
+    connect(2 * i, 2 * i + 1, 1)
+    for n in neighbors(pos):
+      if n in index:
+        connect(2 * i + 1, 2 * index[n], unlimited)
+      elif n in inside:
+        if passable(n):
+          connect(2 * i + 1, sink, unlimited)
+      elif passable(n):
+        connect(source, 2 * i, unlimited)
+
+  # Edmonds-Karp. Every path found adds 1 to the flow, and there can't be
+  # more flow than tiles in the ring.
+  while True:
+    parents = {source: source}
+    queue = collections.deque((source,))
+    while queue and sink not in parents:
+      a = queue.popleft()
+      for b, c in capacity[a].items():
+        if c > 0 and b not in parents:
+          parents[b] = a
+          queue.append(b)
+    if sink not in parents:
+      break
+    b = sink
+    while b != source:
+      a = parents[b]
+      capacity[a][b] -= 1
+      capacity[b][a] += 1
+      b = a
+  # The last search reached everything on the source side of the cut.
+  return [pos for i, pos in enumerate(ring)
+          if 2 * i in parents and 2 * i + 1 not in parents]
+
+
 STATE_INACTIVE = 0
 STATE_RETRIGGERABLE = 1
 STATE_COOLDOWN = 2
@@ -88,13 +164,18 @@ class MonsterSpawner(): # pylint: disable=too-many-instance-attributes
     return None
 
   def _trigger_tiles(self, diorama: Diorama) -> Iterable[Tuple[int, int]]:
+    # Anything can get through a wall by drilling it, so any tile that isn't
+    # solid rock in the first ring outside the cave could be a way in. Only
+    # the ones that every way in has to cross need triggers.
     pr = self.planner.pearl_radius
+    ring = []
     for info in self.planner.pearl.outer:
       if info.layer > pr + 1:
         break
-      x, y = info.pos
-      if diorama.tiles.get((x, y), Tile.SOLID_ROCK) != Tile.SOLID_ROCK:
-        yield x, y
+      if diorama.tiles.get(info.pos, Tile.SOLID_ROCK) != Tile.SOLID_ROCK:
+        ring.append(info.pos)
+    inside = set(info.pos for info in self.planner.pearl.inner)
+    return chokepoints(ring, inside, diorama.tiles)
 
   def _secondary_trigger_tiles(
       self, diorama: Diorama) -> Iterable[Tuple[int, int]]:
@@ -110,7 +191,7 @@ class MonsterSpawner(): # pylint: disable=too-many-instance-attributes
       radius = min(bp.width, bp.height) // 2
       yield (math.floor(x), math.floor(y), radius)
 
-  def _gen_script(self) -> Iterable[str]:
+  def _gen_script(self) -> Iterable[ScriptLine]:
     prefix = f'monsterSpawner_p{self.planner.id}_'
     yield '# Spawn monsters'
 
@@ -122,7 +203,7 @@ class MonsterSpawner(): # pylint: disable=too-many-instance-attributes
     # discovered).
     if self.script_info.discovery_tile:
       x, y = self.script_info.discovery_tile
-      yield f'if(change:y@{y:d},x@{x:d})[{prefix}onActive]'
+      yield ('if(change:', ScriptTile(x, y), f')[{prefix}onActive]')
     # Otherwise, just enable on init.
     else:
       yield f'if(time:0)[{prefix}onActive]'
@@ -141,7 +222,7 @@ class MonsterSpawner(): # pylint: disable=too-many-instance-attributes
 
     # Surround the cave with triggers that cause spawn.
     for x, y in self.script_info.trigger_tiles:
-      yield f'when(enter:y@{y:d},x@{x:d})[{prefix}spawn]'
+      yield ('when(enter:', ScriptTile(x, y), f')[{prefix}spawn]')
 
     # The actual spawn function
     yield f'{prefix}spawn::;'
@@ -152,7 +233,9 @@ class MonsterSpawner(): # pylint: disable=too-many-instance-attributes
     for x, y, r in itertools.islice(
         itertools.cycle(self.script_info.emerges), self.wave_size):
       yield f'wait:random({self.min_delay:.2f})({self.max_delay:.2f});'
-      yield f'emerge:y@{y:d},x@{x:d},A,{self.creature_type.value},{r:d};'
+      yield (
+          'emerge:', ScriptTile(x, y),
+          f',A,{self.creature_type.value},{r:d};')
     # Wait for cooldown and re-enable
     if self.retrigger_mode != RetriggerMode.NEVER:
       yield f'wait:random({self.min_cooldown:.2f})({self.max_cooldown:.2f});'
@@ -165,8 +248,8 @@ class MonsterSpawner(): # pylint: disable=too-many-instance-attributes
     if self.retrigger_mode == RetriggerMode.HOARD:
       for x, y in self.script_info.secondary_trigger_tiles:
         yield (
-            f'when(enter:y@{y},x@{x},{self.creature_type.value})'
-            f'[{prefix}retrigger]')
+            'when(enter:', ScriptTile(x, y),
+            f',{self.creature_type.value})[{prefix}retrigger]')
       yield f'{prefix}retrigger::;'
       yield (
           f'(({prefix}state=={STATE_RETRIGGERABLE}))'
@@ -73,7 +73,7 @@ class SimpleSpawnCavePlanner(BaseCavePlanner):
 
 def bids(stem, conquest):
   if stem.fluid_type is None:
-    if any(p.fluid_type is None for p in conquest.intersecting(stem)):
+    if conquest.neighborhood(stem).dry:
       yield (1, lambda: SimpleSpawnCavePlanner(stem, Oysters.OPEN, 0))
       yield (1, lambda: SimpleSpawnCavePlanner(stem, Oysters.EMPTY, 0))
     else:
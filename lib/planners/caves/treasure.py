@@ -5,7 +5,8 @@ from lib.planners.caves.base import BaseCavePlanner
 from lib.planners.caves.monster_spawners import MonsterSpawner, RetriggerMode
 from lib.base import Biome
 from lib.planners.base import Oyster, Layer
-from lib.plastic import Creature, Position, Script, ScriptFragment, Tile
+from lib.plastic import (
+    Creature, Position, Script, ScriptFragment, ScriptTile, Tile)
 
 
 class TreasureCavePlanner(BaseCavePlanner):
@@ -101,7 +102,7 @@ class HoardCavePlanner(TreasureCavePlanner):
         msg = Script.escape_string(lore.event_found_hoard)
         yield f'string {gfix}message="{msg}"'
       yield f'int {prefix}crystalsAvailable=0'
-      yield f'if(change:y@{y:d},x@{x:d})[{prefix}onDiscovered]'
+      yield ('if(change:', ScriptTile(x, y), f')[{prefix}onDiscovered]')
       yield f'{prefix}onDiscovered::;'
       yield f'(({gfix}wasTriggered))return;'
       yield f'{gfix}wasTriggered=true;'
@@ -114,10 +115,10 @@ class HoardCavePlanner(TreasureCavePlanner):
       yield ''
       yield f'{prefix}go::;'
       yield f'msg:{gfix}message;'
-      yield f'pan:y@{y:d},x@{x:d};'
+      yield ('pan:', ScriptTile(x, y), ';')
       yield ''
       yield f'{prefix}noGo::;'
-      yield f'{gfix}wasTriggered=false'
+      yield f'{gfix}wasTriggered=false;'
       yield ''
     return super().script(diorama, lore) + ScriptFragment(gen())
 
@@ -158,11 +159,12 @@ class NougatCavePlanner(TreasureCavePlanner):
 
 
 def bids(stem, conquest):
-  if sum(1 for _ in conquest.intersecting(stem)) > 1:
+  nb = conquest.neighborhood(stem)
+  if nb.size > 1:
     # Only put treasure caves at dead ends
     return
   pr = stem.pearl_radius
-  fh = any(p.fluid_type is not None for p in conquest.intersecting(stem))
+  fh = nb.dry < nb.size
   if stem.fluid_type == Tile.WATER and pr > 3:
     yield (0.5, lambda: NougatCavePlanner(
         stem, Oysters.ISLAND_NOUGAT))
@@ -1,7 +1,8 @@
 from collections.abc import Callable
 import typing
-from typing import Dict, Iterable, List, Optional, Set, Tuple
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
 
+import collections
 import math
 
 from lib.base import Curve, ProceduralThing
@@ -11,7 +12,24 @@ from lib.planners.halls import HALL_BIDDERS
 from lib.plastic import Tile
 
 
+# How many planners intersect a planner, and which fluids they have.
+Neighborhood = NamedTuple(
+    'Neighborhood',
+    size=int,
+    dry=int,
+    water=int,
+    lava=int,
+)
+
+
 class Conquest(ProceduralThing):
+  """
+  Decides what each planner will become.
+
+  Bidders are asked about every stem, so anything they need to know about
+  the conquest so far is kept up to date here rather than found by looking
+  through every planner.
+  """
 
   def __init__(self, context, planners: Iterable[StemPlanner]):
     super().__init__(-1, context)
@@ -21,13 +39,23 @@ class Conquest(ProceduralThing):
     self.completed = 0
     self.expected_crystals = 0
 
-    self._bp_index: Dict[int, Set[int]] = {}
+    bp_index: Dict[int, Set[int]] = {}
     for i, planner in enumerate(self._planners):
       for bp in planner.baseplates:
         id = bp.id
-        if id not in self._bp_index:
-          self._bp_index[id] = set()
-        self._bp_index[id].add(i)
+        if id not in bp_index:
+          bp_index[id] = set()
+        bp_index[id].add(i)
+    # The indexes of the planners that share a baseplate with each planner.
+    self._intersecting: Tuple[Tuple[int, ...], ...] = tuple(
+        tuple(sorted(
+            set().union(*(bp_index[bp.id] for bp in planner.baseplates))
+            - {i}))
+        for i, planner in enumerate(self._planners))
+    # Filled in once the fluids are known.
+    self._neighborhoods: Tuple[Neighborhood, ...] = ()
+    # How many somatic planners are instances of each class.
+    self._counts: typing.Counter[type] = collections.Counter()
 
   @property
   def planners(self) -> Iterable[Planner]:
@@ -46,13 +74,20 @@ class Conquest(ProceduralThing):
     return len(self._planners)
 
   def intersecting(self, planner: Planner) -> Iterable[Planner]:
-    indexes = set()
-    for bp in planner.baseplates:
-      indexes.update(self._bp_index[bp.id])
-    for index in sorted(indexes):
-      p = self._planners[index]
-      if p != planner:
-        yield p
+    return (self._planners[i] for i in self._intersecting[planner.id])
+
+  def neighborhood(self, planner: Planner) -> Neighborhood:
+    """Describes the planners intersecting planner. Only valid after flood."""
+    return self._neighborhoods[planner.id]
+
+  def count(self, kind: type) -> int:
+    """Returns how many planners have become an instance of kind so far."""
+    return self._counts[kind]
+
+  def _add(self, planner: SomaticPlanner):
+    self._planners[planner.id] = planner
+    self._counts.update(type(planner).__mro__)
+    self.expected_crystals += planner.expected_crystals
 
   def flood(self):
     planners = typing.cast(List[StemPlanner], self._planners)
@@ -113,10 +148,19 @@ class Conquest(ProceduralThing):
             erodable.append(p)
 
   def conquest(self):
+    def neighborhood(indexes):
+      fluids = collections.Counter(
+          self._planners[i].fluid_type for i in indexes)
+      return Neighborhood(
+          len(indexes), fluids[None], fluids[Tile.WATER], fluids[Tile.LAVA])
+    self._neighborhoods = tuple(
+        neighborhood(indexes) for indexes in self._intersecting)
+
     # Choose a cave to be the origin.
     spawn, spawn_fn = self._pick_spawn(
       typing.cast(Iterable[StemPlanner], self._planners))
     queue: List[StemPlanner] = [spawn]
+    queued = {spawn.id}
     queue[0].hops_to_spawn = 0
 
     # Perform a breadth-first search on remaining planners to put them in the
@@ -126,9 +170,10 @@ class Conquest(ProceduralThing):
       for p in self.intersecting(stem):
         p = typing.cast(StemPlanner, p)
         if (p.kind != stem.kind  # Alternate between caves and halls
-            and p not in queue):
+            and p.id not in queued):
           p.hops_to_spawn = stem.hops_to_spawn + 1
           queue.append(p)
+          queued.add(p.id)
 
     # Differentiate all items in queue
     for i, stem in enumerate(queue):
@@ -145,8 +190,7 @@ class Conquest(ProceduralThing):
         planner = self.spawn = spawn_fn()
       else:
         planner = self._differentiate(stem)
-      self._planners[planner.id] = planner
-      self.expected_crystals += planner.expected_crystals
+      self._add(planner)
       yield planner
       self.completed = i + 1
 
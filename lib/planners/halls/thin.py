@@ -48,8 +48,7 @@ class ThinHallPlanner(BaseHallPlanner):
             Tile.LOOSE_ROCK,
             Tile.HARD_ROCK))
     if t:
-      for _ in range(self.expected_crystals):
-        x, y = rng.beta_choice(t, a=2, b=2)
+      for x, y in rng.beta_choices(t, self.expected_crystals, a=2, b=2):
         existing = diorama.crystals.get((x, y), 0)
         if existing >= 3 and diorama.tiles.get((x, y)) != Tile.CRYSTAL_SEAM:
           diorama.tiles[x, y] = Tile.CRYSTAL_SEAM
@@ -1,12 +1,12 @@
 """Plastic (because LEGO) is anything that actually goes in the file."""
 
-from .building import Building, BuildingDoesNotFitException
+from .building import Building, BuildingDoesNotFitException, BuildingPlacer
 from .creatures import Creature
-from .diorama import Diorama
+from .diorama import Diorama, TileMap
 from .entities import Entity
 from .hazards import Erosion, Landslide
 from .miners import Miner
 from .objectives import Objective, ResourceObjective, VariableObjective
 from .position import Facing, Position
-from .scripts import Script, ScriptFragment
+from .scripts import Script, ScriptFragment, ScriptLine, ScriptTile
 from .tile import BasicTile, Tile
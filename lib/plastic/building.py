@@ -1,4 +1,4 @@
-from typing import Iterable, Tuple
+from typing import Callable, Dict, Iterable, Optional, Tuple
 
 import copy
 import enum
@@ -69,6 +69,9 @@ class Building(Entity):
     # Super teleport origin is the LEFT side of the building when facing it.
     SUPER_TELEPORT = ('BuildingSuperTeleport_C', 'X', 2, 4, F_SUPER_TELEPORT)
 
+  __slots__ = (
+      'type', 'foundation_tiles', 'level', 'essential', 'teleport_at_start')
+
   def __init__(
       self,
       type: 'Building.Type',
@@ -104,10 +107,8 @@ class Building(Entity):
       essential: bool = False,
       teleport_at_start: bool = False) -> 'Building':
     position = Position.at_center_of_tile(pos, facing)
-    rotate = ROTATION_BY_FACING[facing]
     foundation_tiles = (
-        geometry.offset(pos, rotate(ox, oy))
-        for ox, oy in type.foundation_offsets)
+        geometry.offset(pos, offset) for offset in FOOTPRINTS[type, facing])
     return cls(
         type, position, foundation_tiles, level, essential, teleport_at_start)
 
@@ -152,6 +153,109 @@ class Building(Entity):
       f'{type} with bounds {flu}x{flv} does not fit in area of {bw}x{bh}')
 
 
+# The foundation offsets of each type of building when it has each facing.
+FOOTPRINTS: Dict[Tuple[Building.Type, Facing], Tuple[Tuple[int, int], ...]] = {
+    (type, facing): tuple(rotate(ox, oy) for ox, oy in type.foundation_offsets)
+    for type in Building.Type
+    for facing, rotate in ROTATION_BY_FACING.items()
+}
+
+
+class BuildingPlacer():
+  """
+  Finds where buildings fit on the floor of an area.
+
+  The floor is kept as a bitmap, and each footprint becomes a tuple of offsets
+  into it, so checking a position is a few index lookups and doesn't create
+  anything. Tiles are only looked up the first time a footprint covers them,
+  since most queries are answered near where they start. Positions outside
+  the bounds still work, but their tiles are looked up every time.
+  """
+
+  # How far a foundation tile can be from the building's origin.
+  _REACH = max(abs(v) for fp in FOOTPRINTS.values() for o in fp for v in o)
+  # A tile in the bitmap that hasn't been looked up yet.
+  _UNKNOWN = 2
+
+  def __init__(
+      self,
+      bounds: Tuple[int, int, int, int],
+      is_floor: Callable[[Tuple[int, int]], bool]):
+    self._bounds = bounds
+    left, top, right, bottom = bounds
+    reach = self._REACH
+    self._left = left - reach
+    self._top = top - reach
+    self._width = right - left + 2 * reach
+    self._floor = bytearray(
+        (self._UNKNOWN,)) * (self._width * (bottom - top + 2 * reach))
+    self._is_floor = is_floor
+    self._masks: Dict[Tuple[Building.Type, Facing], Tuple[int, ...]] = {}
+
+  def _mask(self, type: 'Building.Type', facing: Facing) -> Tuple[int, ...]:
+    mask = self._masks.get((type, facing))
+    if mask is None:
+      mask = tuple(ox + oy * self._width for ox, oy in FOOTPRINTS[type, facing])
+      self._masks[type, facing] = mask
+    return mask
+
+  def _index(self, pos: Tuple[int, int]) -> Optional[int]:
+    x, y = pos
+    left, top, right, bottom = self._bounds
+    if left <= x < right and top <= y < bottom:
+      return (x - self._left) + (y - self._top) * self._width
+    return None
+
+  def fits(
+      self,
+      type: 'Building.Type',
+      pos: Tuple[int, int],
+      facing: Facing) -> bool:
+    """Returns whether every foundation tile would be on the floor."""
+    i = self._index(pos)
+    if i is None:
+      return all(
+          self._is_floor(geometry.offset(pos, offset))
+          for offset in FOOTPRINTS[type, facing])
+    floor = self._floor
+    for d in self._mask(type, facing):
+      v = floor[i + d]
+      if v == self._UNKNOWN:
+        y, x = divmod(i + d, self._width)
+        v = floor[i + d] = self._is_floor((x + self._left, y + self._top))
+      if not v:
+        return False
+    return True
+
+  def first_fit(
+      self,
+      type: 'Building.Type',
+      candidates: Iterable[Tuple[Tuple[int, int], Iterable[Facing]]]
+  ) -> Optional[Tuple[Tuple[int, int], Facing]]:
+    """
+    Takes positions, each with the facings to try there in order, until one
+    fits. Returns it, or None if none of them do. If candidates is an
+    iterator, it stops right after the position that fits, so the next query
+    can pick up where this one left off.
+    """
+    for pos, facings in candidates:
+      for facing in facings:
+        if self.fits(type, pos, facing):
+          return pos, facing
+    return None
+
+  def occupy(self, tiles: Iterable[Tuple[int, int]]):
+    """
+    Marks tiles as no longer floor. Tiles outside the bitmap are looked up
+    every time, so they only need to change wherever is_floor looks.
+    """
+    height = len(self._floor) // self._width
+    for x, y in tiles:
+      x, y = x - self._left, y - self._top
+      if 0 <= x < self._width and 0 <= y < height:
+        self._floor[x + y * self._width] = 0
+
+
 def _bound_foundation(type: 'Building.Type') -> Tuple[int, int, int, int]:
   l = min(x for x, _ in type.foundation_offsets)
   r = max(x for x, _ in type.foundation_offsets) + 1
@@ -18,6 +18,8 @@ class Creature(Entity):
     SMALL_SPIDER = 'CreatureSmallSpider_C'
     BAT = 'CreatureBat_C'
 
+  __slots__ = ('id', 'type', 'sleep')
+
   @staticmethod
   def monster_type_for_biome(biome: Biome) -> 'Creature.Type':
     return MONSTER_FOR_BIOME[biome]
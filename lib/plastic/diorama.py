@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional, Tuple, Set
+from typing import Dict, FrozenSet, List, Optional, Tuple, Set
 
 import collections
 import itertools
@@ -15,12 +15,74 @@ from .scripts import Script
 from .tile import Tile
 
 
+class TileMap(dict):
+  """
+  The tiles of a diorama, in a dict that can tell which positions changed,
+  so anything copying it can tell what it needs to copy again.
+  """
+
+  def __init__(self):
+    super().__init__()
+    # Positions changed since the last call to changes, once it is called.
+    self._changed: Optional[Set[Tuple[int, int]]] = None
+
+  def __setitem__(self, key, value):
+    if self._changed is not None:
+      self._changed.add(key)
+    super().__setitem__(key, value)
+
+  def __delitem__(self, key):
+    if self._changed is not None:
+      self._changed.add(key)
+    super().__delitem__(key)
+
+  def _changed_all(self, keys):
+    if self._changed is not None:
+      self._changed.update(keys)
+
+  def update(self, *args, **kwargs):
+    other = dict(*args, **kwargs)
+    self._changed_all(other)
+    super().update(other)
+
+  def setdefault(self, key, default=None):
+    if key not in self:
+      self[key] = default
+    return self[key]
+
+  def pop(self, key, *args):
+    if key in self:
+      self._changed_all((key,))
+    return super().pop(key, *args)
+
+  def popitem(self):
+    key, value = super().popitem()
+    self._changed_all((key,))
+    return key, value
+
+  def clear(self):
+    self._changed_all(self)
+    super().clear()
+
+  def changes(self) -> Optional[FrozenSet[Tuple[int, int]]]:
+    """
+    Returns every position set or removed since the last call. The first
+    call starts keeping track and returns None.
+    """
+    result = None if self._changed is None else frozenset(self._changed)
+    self._changed = set()
+    return result
+
+
 class Diorama(): # pylint: disable=too-many-instance-attributes
   def __init__(self, context):
     self.context = context
 
     # Tile-indexed
-    self._tiles = {}
+    # Only the inspector looks at the diorama while it is being built, so
+    # only then is it worth slowing down every write to track changes.
+    self._tiles: Dict[Tuple[int, int], Tile] = (
+        TileMap() if context.logger.verbosity else {})
     self._crystals = collections.Counter()
     self._ore = collections.Counter()
     self._landslides = {}
@@ -132,15 +194,19 @@ class Diorama(): # pylint: disable=too-many-instance-attributes
     )
 
   def discover(self):
-    queue = set(self._open_cave_flags)
+    # Breadth-first, visiting each tile at most once.
+    queue = collections.deque(self._open_cave_flags)
+    visited = set(queue)
     while queue:
-      x, y = queue.pop()
+      x, y = queue.popleft()
       if not self._tiles.get((x, y), Tile.SOLID_ROCK).is_wall:
         self._discovered.add((x, y))
         for ox in (-1, 0, 1):
           for oy in (-1, 0, 1):
-            if (x + ox, y + oy) not in self._discovered:
-              queue.add((x + ox, y + oy))
+            pos = (x + ox, y + oy)
+            if pos not in visited and pos not in self._discovered:
+              visited.add(pos)
+              queue.append(pos)
 
   def serialize(self):
     return serialize(self)
@@ -2,6 +2,8 @@ from .position import Position
 
 
 class Entity():
+  __slots__ = ('position',)
+
   def __init__(self, position: Position):
     self.position = position
 
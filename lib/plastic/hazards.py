@@ -4,6 +4,8 @@ import abc
 
 
 class Hazard(abc.ABC):
+  __slots__ = ()
+
   @property
   @abc.abstractmethod
   def serial_key(self) -> Tuple[float]:
@@ -11,6 +13,8 @@ class Hazard(abc.ABC):
 
 
 class Erosion(Hazard):
+  __slots__ = ('cooldown', 'initial_delay')
+
   def __init__(self, cooldown: float, initial_delay: float):
     self.cooldown = cooldown
     self.initial_delay = initial_delay
@@ -27,6 +31,8 @@ Erosion.DEFAULT = Erosion(30, 10)
 
 
 class Landslide(Hazard):
+  __slots__ = ('cooldown',)
+
   def __init__(self, cooldown: float):
     self.cooldown = cooldown
 
@@ -27,6 +27,8 @@ class Miner(Entity):
     JOB_GEOLOGIST = 'JobGeologist'
     JOB_SAILOR = 'JobSailor'
 
+  __slots__ = ('id', 'unique', 'loadout', 'level', 'essential')
+
   def __init__(
       self,
       id: int,
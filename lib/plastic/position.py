@@ -27,6 +27,8 @@ def _coerce_facing(pos: Tuple[float, float], facing: CoercesToFacing):
 class Position(): # pylint: disable=too-many-instance-attributes
   ENTITY_SCALE = 300
 
+  __slots__ = ('tx', 'ty', 'tz', 'rp', 'ry', 'rr', 'sx', 'sy', 'sz')
+
   def __init__(self, translation, rotation, scale=(1, 1, 1)):
     self.tx, self.ty, self.tz = translation
     self.rp, self.ry, self.rr = rotation
@@ -1,39 +1,36 @@
-from typing import Iterable, List, Set, Tuple
+from typing import Iterable, List, NamedTuple, Set, Tuple, Union
 
-import re
+# A tile referred to by a script. It is written as "row,column" once the
+# offset of the final cavern is known.
+ScriptTile = NamedTuple('ScriptTile', x=int, y=int)
 
-MACRO_RE = re.compile(r'(?P<name>[x|y])@(?P<value>-?\d+)')
+# A line of script: either plain text, or text mixed with tiles.
+ScriptLine = Union[str, Tuple[Union[str, ScriptTile], ...]]
 
 
 class Script():
 
   def __init__(self):
     self._fragments: List['ScriptFragment'] = []
+    self._len = 0
     self.flags: Set[str] = set()
 
   def __len__(self):
-    return sum(len(sf) for sf in self._fragments)
+    return self._len
 
   def __str__(self):
     return '\n'.join(str(sf) for sf in self._fragments)
 
+  @property
+  def fragments(self) -> Iterable['ScriptFragment']:
+    return tuple(self._fragments)
+
   def add(self, fragment: 'ScriptFragment'):
     self._fragments.append(fragment)
+    self._len += len(fragment)
 
   def serialize(self, offset: Tuple[int, int]):
-    raw = '\n'.join(str(sf) for sf in self._fragments)
-    ox, oy = offset
-
-    def fx(v: str):
-      return ox + int(v)
-
-    def fy(v: str):
-      return oy + int(v)
-    macros = {'x': fx, 'y': fy}
-
-    def macro(m):
-      return str(macros[m.group('name')](m.group('value')))
-    return MACRO_RE.sub(macro, raw)
+    return '\n'.join(sf.serialize(offset) for sf in self._fragments)
 
   @staticmethod
   def escape_string(s: str) -> str:
@@ -41,22 +38,67 @@ class Script():
 
 
 class ScriptFragment():
+  """
+  Lines of script. Adding fragments doesn't copy their lines: the sum
+  keeps both fragments and only walks them when it is serialized.
+  """
 
-  def __init__(self, lines: Iterable[str]):
+  def __init__(self, lines: Iterable[ScriptLine]):
     self._lines = tuple(lines)
+    self._children: Tuple['ScriptFragment', ...] = ()
+    self._len = len(self._lines)
 
   def __str__(self):
-    return '\n'.join(self._lines)
+    return self.serialize((0, 0))
 
   def __len__(self):
-    return len(self._lines)
+    return self._len
 
   def __add__(self, other):
     if not other:
       return self
     if isinstance(other, ScriptFragment):
-      return ScriptFragment(self._lines + other._lines)
+      if not self:
+        return other
+      result = ScriptFragment(())
+      result._children = (self, other)
+      result._len = self._len + other._len
+      return result
     return NotImplemented
 
   def __radd__(self, other):
     return self.__add__(other)
+
+  @property
+  def lines(self) -> Iterable[ScriptLine]:
+    # pylint: disable=protected-access
+    # Walk the tree without recursing, since sums can nest deeply.
+    stack = [self]
+    while stack:
+      sf = stack.pop()
+      if sf._children:
+        stack.extend(reversed(sf._children))
+      else:
+        yield from sf._lines
+
+  @property
+  def tiles(self) -> Iterable[ScriptTile]:
+    """Every tile this fragment refers to, in order."""
+    for line in self.lines:
+      if not isinstance(line, str):
+        for part in line:
+          if not isinstance(part, str):
+            yield part
+
+  def serialize(self, offset: Tuple[int, int]) -> str:
+    ox, oy = offset
+    def h():
+      for line in self.lines:
+        if isinstance(line, str):
+          yield line
+        else:
+          yield ''.join(
+              part if isinstance(part, str)
+              else f'{part.y + oy:d},{part.x + ox:d}'
+              for part in line)
+    return '\n'.join(h())
@@ -1,20 +1,42 @@
 # pylint: skip-file
 
+import math
+
 # TODO(charredutensil):
 # This is extremely ugly and bad. Find a way to "tag" points instead.
 def slorp(rooms):
+  """Returns the pairs of rooms joined by an edge of the triangulation."""
   edges = delaunay(tuple(r.center for r in rooms))
+  # Rooms are bucketed by their center, rounded down. A point within 1 of a
+  # center in each axis must be in that bucket or one next to it.
+  buckets = {}
+  for i, r in enumerate(rooms):
+    rx, ry = r.center
+    buckets.setdefault((math.floor(rx), math.floor(ry)), []).append(i)
+
+  def near(point):
+    px, py = point
+    bx, by = math.floor(px), math.floor(py)
+    found = []
+    for ox in (-1, 0, 1):
+      for oy in (-1, 0, 1):
+        for i in buckets.get((bx + ox, by + oy), ()):
+          rx, ry = rooms[i].center
+          if abs(px - rx) < 1 and abs(py - ry) < 1:
+            found.append(i)
+    found.sort()
+    return found
+
+  # Keep the same order as checking every room against every edge.
+  edges_by_origin = [[] for _ in rooms]
+  for edge in edges:
+    for i in near(edge.org):
+      edges_by_origin[i].append(edge)
   result = []
-  for r1 in rooms:
-    rx1, ry1 = r1.center
-    for edge in edges:
-      px1, py1 = edge.org
-      px2, py2 = edge.dest
-      if abs(px1 - rx1) < 1 and abs(py1 - ry1) < 1:
-        for r2 in rooms:
-          rx2, ry2 = r2.center
-          if abs(px2 - rx2) < 1 and abs(py2 - ry2) < 1:
-            result.append((r1, r2))
+  for r1, origin_edges in zip(rooms, edges_by_origin):
+    for edge in origin_edges:
+      for i in near(edge.dest):
+        result.append((r1, rooms[i]))
   return result
 
 # Cloned from https://github.com/alexbaryzhikov/triangulation
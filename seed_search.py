@@ -0,0 +1,127 @@
+#!/usr/bin/python3
+"""
+Finds seeds by the values Context.generate draws before anything else.
+
+First build an index of a range of seeds:
+  seed_search.py index -o seeds.npz -s 0 -c 1000000
+Then query it, and feed the results to hognose:
+  seed_search.py query seeds.npz --biome ice --no-monsters --min-size 70 \\
+      | hognose.py --seeds-from - -o out/
+"""
+
+from typing import Tuple
+
+import argparse
+import concurrent.futures
+import sys
+
+import numpy as np
+
+from lib.base import Biome, Context, InitialRoll
+from lib.cli import add_jobs, add_seed_range, seed_range
+from lib.version import VERSION
+
+# Each seed is packed into one byte:
+#   bits 0-1: index of the biome in Biome
+#   bit    2: has monsters
+#   bits 3-7: size - SIZE_OFFSET
+BIOMES = tuple(Biome)
+SIZE_OFFSET = 50
+# How many seeds each worker process screens at a time.
+CHUNK_SIZE = 1 << 16
+
+
+def pack(roll: InitialRoll) -> int:
+  size = roll.size - SIZE_OFFSET
+  if size not in range(32):
+    raise ValueError(f'Size {roll.size} does not fit in the index')
+  return BIOMES.index(roll.biome) | (roll.has_monsters << 2) | (size << 3)
+
+
+def _screen(span: Tuple[int, int]) -> np.ndarray:
+  start, stop = span
+  return np.fromiter(
+      (pack(Context.prescreen(seed)) for seed in range(start, stop)),
+      dtype=np.uint8,
+      count=stop - start)
+
+
+def build_index(seeds: range, workers: int) -> np.ndarray:
+  """Returns the packed rolls for the given seeds."""
+  spans = [
+      (s, min(s + CHUNK_SIZE, seeds.stop))
+      for s in range(seeds.start, seeds.stop, CHUNK_SIZE)]
+  with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+    return np.concatenate(
+        [np.zeros(0, dtype=np.uint8)] + list(executor.map(_screen, spans)))
+
+
+def _index(parser, args):
+  seeds = seed_range(parser, args)
+  packed = build_index(seeds, args.jobs)
+  np.savez_compressed(
+      args.out, version=VERSION, start=seeds.start, packed=packed)
+
+
+def _query(_, args):
+  with np.load(args.index) as data:
+    if str(data['version']) != VERSION:
+      sys.exit(
+          f'{args.index} was built by Hognose {data["version"]}, but this is '
+          f'{VERSION}. Rebuild it.')
+    start = int(data['start'])
+    packed = np.asarray(data['packed'], dtype=np.uint8)
+  mask = np.ones(len(packed), dtype=bool)
+  if args.biome:
+    mask &= (packed & 0b11) == BIOMES.index(Biome(args.biome))
+  if args.monsters is not None:
+    mask &= ((packed >> 2) & 1) == args.monsters
+  size = (packed >> 3) + SIZE_OFFSET
+  if args.min_size is not None:
+    mask &= size >= args.min_size
+  if args.max_size is not None:
+    mask &= size <= args.max_size
+  seeds = np.flatnonzero(mask)[:args.limit] + start
+  sys.stdout.write(''.join(f'{seed:08x}\n' for seed in seeds))
+
+
+def main():
+  parser = argparse.ArgumentParser(
+    prog='seed_search',
+    description=(
+        'Indexes the biome, monsters and size of many seeds so they can be '
+        'searched without generating caverns.'))
+  subparsers = parser.add_subparsers(required=True)
+
+  index = subparsers.add_parser('index', help='Build an index of seeds.')
+  index.set_defaults(fn=_index, parser=index)
+  index.add_argument(
+    '-o', '--out',
+    required=True,
+    metavar='FILE',
+    help='Where to write the index (.npz).')
+  add_seed_range(index, 1 << 20, 'How many seeds to index.')
+  add_jobs(index)
+
+  query = subparsers.add_parser(
+      'query', help='Print seeds from an index that match the given filters.')
+  query.set_defaults(fn=_query, parser=query)
+  query.add_argument('index', metavar='FILE', help='The index to search.')
+  query.add_argument('--biome', choices=tuple(b.value for b in Biome))
+  query.add_argument(
+    '--monsters',
+    action=argparse.BooleanOptionalAction,
+    help='Only seeds with (or without) monsters.')
+  query.add_argument('--min-size', type=int)
+  query.add_argument('--max-size', type=int)
+  query.add_argument(
+    '--limit',
+    type=int,
+    help='Print at most this many seeds.')
+
+  args = parser.parse_args()
+  args.fn(args.parser, args)
+
+
+if __name__ == '__main__':
+  main()
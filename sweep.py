@@ -0,0 +1,121 @@
+#!/usr/bin/python3
+"""
+Generates caverns for every combination of context overrides and seeds, and
+prints metrics about each one as a line of JSON.
+
+For example, to see how weave_ratio and crystal_richness affect caverns:
+  sweep.py -s 0 -c 50 --grid weave_ratio 0.1 0.2 0.3 \\
+      --grid crystal_richness 0.5,1,1 1,1,1 > sweep.jsonl
+Results are printed as soon as each cavern finishes, so they are not in
+order. Every line has the seed and overrides used to generate it.
+"""
+
+from typing import Any, Dict, List, Tuple
+
+import argparse
+import concurrent.futures
+import itertools
+import json
+import sys
+import time
+
+from lib import Cavern
+from lib.base import Context, GenerationError, QuietLogger
+from lib.cache import summarize
+from lib.cli import add_jobs, add_overrides, add_seed_range, seed_range
+from lib.version import VERSION
+
+# A seed and the overrides to generate it with, as given on the command line.
+_Run = Tuple[int, Tuple[Tuple[str, str], ...]]
+
+
+def run(job: _Run) -> Dict[str, Any]:
+  """Generates one cavern and returns its metrics."""
+  seed, assignments = job
+  result: Dict[str, Any] = {
+      'seed': f'{seed:08x}',
+      'overrides': dict(assignments),
+  }
+  start_time = time.perf_counter()
+  cavern = Cavern(
+      Context.generate(
+          QuietLogger(), seed,
+          **Context.coerce_overrides(dict(assignments))),
+      lean=True)
+  try:
+    cavern.generate()
+  except GenerationError as e:
+    result['ok'] = False
+    result['stage'] = cavern.stage
+    result['error'] = repr(e.__cause__)
+  else:
+    result['ok'] = True
+    result.update(summarize(cavern).stats)
+  result['ms'] = round((time.perf_counter() - start_time) * 1000)
+  return result
+
+
+def grid(
+    fixed: List[str],
+    axes: List[List[str]]) -> List[Tuple[Tuple[str, str], ...]]:
+  """
+  Returns every combination of values in axes, each with the fixed
+  overrides. Each axis is a key followed by the values to try.
+  """
+  base = tuple(tuple(a.partition('=')[::2]) for a in fixed)
+  return [
+      base + tuple(zip((axis[0] for axis in axes), values))
+      for values in itertools.product(*(axis[1:] for axis in axes))]
+
+
+def main():
+  parser = argparse.ArgumentParser(
+    prog='sweep',
+    description=(
+        'Generates caverns across a grid of context overrides and seeds, '
+        'printing metrics for each as JSON lines.'))
+  add_seed_range(
+      parser, 10,
+      'How many seeds to generate for each combination of overrides.')
+  add_overrides(parser, 'Override a value for every run. Can be repeated.')
+  parser.add_argument(
+    '--grid',
+    action='append',
+    default=[],
+    nargs='+',
+    metavar=('KEY', 'VALUE'),
+    help=(
+        'Try each VALUE for KEY. Can be repeated to sweep over every '
+        'combination of several keys.'))
+  add_jobs(parser)
+
+  args = parser.parse_args()
+  for axis in args.grid:
+    if len(axis) < 2:
+      parser.error(f'--grid {axis[0]} needs at least one value.')
+  seeds = seed_range(parser, args)
+  combos = grid(args.set, args.grid)
+  # Check every combination up front rather than failing in a worker.
+  try:
+    Context.parse_overrides(args.set)
+    for assignments in combos:
+      Context.coerce_overrides(dict(assignments))
+  except ValueError as e:
+    parser.error(str(e))
+  jobs = [
+      (seed, assignments)
+      for assignments in combos
+      for seed in seeds]
+
+  print(
+      f'Hognose {VERSION}: {len(jobs)} caverns '
+      f'({len(combos)} combinations x {args.count} seeds)',
+      file=sys.stderr)
+  with concurrent.futures.ProcessPoolExecutor(args.jobs) as executor:
+    futures = [executor.submit(run, job) for job in jobs]
+    for future in concurrent.futures.as_completed(futures):
+      print(json.dumps(future.result()), flush=True)
+
+
+if __name__ == '__main__':
+  main()
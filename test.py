@@ -6,13 +6,27 @@ import unittest
 
 from tests import *  # pylint: disable=wildcard-import, unused-wildcard-import
 from tests.base import SerializedCavernTest
+from tests.corpus import check_corpus
 
 
 def main():
   parser = argparse.ArgumentParser(
     prog='test',
     description='Run and update tests.',
-    usage='test [-u]'
+    usage='test [-u] [--corpus]'
+  )
+  parser.add_argument(
+    '--corpus',
+    action=argparse.BooleanOptionalAction,
+    help=(
+        'Instead of the unit tests, check that every seed in the regression '
+        'corpus generates the same cavern it did before. With -u, rebuild '
+        'the corpus instead.')
+  )
+  parser.add_argument(
+    '--corpus-count',
+    type=int,
+    help='Only use the first N seeds of the corpus.'
   )
   parser.add_argument(
     '-d', '--draw-generation',
@@ -25,7 +39,16 @@ def main():
     help='Update test resources to match results.'
   )
 
+  parser.add_argument(
+    '-j', '--jobs',
+    type=int,
+    help='How many processes to use for --corpus.'
+  )
+
   args, unknown = parser.parse_known_args()
+  if args.corpus:
+    sys.exit(check_corpus(
+        bool(args.update_resources), args.corpus_count, args.jobs))
   if args.update_resources:
     SerializedCavernTest.update_resources = True
 
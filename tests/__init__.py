@@ -1,3 +1,12 @@
 from .base import SerializedCavernTest
+from .building import TestBuildingPlacer
+from .cache import TestCavernCache
+from .cavern import TestCavern
+from .context import TestContext
+from .corpus import TestCorpus
+from .inspector import TestDioramaSnapshot, TestFrameHistory
+from .logger import TestLogger
 from .lore import TestLore
+from .planners import TestChokepoints, TestConquest, TestPlacement
+from .pseudorandom import TestDiceBox, TestRng, TestRngProfile
 from .serialize import TestSerialize
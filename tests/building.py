@@ -0,0 +1,39 @@
+import itertools
+import unittest
+
+from lib.plastic import Building, BuildingPlacer, Facing
+
+
+class TestBuildingPlacer(unittest.TestCase):
+  """Tests for finding where buildings fit."""
+  # pylint: disable=missing-function-docstring,invalid-name
+
+  def setUp(self):
+    # A 3x3 room with one more floor tile sticking out of its east side.
+    self.floor = {(x, y) for y in range(3) for x in range(3)} | {(3, 1)}
+    self.placer = BuildingPlacer((0, 0, 3, 3), lambda pos: pos in self.floor)
+
+  def test_fits_agreesWithFoundationTiles(self):
+    for type, facing, x, y in itertools.product(
+        Building.Type, Facing, range(3), range(3)):
+      b = Building.at_tile(type, (x, y), facing)
+      self.assertEqual(
+          self.placer.fits(type, (x, y), facing),
+          all(pos in self.floor for pos in b.foundation_tiles),
+          f'{type} at {x},{y} facing {facing}')
+
+  def test_firstFit_resumesAfterFit(self):
+    candidates = iter((
+        ((1, 0), (Facing.NORTH, Facing.SOUTH)),
+        ((1, 1), (Facing.NORTH,)),
+        ((2, 2), (Facing.NORTH,)),
+        ((0, 2), (Facing.SOUTH,)),
+    ))
+    ts = Building.Type.TOOL_STORE
+    self.assertEqual(
+        self.placer.first_fit(ts, candidates), ((1, 0), Facing.SOUTH))
+    self.placer.occupy(
+        Building.at_tile(ts, (1, 0), Facing.SOUTH).foundation_tiles)
+    self.assertEqual(
+        self.placer.first_fit(ts, candidates), ((2, 2), Facing.NORTH))
+    self.assertIsNone(self.placer.first_fit(ts, candidates))
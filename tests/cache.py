@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+
+from lib.cache import CavernCache
+
+
+class TestCavernCache(unittest.TestCase):
+  """Tests for the on-disk cavern cache."""
+  # pylint: disable=missing-function-docstring,invalid-name
+
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory() # pylint: disable=consider-using-with
+    self.addCleanup(self.tmp.cleanup)
+
+  def test_generate_loadsSecondTimeFromCache(self):
+    cache = CavernCache(self.tmp.name, 1 << 30)
+    self.assertIsNone(cache.get(0, {}))
+    generated = cache.generate(0)
+    self.assertEqual(cache.get(0, {}), generated)
+    self.assertIsNone(cache.get(0, {'has_monsters': False}))
+
+  def test_evict_removesLeastRecentlyUsed(self):
+    cache = CavernCache(self.tmp.name, 1 << 30)
+    cache.generate(0)
+    cache.generate(1)
+    key0 = cache.key(0, {})
+    os.utime(os.path.join(self.tmp.name, f'{key0}.json'), (0, 0))
+    size = sum(
+        os.path.getsize(os.path.join(self.tmp.name, f))
+        for f in os.listdir(self.tmp.name))
+    cache.max_bytes = size - 1
+    cache.evict()
+    self.assertIsNone(cache.get(0, {}))
+    self.assertIsNotNone(cache.get(1, {}))
+
+  def test_evict_removesIncompleteEntries(self):
+    cache = CavernCache(self.tmp.name, 1 << 30)
+    def write(name, mtime=None):
+      path = os.path.join(self.tmp.name, name)
+      with open(path, 'w', encoding='utf-8') as f:
+        f.write('x' * 100)
+      if mtime is not None:
+        os.utime(path, (mtime, mtime))
+      return path
+    orphan = write('a.json')
+    stale_tmp = write('b.tmp', mtime=0)
+    stale_dat = write('c.dat', mtime=0)
+    fresh_tmp = write('d.tmp')
+    cache.evict()
+    self.assertFalse(os.path.exists(orphan))
+    self.assertFalse(os.path.exists(stale_tmp))
+    self.assertFalse(os.path.exists(stale_dat))
+    self.assertTrue(os.path.exists(fresh_tmp))
+
+  def test_evict_countsIncompleteEntries(self):
+    cache = CavernCache(self.tmp.name, 1 << 30)
+    cache.generate(0)
+    size = sum(
+        os.path.getsize(os.path.join(self.tmp.name, f))
+        for f in os.listdir(self.tmp.name))
+    with open(os.path.join(self.tmp.name, 'e.tmp'), 'w',
+              encoding='utf-8') as f:
+      f.write('x' * 100)
+    cache.max_bytes = size + 99
+    cache.evict()
+    self.assertIsNone(cache.get(0, {}))
@@ -0,0 +1,174 @@
+import gc
+import types
+import unittest
+
+from lib import Cavern
+from lib.base import Context, Curve, Logger
+from lib.outlines import Baseplate, Path
+
+
+def _reachable(root, kinds):
+  """Counts the objects of each kind that can be reached from root."""
+  counts = {kind: 0 for kind in kinds}
+  seen = {id(root)}
+  queue = [root]
+  while queue:
+    obj = queue.pop()
+    for kind in kinds:
+      if isinstance(obj, kind):
+        counts[kind] += 1
+    for ref in gc.get_referents(obj):
+      # Classes and modules lead to everything else in the process.
+      if (id(ref) not in seen
+          and not isinstance(ref, (type, types.ModuleType))):
+        seen.add(id(ref))
+        queue.append(ref)
+  return counts
+
+
+class TestCavern(unittest.TestCase):
+  """Tests for stopping generation early and resuming it."""
+  # pylint: disable=missing-function-docstring,invalid-name
+
+  def setUp(self):
+    self.cavern = Cavern(Context.generate(Logger(), 0))
+
+  def test_generate_stopsAfterUntil(self):
+    self.assertTrue(self.cavern.generate(until='conquest'))
+    self.assertEqual(self.cavern.stage, 'conquest')
+    self.assertTrue(self.cavern.conquest.spawn)
+    self.assertFalse(self.cavern.diorama.tiles)
+    self.assertFalse(self.cavern.is_done())
+
+  def test_generate_stopsWhenPredicateRejects(self):
+    seen = []
+    def reject(cavern):
+      seen.append(cavern.stage)
+      return False
+    self.assertFalse(self.cavern.generate(predicates={'flood': reject}))
+    self.assertEqual(seen, ['flood'])
+    self.assertEqual(self.cavern.stage, 'flood')
+    self.assertFalse(self.cavern.is_done())
+
+  def test_generate_runsToEndWhenPredicateAccepts(self):
+    self.assertTrue(
+        self.cavern.generate(predicates={'conquest': lambda _: True}))
+    self.assertTrue(self.cavern.is_done())
+
+  def test_generate_rejectsUnknownStage(self):
+    with self.assertRaises(ValueError):
+      self.cavern.generate(until='nope')
+
+  def test_generate_resumesAfterUntil(self):
+    self.cavern.generate(until='flood')
+    self.assertTrue(self.cavern.generate())
+    full = Cavern(Context.generate(Logger(), 0))
+    full.generate()
+    self.assertEqual(self.cavern.serialized, full.serialized)
+
+  def test_generate_largeCavern(self):
+    cavern = Cavern(Context.generate(Logger(), 0, size=150))
+    self.assertTrue(cavern.generate())
+    _, _, width, height = cavern.diorama.bounds
+    self.assertGreaterEqual(min(width, height), 150)
+
+  def test_generate_leanReleasesIntermediates(self):
+    lean = Cavern(
+        Context.generate(Logger(), 0), lean=True, keep_diorama=False)
+    self.assertTrue(lean.generate())
+    self.cavern.generate()
+    self.assertEqual(lean.serialized, self.cavern.serialized)
+    self.assertFalse(lean.baseplates)
+    self.assertIsNone(lean.conquest)
+    self.assertIsNone(lean.diorama)
+    # Planners' streams are released, even though bubbles with the same ids
+    # keep theirs, as do the context, conquest and lore with negative ids.
+    kept = set(lean.context.rng)
+    streams = set(self.cavern.context.rng)
+    planner_ids = set(p.id for p in self.cavern.planners)
+    self.assertFalse(set(
+        (kind, id) for kind, id in kept
+        if id in planner_ids and kind != 'bubble'))
+    self.assertTrue(planner_ids & set(id for kind, id in kept))
+    others = set((kind, id) for kind, id in streams if id < 0)
+    self.assertIn(('lore', -1), others)
+    self.assertLessEqual(others, kept)
+
+  def test_generate_leanReleasesGeometry(self):
+    # After negotiate, only the baseplates planners were given are kept.
+    # They go with the planners after script.
+    lean = Cavern(Context.generate(Logger(), 0), lean=True)
+    kinds = (Baseplate, Path)
+    lean.generate(until='negotiate')
+    self.cavern.generate(until='negotiate')
+    full = _reachable(self.cavern, kinds)
+    kept = _reachable(lean, kinds)
+    self.assertGreater(kept[Baseplate], 0)
+    self.assertLess(kept[Baseplate], full[Baseplate])
+    self.assertGreater(full[Path], 0)
+    self.assertEqual(kept[Path], 0)
+    lean.generate(until='script')
+    self.assertEqual(_reachable(lean, kinds), {Baseplate: 0, Path: 0})
+
+  def test_generate_leanRunsPredicatesBeforeReleasing(self):
+    lean = Cavern(Context.generate(Logger(), 0), lean=True)
+    seen = []
+    def predicate(cavern):
+      seen.append(len(cavern.conquest.planners))
+      return True
+    self.assertTrue(lean.generate(predicates={'script': predicate}))
+    self.assertTrue(seen[0])
+    self.assertIsNone(lean.conquest)
+
+  def test_generate_drawsSameRandomValues(self):
+    # If this changes, some stream drew different values than it used to,
+    # or the platform's math library rounds beta draws differently.
+    profile = self.cavern.context.rng.profile()
+    self.assertTrue(self.cavern.generate())
+    self.assertEqual(profile.fingerprint(), '8a32c8df218472de')
+
+  def test_restore_matchesUninterruptedRun(self):
+    self.cavern.generate(until='conquest')
+    restored = Cavern.restore(self.cavern.checkpoint(), Logger())
+    self.assertEqual(restored.stage, 'conquest')
+    restored.generate()
+    full = Cavern(Context.generate(Logger(), 0))
+    full.generate()
+    self.assertEqual(restored.serialized, full.serialized)
+
+  def test_restore_overridesLaterValues(self):
+    self.cavern.generate(until='conquest')
+    restored = Cavern.restore(
+        self.cavern.checkpoint(), Logger(), crystal_goal_ratio=0.5)
+    self.assertEqual(restored.context.crystal_goal_ratio, 0.5)
+    self.assertTrue(restored.generate())
+
+  def test_restore_rejectsOverridesAlreadyUsed(self):
+    self.cavern.generate(until='conquest')
+    with self.assertRaises(ValueError):
+      Cavern.restore(self.cavern.checkpoint(), Logger(), weave_ratio=0.5)
+
+  def test_restore_overridesRichnessOnlyBeforeConquest(self):
+    # Richness decides how many crystals each planner expects, which
+    # conquest uses to pick planners, so sweeping it needs a checkpoint from
+    # flood or earlier.
+    self.cavern.generate(until='flood')
+    restored = Cavern.restore(
+        self.cavern.checkpoint(), Logger(),
+        crystal_richness=Curve(2.0, 2.0, 2.0))
+    self.assertTrue(restored.generate())
+    self.cavern.generate(until='conquest')
+    with self.assertRaises(ValueError):
+      Cavern.restore(
+          self.cavern.checkpoint(), Logger(),
+          crystal_richness=Curve(2.0, 2.0, 2.0))
+    self.cavern.generate()
+    self.assertGreater(
+        restored.diorama.crystal_yield, self.cavern.diorama.crystal_yield)
+
+  def test_restore_overridesPlacementVersionAfterConquest(self):
+    self.cavern.generate(until='conquest')
+    restored = Cavern.restore(
+        self.cavern.checkpoint(), Logger(), placement_version=2)
+    self.assertEqual(restored.context.placement_version, 2)
+    self.assertTrue(restored.generate())
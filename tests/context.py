@@ -0,0 +1,47 @@
+import unittest
+
+from lib.base import Biome, Context, Curve, Logger
+
+
+class TestContext(unittest.TestCase):
+  """Tests for building contexts from seeds."""
+  # pylint: disable=missing-function-docstring,invalid-name
+
+  def test_prescreen_matchesGenerate(self):
+    for seed in (0, 1, 0x1234, 0x7fff_ffff):
+      context = Context.generate(Logger(), seed)
+      self.assertEqual(
+          Context.prescreen(seed),
+          (context.biome, context.has_monsters, context.size))
+
+  def test_parseOverrides_coercesToFieldTypes(self):
+    self.assertEqual(
+        Context.parse_overrides([
+            'biome=ice', 'has_monsters=no', 'special_baseplate_count=12',
+            'weave_ratio=0.3', 'water_coverage=0.1,0.2',
+            'crystal_richness=0.5,1,1']),
+        {
+            'biome': Biome.ICE,
+            'has_monsters': False,
+            'special_baseplate_count': 12,
+            'weave_ratio': 0.3,
+            'water_coverage': (0.1, 0.2),
+            'crystal_richness': Curve(0.5, 1, 1),
+        })
+
+  def test_parseOverrides_rejectsBadInput(self):
+    for bad in ('seed=1', 'nope=1', 'biome=mud', 'water_coverage=0.1', 'x'):
+      with self.assertRaises(ValueError, msg=bad):
+        Context.parse_overrides([bad])
+
+  def test_generate_overridesBiome(self):
+    context = Context.generate(Logger(), 0, biome=Biome.LAVA)
+    self.assertEqual(context.biome, Biome.LAVA)
+    self.assertEqual(context.lava_coverage, (0.10, 0.50))
+
+  def test_generate_scalesSpecialBaseplatesForLargeCaverns(self):
+    normal = Context.generate(Logger(), 0)
+    large = Context.generate(Logger(), 0, size=160)
+    self.assertEqual(large.size, 160)
+    self.assertEqual(
+        large.special_baseplate_count, normal.special_baseplate_count * 4)
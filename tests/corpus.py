@@ -0,0 +1,180 @@
+"""
+A regression corpus of generated caverns.
+
+The manifest records a hash of each section of the serialized cavern for a
+range of seeds. Checking the corpus regenerates every seed and compares the
+hashes, so a change that is meant to keep output identical (such as an
+optimization) can be checked against thousands of caverns at once:
+  test.py --corpus
+After a change that is meant to alter output, rebuild the manifest:
+  test.py --corpus -u
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import concurrent.futures
+import hashlib
+import os
+import os.path
+import re
+import sys
+import unittest
+
+from lib import Cavern
+from lib.base import Context, GenerationError, QuietLogger
+from lib.version import VERSION
+from tests.base import RESOURCE_DIR
+
+MANIFEST_FILE = os.path.join(RESOURCE_DIR, 'corpus.txt')
+DEFAULT_COUNT = 1000
+# Seeds checked by the regular test suite. The full corpus is too slow.
+QUICK_COUNT = 10
+# Hex digits kept from each section's hash. This only needs to catch changes,
+# not resist collisions, so it's kept short to keep the manifest small.
+HASH_LENGTH = 8
+
+_SECTION_RE = re.compile(
+    r'^(?P<name>[a-z]+){\n(?P<body>.*?)^}$', re.DOTALL | re.MULTILINE)
+# The comments section has the version and the time it was generated.
+_IGNORED_SECTIONS = frozenset(('comments',))
+
+# Section names and hashes for a seed, or None if it failed to generate.
+Hashes = Optional[Tuple[Tuple[str, str], ...]]
+
+
+def hash_sections(serialized: str) -> Tuple[Tuple[str, str], ...]:
+  """Returns a short hash of each section of a serialized cavern."""
+  def h():
+    for m in _SECTION_RE.finditer(serialized):
+      if m.group('name') not in _IGNORED_SECTIONS:
+        digest = hashlib.sha256(m.group('body').encode('utf-8')).hexdigest()
+        yield m.group('name'), digest[:HASH_LENGTH]
+  return tuple(h())
+
+
+def generate(seed: int) -> Tuple[int, Hashes]:
+  cavern = Cavern(
+      Context.generate(QuietLogger(), seed), lean=True, keep_diorama=False)
+  try:
+    cavern.generate()
+  except GenerationError:
+    return seed, None
+  return seed, hash_sections(cavern.serialized)
+
+
+def generate_all(
+    seeds: Iterable[int], jobs: Optional[int] = None) -> Dict[int, Hashes]:
+  """Generates every seed across a pool of processes."""
+  seeds = list(seeds)
+  if jobs == 1:
+    return dict(generate(seed) for seed in seeds)
+  with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+    return dict(executor.map(generate, seeds, chunksize=16))
+
+
+def read_manifest(filename: str = MANIFEST_FILE) -> Dict[int, Hashes]:
+  """
+  Reads a manifest. After the header, which names the sections, each line is
+  a seed in hexadecimal followed by either FAIL or each section's hash.
+  """
+  manifest = {}
+  sections: Tuple[str, ...] = ()
+  with open(filename, encoding='utf-8') as f:
+    for line in f:
+      if not line.strip() or line.startswith('#'):
+        continue
+      first, *rest = line.split()
+      if first == 'sections':
+        sections = tuple(rest)
+      elif rest == ['FAIL']:
+        manifest[int(first, 16)] = None
+      else:
+        manifest[int(first, 16)] = tuple(zip(sections, rest))
+  return manifest
+
+
+def write_manifest(
+    hashes: Dict[int, Hashes], filename: str = MANIFEST_FILE):
+  # Every cavern has the same sections, in the same order.
+  sections = next(
+      (tuple(name for name, _ in h) for h in hashes.values() if h), ())
+  with open(filename, 'w', encoding='utf-8') as f:
+    f.write(f'# Hognose {VERSION} regression corpus. See tests/corpus.py.\n')
+    f.write(f'sections {" ".join(sections)}\n')
+    for seed, h in sorted(hashes.items()):
+      if h is None:
+        f.write(f'{seed:08x} FAIL\n')
+      else:
+        assert tuple(name for name, _ in h) == sections
+        f.write(f'{seed:08x} {" ".join(digest for _, digest in h)}\n')
+
+
+def describe_difference(expected: Hashes, actual: Hashes) -> Optional[str]:
+  """Explains how two sets of hashes differ, or returns None if they match."""
+  if expected == actual:
+    return None
+  if expected is None:
+    return 'used to fail, but now generates'
+  if actual is None:
+    return 'failed to generate'
+  e = dict(expected)
+  a = dict(actual)
+  changed = [
+      name for name in dict.fromkeys(tuple(e) + tuple(a))
+      if e.get(name) != a.get(name)]
+  others = f' (also {", ".join(changed[1:])})' if len(changed) > 1 else ''
+  return f'first difference in {changed[0]}{others}'
+
+
+def compare(
+    expected: Dict[int, Hashes],
+    actual: Dict[int, Hashes]) -> List[str]:
+  """Returns a message for every seed that doesn't match."""
+  def h():
+    for seed in sorted(expected):
+      diff = describe_difference(expected[seed], actual.get(seed))
+      if diff:
+        yield f'{seed:08x}: {diff}'
+  return list(h())
+
+
+def check_corpus(update: bool, count: Optional[int], jobs: Optional[int]):
+  """Runs the whole corpus. Returns the process exit code."""
+  if update:
+    seeds = range(count or DEFAULT_COUNT)
+    print(f'Generating {len(seeds)} caverns...', file=sys.stderr)
+    write_manifest(generate_all(seeds, jobs))
+    print(f'Wrote {MANIFEST_FILE}', file=sys.stderr)
+    return 0
+  expected = read_manifest()
+  if count is not None:
+    expected = {seed: expected[seed] for seed in sorted(expected)[:count]}
+  print(f'Checking {len(expected)} caverns...', file=sys.stderr)
+  failures = compare(expected, generate_all(expected, jobs))
+  for message in failures:
+    print(message)
+  print(
+      f'{len(expected) - len(failures)} of {len(expected)} caverns match.',
+      file=sys.stderr)
+  return 1 if failures else 0
+
+
+class TestCorpus(unittest.TestCase):
+  """Checks the first few seeds of the corpus."""
+  # pylint: disable=missing-function-docstring,invalid-name
+
+  def test_corpus_quick(self):
+    expected = read_manifest()
+    for seed in sorted(expected)[:QUICK_COUNT]:
+      _, actual = generate(seed)
+      self.assertIsNone(
+          describe_difference(expected[seed], actual),
+          f'Seed {seed:08x} no longer matches the corpus. If this is '
+          'intended, run test.py --corpus -u')
+
+  def test_describeDifference_namesFirstSection(self):
+    expected = (('info', 'a'), ('tiles', 'b'), ('script', 'c'))
+    actual = (('info', 'a'), ('tiles', 'x'), ('script', 'y'))
+    self.assertEqual(
+        describe_difference(expected, actual),
+        'first difference in tiles (also script)')
@@ -0,0 +1,99 @@
+import unittest
+
+from inspector.frames import DioramaSnapshot, StateFrame
+from inspector.history import DioramaDelta, FrameHistory, KEYFRAME_INTERVAL
+from lib import Cavern
+from lib.base import Context, Logger
+from lib.plastic import Diorama, Tile
+
+
+class _WatchingLogger(Logger):
+  verbosity = 1
+
+
+class _RecordingLogger(Logger):
+  """Keeps frames in a history, along with a full copy of each diorama."""
+  verbosity = 3
+
+  def __init__(self, budget):
+    self.history = FrameHistory(budget)
+    self.copies = []
+    self._last = None
+
+  def log_state(self, cavern, verbosity, details):
+    self._last = StateFrame(cavern, details, (), self._last)
+    self.history.append(self._last)
+    self.copies.append(
+        (dict(cavern.diorama.tiles), dict(cavern.diorama.crystals)))
+
+
+class TestDioramaSnapshot(unittest.TestCase):
+  """Tests for sharing what hasn't changed between snapshots."""
+  # pylint: disable=missing-function-docstring,invalid-name
+
+  def setUp(self):
+    self.diorama = Diorama(Context.generate(_WatchingLogger(), 0))
+    self.diorama.tiles[0, 0] = Tile.FLOOR
+    self.first = DioramaSnapshot(self.diorama, None)
+
+  def test_snapshot_sharesUnchangedTiles(self):
+    self.diorama.crystals[0, 0] += 1
+    second = DioramaSnapshot(self.diorama, self.first)
+    self.assertIs(second.tiles, self.first.tiles)
+    self.assertEqual(second.tile_changes, frozenset())
+
+  def test_snapshot_knowsChangedTiles(self):
+    self.diorama.tiles[0, 0] = Tile.DIRT
+    self.diorama.tiles[1, 0] = Tile.FLOOR
+    self.diorama.tiles[1, 0] = Tile.WATER
+    second = DioramaSnapshot(self.diorama, self.first)
+    self.assertEqual(second.tile_changes, frozenset(((0, 0), (1, 0))))
+    self.assertEqual(self.first.tiles, {(0, 0): Tile.FLOOR})
+    self.assertEqual(
+        DioramaDelta.between(self.first, second).dicts['tiles'],
+        ({(0, 0): Tile.DIRT, (1, 0): Tile.WATER}, ()))
+
+
+class TestFrameHistory(unittest.TestCase):
+  """Tests for rebuilding frames from keyframes and deltas."""
+  # pylint: disable=missing-function-docstring,invalid-name
+
+  def record(self, budget):
+    logger = _RecordingLogger(budget)
+    Cavern(Context.generate(logger, 1)).generate()
+    return logger
+
+  def assertRebuildsEveryFrame(self, logger, order):
+    history = logger.history
+    for i in order:
+      history.seek(i - history.index)
+      diorama = history.current().diorama
+      tiles, crystals = logger.copies[history.key()]
+      self.assertEqual(diorama.tiles, tiles, f'frame {history.key()}')
+      self.assertEqual(diorama.crystals, crystals, f'frame {history.key()}')
+
+  def test_current_rebuildsEveryFrame(self):
+    logger = self.record(1 << 30)
+    history = logger.history
+    self.assertEqual(len(history), len(logger.copies))
+    self.assertGreater(len(history), KEYFRAME_INTERVAL * 2)
+    # Forward reuses the frame before, backward replays from the keyframe.
+    self.assertRebuildsEveryFrame(logger, range(len(history)))
+    self.assertRebuildsEveryFrame(logger, reversed(range(len(history))))
+
+  def test_current_rebuildsFramesAfterEviction(self):
+    # About three quarters of what seed 1 needs to keep every frame.
+    logger = self.record(450_000)
+    history = logger.history
+    keys = []
+    for i in range(len(history)):
+      history.seek(i - history.index)
+      keys.append(history.key())
+    self.assertEqual(keys, sorted(set(keys)))
+    # The newest frame is kept, the oldest are gone, and some in between
+    # were thinned out.
+    self.assertEqual(keys[-1], len(logger.copies) - 1)
+    self.assertNotEqual(keys[0], 0)
+    self.assertLess(len(keys), keys[-1] - keys[0] + 1)
+    self.assertRebuildsEveryFrame(logger, range(len(history)))
+    self.assertRebuildsEveryFrame(logger, reversed(range(len(history))))
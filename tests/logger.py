@@ -0,0 +1,59 @@
+import io
+import json
+import tracemalloc
+import unittest
+
+from lib import Cavern, STAGES
+from lib.base import ChromeTraceLogger, Context, Logger, MemoryLogger
+
+
+class _CountingLogger(Logger):
+
+  def __init__(self, verbosity):
+    self.verbosity = verbosity
+    self.states = []
+
+  def log_state(self, cavern, verbosity, details):
+    self.states.append(verbosity)
+
+
+class TestLogger(unittest.TestCase):
+  """Tests for the logging and tracing hooks Cavern calls."""
+  # pylint: disable=missing-function-docstring,invalid-name
+
+  def test_logState_onlyCalledUpToVerbosity(self):
+    logger = _CountingLogger(2)
+    Cavern(Context.generate(logger, 0)).generate()
+    self.assertTrue(logger.states)
+    self.assertLessEqual(max(logger.states), 2)
+
+  def test_chromeTrace_hasBalancedStageSpans(self):
+    logger = ChromeTraceLogger(Logger())
+    Cavern(Context.generate(logger, 0)).generate()
+    f = io.StringIO()
+    logger.write(f)
+    events = json.loads(f.getvalue())['traceEvents']
+    stack = []
+    stages = []
+    for event in events:
+      if event['ph'] == 'B':
+        if not stack:
+          stages.append(event['name'])
+        stack.append(event['name'])
+      elif event['ph'] == 'E':
+        self.assertEqual(stack.pop(), event['name'])
+    self.assertEqual(stack, [])
+    self.assertEqual(stages[0], 'partition')
+    self.assertEqual(stages[-1], 'serialize')
+
+  def test_memory_measuresEachStage(self):
+    if not tracemalloc.is_tracing():
+      self.addCleanup(tracemalloc.stop)
+    logger = MemoryLogger(Logger())
+    Cavern(Context.generate(logger, 0)).generate()
+    self.assertEqual(tuple(sm.stage for sm in logger.stages), STAGES)
+    for sm in logger.stages:
+      self.assertLessEqual(sm.allocated, sm.peak)
+    rough = next(sm for sm in logger.stages if sm.stage == 'rough')
+    self.assertGreater(rough.allocated, 0)
+    self.assertTrue(rough.top)
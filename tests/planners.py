@@ -0,0 +1,128 @@
+import unittest
+
+import numpy as np
+
+from lib import Cavern
+from lib.base import Context, Logger
+from lib.base.pseudorandom import DiceBox
+from lib.planners.base import SomaticPlanner, TileArrays, deposit
+from lib.planners.caves.base import BaseCavePlanner
+from lib.planners.caves.established_hq import EstablishedHQCavePlanner
+from lib.planners.caves.monster_spawners import chokepoints
+from lib.planners.conquest import Neighborhood
+from lib.plastic import Tile
+
+
+class TestChokepoints(unittest.TestCase):
+  """Tests for picking the tiles monster spawners trigger on."""
+  # pylint: disable=missing-function-docstring,invalid-name
+
+  def setUp(self):
+    # A single tile surrounded by dirt, all inside solid rock.
+    self.inside = {(0, 0)}
+    self.ring = [
+        (x, y) for y in range(-1, 2) for x in range(-1, 2) if x or y]
+    self.tiles = {pos: Tile.DIRT for pos in self.ring}
+    self.tiles[0, 0] = Tile.FLOOR
+
+  def test_chokepoints_keepsOnlyTheWayIn(self):
+    self.tiles[-2, 0] = Tile.FLOOR
+    self.assertEqual(
+        chokepoints(self.ring, self.inside, self.tiles), [(-1, 0)])
+
+  def test_chokepoints_cutsCloseToOutside(self):
+    # The only way in goes around a corner of the ring.
+    self.tiles[-2, -1] = Tile.FLOOR
+    self.assertEqual(
+        chokepoints(self.ring, self.inside, self.tiles), [(-1, -1)])
+
+  def test_chokepoints_keepsRingWhenItLeaks(self):
+    ring = [pos for pos in self.ring if pos != (1, 0)]
+    self.tiles[1, 0] = Tile.FLOOR
+    self.tiles[2, 0] = Tile.FLOOR
+    self.assertEqual(chokepoints(ring, self.inside, self.tiles), ring)
+
+  def test_chokepoints_pinsTriggerCountOnKnownCavern(self):
+    # Seed 2 has monsters. If this changes, scripts change too, so the
+    # revision needs a bump and the corpus needs rebuilding.
+    cavern = Cavern(Context.generate(Logger(), 2))
+    cavern.generate()
+    spawners = [
+        p.monster_spawner for p in cavern.planners
+        if getattr(p, 'monster_spawner', None)]
+    self.assertEqual(len(spawners), 17)
+    self.assertEqual(
+        sum(len(s.script_info.trigger_tiles) for s in spawners), 178)
+    self.assertEqual(cavern.serialized.count('when(enter:'), 178)
+
+
+class TestConquest(unittest.TestCase):
+  """Tests for what conquest keeps track of for bidders."""
+  # pylint: disable=missing-function-docstring,invalid-name
+
+  def setUp(self):
+    self.cavern = Cavern(Context.generate(Logger(), 0))
+    self.cavern.generate(until='conquest')
+    self.conquest = self.cavern.conquest
+
+  def test_neighborhood_matchesIntersecting(self):
+    for planner in self.conquest.planners:
+      fluids = [p.fluid_type for p in self.conquest.intersecting(planner)]
+      self.assertEqual(
+          self.conquest.neighborhood(planner),
+          Neighborhood(
+              len(fluids),
+              fluids.count(None),
+              fluids.count(Tile.WATER),
+              fluids.count(Tile.LAVA)))
+
+  def test_count_matchesPlanners(self):
+    for kind in (SomaticPlanner, BaseCavePlanner, EstablishedHQCavePlanner):
+      self.assertEqual(
+          self.conquest.count(kind),
+          sum(1 for p in self.conquest.planners if isinstance(p, kind)))
+
+
+class TestPlacement(unittest.TestCase):
+  """Tests for placing things in bulk."""
+  # pylint: disable=missing-function-docstring,invalid-name
+
+  def test_deposit_matchesOneAtATime(self):
+    positions = ((0, 0), (1, 0), (2, 0), (3, 0))
+    hits = np.array((1, 4, 0, 9))
+    existing = {(0, 0): 3, (3, 0): 1}
+    tiles = {pos: Tile.DIRT for pos in positions}
+    resource = dict(existing)
+    deposit(tiles, resource, Tile.CRYSTAL_SEAM, positions, hits)
+
+    expected_tiles = {pos: Tile.DIRT for pos in positions}
+    expected = dict(existing)
+    for pos, k in zip(positions, hits):
+      for _ in range(k):
+        n = expected.get(pos, 0)
+        if n >= 3 and expected_tiles[pos] != Tile.CRYSTAL_SEAM:
+          expected_tiles[pos] = Tile.CRYSTAL_SEAM
+          expected[pos] = n - 3
+        else:
+          expected[pos] = n + 1
+    self.assertEqual(tiles, expected_tiles)
+    self.assertEqual(resource, expected)
+
+  def test_uniformIndices_matchesUniformChoice(self):
+    choices = tuple(range(37))
+    a = DiceBox(0)['place_ore', 5]
+    b = DiceBox(0)['place_ore', 5]
+    self.assertEqual(
+        list(a.uniform_indices(len(choices), 50)),
+        [b.uniform_choice(choices) for _ in range(50)])
+    self.assertEqual(a.uniform(), b.uniform())
+
+  def test_best_breaksTiesLikeMax(self):
+    tiles = {(0, 0): Tile.FLOOR, (5, 0): Tile.FLOOR}
+    positions = ((1, 0), (4, 0), (4, 9), (9, 9))
+    arrays = TileArrays(tiles, positions)
+    scores = arrays.count((Tile.SOLID_ROCK,))
+    self.assertEqual(
+        arrays.best(scores, scores < 4),
+        max((s, p) for s, p in zip(scores, positions) if s < 4)[1])
+    self.assertIsNone(arrays.best(scores, scores > 4))
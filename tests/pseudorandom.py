@@ -0,0 +1,181 @@
+import itertools
+import math
+import unittest
+
+from lib.base.pseudorandom import DiceBox, PreparedBids, RngProfile
+
+
+def _scan(bids, r):
+  """Picks an item the way weighted_choice always has."""
+  bids = tuple(b for b in bids if b[0] > 0)
+  n = r * sum(w for w, _ in bids)
+  for w, item in bids:
+    n -= w
+    if n <= 0:
+      return item
+  return bids[-1][1]
+
+
+class TestRng(unittest.TestCase):
+  """Tests for drawing several random values at once."""
+  # pylint: disable=missing-function-docstring,invalid-name
+
+  def setUp(self):
+    self.a = DiceBox(0)['lore', 3]
+    self.b = DiceBox(0)['lore', 3]
+    self.choices = tuple(range(23))
+
+  def assertSameStream(self):
+    self.assertEqual(self.a.uniform(), self.b.uniform())
+
+  def test_uniformChoices_matchesUniformChoice(self):
+    self.assertEqual(
+        self.a.uniform_choices(self.choices, 40),
+        [self.b.uniform_choice(self.choices) for _ in range(40)])
+    self.assertSameStream()
+
+  def test_betaChoices_matchesBetaChoice(self):
+    self.assertEqual(
+        self.a.beta_choices(self.choices, 40, a=0.7, b=1.3),
+        [self.b.beta_choice(self.choices, a=0.7, b=1.3) for _ in range(40)])
+    self.assertSameStream()
+
+  def test_uniformChoice_acceptsIterables(self):
+    self.assertEqual(
+        self.a.uniform_choice(iter(self.choices)),
+        self.b.uniform_choice(self.choices))
+
+  def test_sampleIndices_areDifferent(self):
+    indexes = self.a.sample_indices(10, 10)
+    self.assertEqual(sorted(indexes), list(range(10)))
+
+  def test_preparedChoices_matchesWeightedChoice(self):
+    bids = ((0.1, 'a'), (0, 'never'), (0.2, 'b'), (0.3, 'c'), (1.7, 'd'))
+    prepared = self.a.prepare_weights(bids)
+    self.assertEqual(len(prepared), 4)
+    expected = [_scan(bids, self.b.uniform()) for _ in range(200)]
+    self.assertEqual(prepared.items, ('a', 'b', 'c', 'd'))
+    self.assertEqual(
+        self.a.prepared_choices(prepared, 100) + [
+            self.a.prepared_choice(prepared) for _ in range(50)] + [
+                self.a.weighted_choice(bids) for _ in range(50)],
+        expected)
+    self.assertSameStream()
+
+  def test_preparedBids_matchesScanAtBoundaries(self):
+    # The summed weights put half the total at 'b', but subtracting them one
+    # at a time leaves a little over, so weighted_choice picks 'c'.
+    bids = ((0.1, 'a'), (0.2, 'b'), (0.3, 'c'))
+    prepared = PreparedBids(bids)
+    self.assertEqual(prepared.items[prepared.index(prepared.total / 2)], 'c')
+    self.assertEqual(_scan(bids, 0.5), 'c')
+    for w in itertools.accumulate(w for w, _ in bids):
+      edge = w / prepared.total
+      for r in (math.nextafter(edge, 0), edge, math.nextafter(edge, 1)):
+        self.assertEqual(
+            prepared.items[prepared.index(r * prepared.total)],
+            _scan(bids, r))
+
+  def test_preparedBids_rejectsNoWeight(self):
+    with self.assertRaises(ValueError):
+      PreparedBids(((0, 'a'),))
+
+
+class TestDiceBox(unittest.TestCase):
+  """Tests for keeping and dropping streams."""
+  # pylint: disable=missing-function-docstring,invalid-name
+
+  def test_stream_matchesDiceBox(self):
+    self.assertEqual(
+        DiceBox.stream(7, ('place_ore', 4)).uniform(),
+        DiceBox(7)['place_ore', 4].uniform())
+
+  def test_release_dropsStreams(self):
+    dice = DiceBox(7)
+    dice['rough.pearl', 1].uniform()
+    dice['fine.place_crystals', 1].uniform()
+    dice['bubble', 1].uniform()
+    dice['rough.pearl', 2].uniform()
+    dice.release((('rough.pearl', 1), ('fine.place_crystals', 1)))
+    self.assertEqual(set(dice), {('bubble', 1), ('rough.pearl', 2)})
+    with self.assertRaises(ValueError):
+      dice['rough.pearl', 1] # pylint: disable=pointless-statement
+
+  def test_release_remembersIdRange(self):
+    dice = DiceBox(7)
+    for i in (3, 4, 5, 9):
+      dice['place_ore', i].uniform()
+    dice.release((('place_ore', 3), ('place_ore', 5)))
+    self.assertEqual(set(dice), {('place_ore', 4), ('place_ore', 9)})
+    # Streams that are still kept can be used, and new ones can be made
+    # outside the range of released ids or for other kinds.
+    dice['place_ore', 4].uniform()
+    dice['place_ore', 6].uniform()
+    dice['place_ore', -1].uniform()
+    dice['lore', 5].uniform()
+    with self.assertRaises(ValueError):
+      dice['place_ore', 5] # pylint: disable=pointless-statement
+
+
+class TestRngProfile(unittest.TestCase):
+  """Tests for counting what streams draw."""
+  # pylint: disable=missing-function-docstring,invalid-name
+
+  def setUp(self):
+    self.a = DiceBox(0)
+    self.b = DiceBox(0)
+    self.choices = tuple(range(23))
+
+  def test_fingerprint_sameForBatchDraws(self):
+    profile_a = self.a.profile()
+    profile_b = self.b.profile()
+    for _ in range(40):
+      self.a['lore', 3].uniform_choice(self.choices)
+    self.b['lore', 3].uniform_choices(self.choices, 40)
+    self.assertEqual(profile_a.fingerprint(), profile_b.fingerprint())
+    self.assertEqual(profile_a.by_kind()['lore'].draws, 40)
+    self.assertEqual(profile_a.by_kind()['lore'].calls, 40)
+    self.assertEqual(profile_b.by_kind()['lore'].calls, 1)
+
+  def test_fingerprint_sameForBatchBetaDraws(self):
+    profile_a = self.a.profile()
+    profile_b = self.b.profile()
+    for _ in range(40):
+      self.a['lore', 3].beta_choice(self.choices, a=1, b=3)
+    self.b['lore', 3].beta_choices(self.choices, 40, a=1.0, b=3.0)
+    self.assertEqual(profile_a.fingerprint(), profile_b.fingerprint())
+
+  def test_fingerprint_changesWithBetaValues(self):
+    profile_a = self.a.profile()
+    profile_b = self.b.profile()
+    self.a['lore', 3].beta(a=1, b=3)
+    self.b['lore', 3].beta(a=3, b=1)
+    self.assertNotEqual(profile_a.fingerprint(), profile_b.fingerprint())
+
+  def test_fingerprint_changesWithDraws(self):
+    profile_a = self.a.profile()
+    profile_b = self.b.profile()
+    self.a['lore', 3].uniform_choices(self.choices, 40)
+    self.b['lore', 3].uniform_choices(self.choices, 41)
+    self.assertNotEqual(profile_a.fingerprint(), profile_b.fingerprint())
+
+  def test_totals_addUpStreams(self):
+    profile = self.a.profile()
+    self.a['lore', 3].uniform()
+    self.a['lore', 4].shuffle(self.choices)
+    self.a['place_ore', 3].beta_choices(self.choices, 5)
+    self.a.release((('lore', 3), ('place_ore', 3)))
+    self.assertEqual(profile.by_kind()['lore'].draws, 24)
+    self.assertEqual(profile.by_id()[0, 3].draws, 6)
+
+  def test_add_keepsCavernsApart(self):
+    other = DiceBox(1)
+    profiles = (self.a.profile(), other.profile())
+    self.a['lore', 3].uniform()
+    other['lore', 3].uniform_choices(self.choices, 2)
+    batch = RngProfile()
+    for profile in profiles:
+      batch.add(profile)
+    self.assertEqual(batch.by_kind()['lore'].draws, 3)
+    self.assertEqual(batch.by_id()[0, 3].draws, 1)
+    self.assertEqual(batch.by_id()[1, 3].draws, 2)
@@ -1,8 +1,10 @@
 from typing import Dict, Tuple, TypeVar
 
 from lib.plastic import (
-    Building, Creature, Diorama, Facing, Miner, Position, Tile)
+    Building, Creature, Diorama, Facing, Miner, Position, ScriptFragment,
+    ScriptTile, Tile)
 from lib.base import Context, Logger
+from lib.holistics import validate_script
 from tests.base import SerializedCavernTest
 
 T = TypeVar('T')
@@ -182,3 +184,37 @@ class TestSerialize(SerializedCavernTest):
       Position.at_center_of_tile((0, 5), Facing.NORTH))
 
     self.assertDioramaMatches(d, 'serialize/entity_zoo')
+
+  def test_serializesScript_offsetsTiles(self):
+    sf = ScriptFragment((
+        'int a=0',
+        ('when(enter:', ScriptTile(2, 5), ')[a]'),
+    ))
+    self.assertEqual(sf.serialize((1, -3)), 'int a=0\nwhen(enter:2,3)[a]')
+
+  def test_serializesScript_keepsOrderOfSums(self):
+    a, b, c, d = (ScriptFragment((s,)) for s in 'abcd')
+    sf = ScriptFragment(()) + (a + b) + (c + d)
+    self.assertEqual(len(sf), 4)
+    self.assertEqual(str(sf), 'a\nb\nc\nd')
+
+  def test_validateScript_findsMistakes(self):
+    d = Diorama(self.dummy_context)
+    d.bounds = (0, 0, 10, 10)
+    d.script.add(ScriptFragment((
+        'int test_p1_state=0',
+        ('when(enter:', ScriptTile(3, 12), ')[test_p1_spawn]'),
+        'test_p1_onActive::;',
+        'test_p1_state=1',
+        'test_p1_count=2;',
+        '',
+    )))
+    d.script.add(ScriptFragment(('int test_p1_other=0',)))
+    self.assertEqual(validate_script(d), [
+        'Tile 3,12 is outside the 10x10 cavern',
+        'Statement does not end with ";": test_p1_state=1',
+        'Variable test_p1_other uses the prefix test_p1_, which belongs to '
+        'another fragment',
+        'Event test_p1_spawn is never defined: when(enter:12,3)[test_p1_spawn]',
+        'Variable test_p1_count is never declared: test_p1_count=2;',
+    ])